@@ -0,0 +1,151 @@
+from typing import List, Dict, Tuple
+from collections import Counter
+import math
+import os
+import re
+import threading
+
+# Messages routed locally with at least this confidence skip the LLM router
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.8"))
+# The learned model is only trusted once it has seen enough routed messages
+ROUTER_MIN_TRAINING_EXAMPLES = int(os.getenv("ROUTER_MIN_TRAINING_EXAMPLES", "50"))
+
+AGENTS = ["JobSearch", "SkillAdvisor", "ResumeReviewer", "LearningAgent", "Chat"]
+
+GREETINGS = {"hi", "hii", "hello", "hey", "thanks", "thank", "thx", "ok", "okay", "bye", "good", "morning", "evening", "yo", "sup"}
+JOB_WORDS = {"job", "jobs", "opening", "openings", "position", "positions", "vacancy", "vacancies", "hiring", "role", "roles", "internship", "internships"}
+ROLE_WORDS = {
+    "python", "java", "javascript", "typescript", "react", "angular", "node", "django", "sql", "aws", "devops",
+    "data", "frontend", "backend", "fullstack", "full", "stack", "ml", "ai", "android", "ios", "cloud", "golang",
+    "developer", "engineer", "designer", "analyst", "scientist", "manager", "tester", "qa", "sre", "architect"
+}
+RESUME_WORDS = {"resume", "cv", "résumé"}
+TEST_PHRASES = ["mock test", "quiz", "test me", "assessment", "practice test", "skill test"]
+ADVICE_PHRASES = ["learning path", "roadmap", "what should i learn", "which skills", "skill gap", "career advice", "become a", "upskill", "learn "]
+
+TOKEN_RE = re.compile(r"[a-zA-Z][a-zA-Z+#.]*")
+
+def tokenize(text: str) -> List[str]:
+    return [t.strip(".").lower() for t in TOKEN_RE.findall(text)]
+
+class NaiveBayesIntentModel:
+    """
+    Multinomial naive Bayes over message tokens, trained on past
+    (user message -> agent the LLM router chose) pairs from chat history.
+    """
+    def __init__(self):
+        self.class_counts = Counter()
+        self.token_counts = {agent: Counter() for agent in AGENTS}
+        self.vocabulary = set()
+
+    @property
+    def size(self) -> int:
+        return sum(self.class_counts.values())
+
+    def train(self, examples: List[Tuple[str, str]]):
+        for text, agent in examples:
+            if agent not in self.token_counts:
+                continue
+            tokens = tokenize(text)
+            self.class_counts[agent] += 1
+            self.token_counts[agent].update(tokens)
+            self.vocabulary.update(tokens)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        tokens = tokenize(text)
+        total = self.size
+        vocab_size = len(self.vocabulary) or 1
+        log_probs = {}
+        for agent, count in self.class_counts.items():
+            agent_tokens = self.token_counts[agent]
+            denominator = sum(agent_tokens.values()) + vocab_size
+            score = math.log(count / total)
+            for token in tokens:
+                score += math.log((agent_tokens[token] + 1) / denominator)
+            log_probs[agent] = score
+        if not log_probs:
+            return "Chat", 0.0
+
+        # Softmax over log scores to get a posterior for the best class
+        best = max(log_probs, key=log_probs.get)
+        peak = log_probs[best]
+        norm = sum(math.exp(v - peak) for v in log_probs.values())
+        return best, 1.0 / norm
+
+class IntentRouter:
+    """
+    Local fast-path router: keyword rules plus a naive Bayes model trained on
+    previously routed messages. Returns an agent decision with a confidence;
+    callers fall back to the LLM router when the confidence is too low.
+    """
+    def __init__(self, threshold: float = ROUTER_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.model = NaiveBayesIntentModel()
+        self._lock = threading.Lock()
+        self.stats = {"rules": 0, "model": 0, "llm": 0, "agents": Counter()}
+
+    def train_from_history(self, examples: List[Tuple[str, str]]):
+        model = NaiveBayesIntentModel()
+        model.train(examples)
+        self.model = model
+
+    def _rules(self, message: str) -> Tuple[str, float]:
+        text = message.lower()
+        tokens = tokenize(message)
+        words = set(tokens)
+        matches = []
+
+        if words & RESUME_WORDS:
+            matches.append(("ResumeReviewer", 0.9))
+        if any(p in text for p in TEST_PHRASES):
+            matches.append(("LearningAgent", 0.9))
+        if words & JOB_WORDS:
+            # "find me jobs" alone usually needs a clarifying question, which
+            # only the LLM router decides, so require a role or a location
+            has_target = bool(words & ROLE_WORDS) or bool(re.search(r"\b(in|at|near)\s+[a-z]", text)) or "remote" in words
+            matches.append(("JobSearch", 0.9 if has_target else 0.5))
+        if any(p in text for p in ADVICE_PHRASES):
+            matches.append(("SkillAdvisor", 0.85))
+        if tokens and len(tokens) <= 4 and words <= GREETINGS | {"there", "you", "much", "a", "lot", "how", "are"}:
+            matches.append(("Chat", 0.95))
+
+        if not matches:
+            return "Chat", 0.0
+        matches.sort(key=lambda m: m[1], reverse=True)
+        agent, confidence = matches[0]
+        if len(matches) > 1:
+            # Conflicting signals, e.g. "jobs that need a resume": let the LLM decide
+            confidence *= 0.6
+        return agent, confidence
+
+    def classify(self, message: str) -> Dict:
+        agent, confidence = self._rules(message)
+        source = "rules"
+
+        if self.model.size >= ROUTER_MIN_TRAINING_EXAMPLES:
+            model_agent, model_confidence = self.model.predict(message)
+            if model_agent == agent and confidence > 0:
+                # Independent agreement raises confidence
+                confidence = 1 - (1 - confidence) * (1 - model_confidence)
+            elif model_confidence > confidence:
+                agent, confidence, source = model_agent, model_confidence, "model"
+
+        return {"agent": agent, "confidence": round(confidence, 3), "source": source}
+
+    def record(self, source: str, agent: str):
+        with self._lock:
+            self.stats[source] += 1
+            self.stats["agents"][agent] += 1
+
+    def get_stats(self) -> Dict:
+        total = self.stats["rules"] + self.stats["model"] + self.stats["llm"]
+        return {
+            "total": total,
+            "rules": self.stats["rules"],
+            "model": self.stats["model"],
+            "llm": self.stats["llm"],
+            "fast_path_rate": round((total - self.stats["llm"]) / total, 3) if total else 0.0,
+            "agents": dict(self.stats["agents"]),
+            "training_examples": self.model.size,
+            "threshold": self.threshold
+        }
@@ -1,15 +1,70 @@
-from typing import List
+from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from models import JobPosting
-from llm_engine import generate_json_response
+from llm_engine import generate_json_response_async
 from database import db
+from fastapi.concurrency import run_in_threadpool
+from dedupe import job_id_for, posting_signature, collapse_near_duplicates
+from search_backends import SearchBackend, get_search_backend
+from cache import LRUCache, StaleWhileRevalidateCache
+from metrics import AGENT_DURATION, WEB_SEARCH_DURATION, timed
 import json
-from duckduckgo_search import DDGS
+import os
+import re
 import random
+import asyncio
+
+# Web search fan-out: a request expands into up to SEARCH_MAX_QUERIES query
+# variants, run at most SEARCH_CONCURRENCY at a time across all requests.
+# Whatever has not answered by SEARCH_DEADLINE_SECONDS is dropped.
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "4"))
+SEARCH_MAX_QUERIES = int(os.getenv("SEARCH_MAX_QUERIES", "6"))
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "6"))
+SEARCH_RESULTS_PER_QUERY = 10
+SEARCH_MAX_RESULTS = 20
+# Reciprocal rank fusion constant: higher values flatten the weight of top ranks
+RRF_K = 60
+
+# Search clients block, so they run on a dedicated pool rather than the loop's default one
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_CONCURRENCY, thread_name_prefix="web-search")
+
+# Web results are cached per canonical (keywords, locations) for all users.
+# After the TTL an entry is still served for SEARCH_CACHE_STALE_SECONDS while
+# a background search refreshes it.
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "900"))
+SEARCH_CACHE_STALE_SECONDS = float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "3600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1000"))
+
+search_cache = StaleWhileRevalidateCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_STALE_SECONDS)
+# Canonical query text -> extracted (keywords, location), so rephrasings of a
+# cached search skip the LLM extraction call too
+_params_cache = LRUCache(SEARCH_CACHE_SIZE)
+PARAMS_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+QUERY_STOPWORDS = {
+    "a", "an", "the", "me", "my", "i", "im", "am", "want", "need", "looking", "find", "search", "show", "get",
+    "give", "list", "any", "some", "please", "for", "in", "at", "near", "around", "job", "jobs", "opening",
+    "openings", "role", "roles", "position", "positions", "vacancy", "vacancies"
+}
+
+def canonical_query(query: str) -> str:
+    """Order- and filler-insensitive form of a search request: "Python jobs in Hyderabad" == "hyderabad python"."""
+    tokens = {t for t in re.findall(r"\w+", query.lower()) if t not in QUERY_STOPWORDS}
+    return " ".join(sorted(tokens))
+
+def search_cache_key(keywords: List[str], locations: List[str]) -> str:
+    return json.dumps([
+        sorted({" ".join(str(k).lower().split()) for k in keywords}),
+        [l.lower() for l in locations]
+    ])
+
+def get_search_cache_stats() -> Dict:
+    return {**search_cache.get_stats(), "query_params_entries": len(_params_cache)}
 
 MOCK_JOBS = [
     # Python Jobs
     JobPosting(
-        id="1",
+        id="mock-1",
         title="Senior Python Developer",
         company="TechCorp India",
         description="We are looking for an experienced Python developer to join our backend team in Hyderabad.",
@@ -18,7 +73,7 @@ MOCK_JOBS = [
         salary_range="₹20L - ₹30L"
     ),
     JobPosting(
-        id="2",
+        id="mock-2",
         title="Python Backend Engineer",
         company="DataSoft Solutions",
         description="Build scalable backend systems with Python and Django.",
@@ -28,7 +83,7 @@ MOCK_JOBS = [
     ),
     # Frontend Jobs
     JobPosting(
-        id="3",
+        id="mock-3",
         title="Frontend Engineer",
         company="CreativeSolutions",
         description="Build beautiful user interfaces with React in our Mumbai office.",
@@ -37,7 +92,7 @@ MOCK_JOBS = [
         salary_range="₹15L - ₹22L"
     ),
     JobPosting(
-        id="4",
+        id="mock-4",
         title="React Developer",
         company="WebWorks India",
         description="Join our frontend team to create amazing web experiences.",
@@ -47,7 +102,7 @@ MOCK_JOBS = [
     ),
     # Data Science
     JobPosting(
-        id="5",
+        id="mock-5",
         title="Data Scientist",
         company="DataGenius Analytics",
         description="Analyze large datasets and build ML models for our Bangalore office.",
@@ -56,7 +111,7 @@ MOCK_JOBS = [
         salary_range="₹25L - ₹35L"
     ),
     JobPosting(
-        id="6",
+        id="mock-6",
         title="ML Engineer",
         company="AI Innovations",
         description="Work on cutting-edge machine learning projects.",
@@ -66,7 +121,7 @@ MOCK_JOBS = [
     ),
     # DevOps
     JobPosting(
-        id="7",
+        id="mock-7",
         title="DevOps Engineer",
         company="CloudSystems India",
         description="Manage our cloud infrastructure and CI/CD pipelines.",
@@ -75,7 +130,7 @@ MOCK_JOBS = [
         salary_range="₹20L - ₹28L"
     ),
     JobPosting(
-        id="8",
+        id="mock-8",
         title="Site Reliability Engineer",
         company="ScaleOps",
         description="Ensure reliability and performance of our production systems.",
@@ -85,7 +140,7 @@ MOCK_JOBS = [
     ),
     # Java Jobs
     JobPosting(
-        id="9",
+        id="mock-9",
         title="Java Full Stack Developer",
         company="Enterprise Solutions Ltd",
         description="Develop enterprise applications using Java and Spring Boot.",
@@ -96,10 +151,19 @@ MOCK_JOBS = [
 ]
 
 class JobSearchAgent:
-    def search(self, query: str, user_context: dict = None) -> List[JobPosting]:
+    def __init__(self, backend: SearchBackend = None):
+        self.backend = backend or get_search_backend()
+        self._timed_search = timed(WEB_SEARCH_DURATION, backend=type(self.backend).__name__)(self.backend.search)
+        self._refresh_tasks = set()
+        # The catalogue lives in the same full-text index as stored jobs
+        db.index_catalogue([job.dict() for job in MOCK_JOBS])
+
+    @timed(AGENT_DURATION, agent="JobSearch", operation="search")
+    async def search(self, user_id: int, query: str, user_context: dict = None) -> List[JobPosting]:
         """
-        Uses LLM to extract keywords AND location, then searches web using DuckDuckGo.
-        Falls back to mock jobs if web search fails.
+        Uses LLM to extract keywords AND location, then searches the web with
+        several query variants at once and merges the results.
+        Falls back to the local job index if web search finds nothing.
         """
         # Extract search parameters using LLM
         prompt = f"""
@@ -112,93 +176,180 @@ class JobSearchAgent:
         Example: "Find Python jobs in Hyderabad" -> {{"keywords": ["Python"], "location": "Hyderabad"}}
         """
         
-        try:
-            response_text = generate_json_response(prompt)
-            params = json.loads(response_text)
-            keywords = params.get("keywords", [query])
-            location = params.get("location")
-        except:
-            keywords = [query]
-            location = None
+        params_key = canonical_query(query)
+        cached_params = _params_cache.get(params_key) if params_key else None
+        if cached_params:
+            keywords, location = cached_params
+        else:
+            try:
+                response_text = await generate_json_response_async(prompt, cache_family="job_params")
+                params = json.loads(response_text)
+                keywords = params.get("keywords", [query])
+                location = params.get("location")
+                if params_key:
+                    _params_cache.set(params_key, (keywords, location), PARAMS_CACHE_TTL_SECONDS)
+            except:
+                keywords = [query]
+                location = None
 
         # Fall back to user's preferred location if not specified
         if not location and user_context:
             location = user_context.get("preferences", {}).get("preferred_location")
 
+        # "Pune or Mumbai" searches both cities; the first one is the primary location
+        locations = [l.strip() for l in re.split(r",|/|\bor\b|\band\b", location or "") if l.strip()]
+        location = locations[0] if locations else None
+
         # Update user's preferred location if a new one is mentioned
         if location and user_context:
-            db.update_user_preference("preferred_location", location)
-
-        # Construct search query
-        search_query = f"{' '.join(keywords)} jobs"
-        if location:
-            search_query += f" in {location}"
-
-        print(f"Searching for: {search_query}")
+            await run_in_threadpool(db.update_user_preference, user_id, "preferred_location", location)
 
-        real_jobs = []
-        try:
-            with DDGS() as ddgs:
-                results = ddgs.text(search_query, max_results=10)
-                for i, r in enumerate(results):
-                    # Create a JobPosting from the search result
-                    # Since DDG returns title, href, body, we need to infer some details
-                    title = r.get('title', 'Job Opening')
-                    link = r.get('href', '#')
-                    snippet = r.get('body', '')
-                    
-                    # Basic extraction (naive)
-                    company = "Unknown Company"
-                    if "-" in title:
-                        parts = title.split("-")
-                        company = parts[-1].strip()
-                        title = "-".join(parts[:-1]).strip()
-                    
-                    real_jobs.append(JobPosting(
-                        id=f"web-{i}",
-                        title=title,
-                        company=company,
-                        description=snippet,
-                        requirements=keywords, # Assume keywords are requirements
-                        location=location if location else "Remote/Unknown",
-                        salary_range="Not specified",
-                        application_details={"link": link} # Store link to apply
-                    ))
-        except Exception as e:
-            print(f"Web search failed: {e}")
+        variants = self._query_variants(keywords, locations)
+        cache_key = search_cache_key(keywords, locations)
+        cached, stale = search_cache.get(cache_key)
+        if cached is not None:
+            if stale and search_cache.begin_refresh(cache_key):
+                task = asyncio.ensure_future(self._refresh(cache_key, variants, keywords))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return [JobPosting(**job) for job in cached]
 
+        print(f"Searching for: {[q for q, _ in variants]}")
+        real_jobs = await self._web_search(variants, keywords)
         if real_jobs:
+            search_cache.set(cache_key, [job.dict() for job in real_jobs])
             return real_jobs
 
-        # Fallback to Mock Jobs if no web results
-        results = []
-        for job in MOCK_JOBS:
-            match_score = 0
-            job_text = (job.title + " " + job.description + " " + " ".join(job.requirements)).lower()
-            
-            # Match keywords
-            for keyword in keywords:
-                if keyword.lower() in job_text:
-                    match_score += 1
-            
-            # Match location (exact or contains)
-            if location:
-                if location.lower() in job.location.lower():
-                    match_score += 2  # Location match is more important
-            
-            if match_score > 0:
-                results.append(job)
-        
-        # Sort by relevance
-        if location:
-            # Prioritize location matches
-            results.sort(key=lambda j: (location.lower() in j.location.lower(), j.id), reverse=True)
-        
+        # Fall back to the local index (the user's stored jobs plus the mock catalogue).
+        # Catalogue jobs are also stored once shown, so keep the best hit per id.
+        matches = {}
+        local = await run_in_threadpool(db.search_jobs, user_id, " ".join(keywords), location, limit=20,
+                                        include_catalogue=True)
+        for job in local:
+            matches.setdefault(job["id"], JobPosting(**job))
+        results = list(matches.values())[:10]
+
         if not results:
             # If no matches, show jobs from preferred location or all jobs
             if location:
                 results = [j for j in MOCK_JOBS if location.lower() in j.location.lower()]
             if not results:
                 results = MOCK_JOBS[:3]  # Show first 3 as fallback
-            
+
         return results
+
+    def _collapse_duplicates(self, jobs: List[JobPosting]) -> List[JobPosting]:
+        """
+        Keeps one posting per group of near-duplicates (the same job syndicated on
+        several boards), and reuses the id of a stored near-duplicate so the
+        existing row is refreshed instead of a second copy being added.
+        """
+        signatures = [posting_signature(j.title, j.company, j.description) for j in jobs]
+        unique = {}
+        for i in collapse_near_duplicates(signatures):
+            job = jobs[i]
+            existing = db.find_near_duplicate(signatures[i])
+            if existing:
+                job.id = existing
+            if job.id not in unique:
+                unique[job.id] = (job, signatures[i])
+
+        db.add_job_signatures({job_id: sig for job_id, (job, sig) in unique.items() if sig})
+        return [job for job, sig in unique.values()]
+
+    def _query_variants(self, keywords: List[str], locations: List[str]) -> List[Tuple[str, str]]:
+        """
+        (query, location label) pairs to search, most specific first: all
+        keywords per location, each keyword on its own, then a remote variant.
+        """
+        terms = " ".join(keywords)
+        places = locations or [None]
+        variants = [(f"{terms} jobs in {place}" if place else f"{terms} jobs", place or "Remote/Unknown") for place in places]
+        if len(keywords) > 1:
+            variants += [(f"{k} jobs in {places[0]}" if places[0] else f"{k} jobs", places[0] or "Remote/Unknown") for k in keywords]
+        variants.append((f"remote {terms} jobs", "Remote"))
+
+        unique = {}
+        for q, label in variants:
+            q = " ".join(q.split())
+            unique.setdefault(q.lower(), (q, label))
+        variants = list(unique.values())
+        # Keep the remote variant even when there are many keywords
+        if len(variants) > SEARCH_MAX_QUERIES:
+            variants = variants[:SEARCH_MAX_QUERIES - 1] + variants[-1:]
+        return variants
+
+    async def _web_search(self, variants: List[Tuple[str, str]], keywords: List[str]) -> List[JobPosting]:
+        real_jobs = await self._fan_out(variants, keywords)
+        # Duplicate detection reads and writes stored signatures
+        return await run_in_threadpool(self._collapse_duplicates, real_jobs) if real_jobs else []
+
+    async def _refresh(self, cache_key: str, variants: List[Tuple[str, str]], keywords: List[str]):
+        """Re-runs a stale cached search in the background; on failure the stale entry stays."""
+        try:
+            print(f"Refreshing cached search: {[q for q, _ in variants]}")
+            real_jobs = await self._web_search(variants, keywords)
+            if real_jobs:
+                search_cache.set(cache_key, [job.dict() for job in real_jobs])
+        except Exception as e:
+            print(f"Search refresh failed: {e}")
+        finally:
+            search_cache.end_refresh(cache_key)
+
+    async def _fan_out(self, variants: List[Tuple[str, str]], keywords: List[str]) -> List[JobPosting]:
+        """
+        Runs every query variant concurrently and merges the results with
+        reciprocal rank fusion, so postings found by several variants rank first.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = [
+            loop.run_in_executor(_search_executor, self._timed_search, q, SEARCH_RESULTS_PER_QUERY)
+            for q, _ in variants
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=SEARCH_DEADLINE_SECONDS)
+        for task in pending:
+            # Queued queries never start; ones already running finish in the background
+            task.cancel()
+        if pending:
+            print(f"Web search: {len(pending)} of {len(tasks)} queries missed the {SEARCH_DEADLINE_SECONDS}s deadline")
+
+        merged = {}
+        for (q, label), task in zip(variants, tasks):
+            if task not in done:
+                continue
+            if task.exception():
+                print(f"Web search failed for '{q}': {task.exception()}")
+                continue
+            for rank, r in enumerate(task.result()):
+                job = self._posting_from_result(r, keywords, label)
+                entry = merged.setdefault(job.id, [0.0, job])
+                entry[0] += 1.0 / (RRF_K + rank + 1)
+
+        ranked = sorted(merged.values(), key=lambda entry: entry[0], reverse=True)
+        return [job for _, job in ranked[:SEARCH_MAX_RESULTS]]
+
+    @staticmethod
+    def _posting_from_result(r: Dict, keywords: List[str], location: str) -> JobPosting:
+        # Create a JobPosting from the search result
+        # Since DDG returns title, href, body, we need to infer some details
+        title = r.get('title', 'Job Opening')
+        link = r.get('href', '#')
+        snippet = r.get('body', '')
+
+        # Basic extraction (naive)
+        company = "Unknown Company"
+        if "-" in title:
+            parts = title.split("-")
+            company = parts[-1].strip()
+            title = "-".join(parts[:-1]).strip()
+
+        return JobPosting(
+            id=job_id_for(link, title),
+            title=title,
+            company=company,
+            description=snippet,
+            requirements=keywords, # Assume keywords are requirements
+            location=location,
+            salary_range="Not specified",
+            application_details={"link": link} # Store link to apply
+        )
@@ -1,21 +1,19 @@
 from typing import List, Dict
-from llm_engine import generate_json_response
+from llm_engine import generate_json_response_async
 import json
 from database import db
+from metrics import AGENT_DURATION, timed
 
 class LearningAgent:
-    def create_learning_path(self, skill: str, jobs: List[Dict] = None) -> Dict:
+    @timed(AGENT_DURATION, agent="LearningAgent", operation="create_learning_path")
+    async def create_learning_path(self, skill: str, jobs: List[Dict] = None) -> Dict:
         """
-        Creates a learning path for a specific skill, optionally based on job requirements.
+        Creates a learning path for a specific skill. The prompt depends on the
+        skill alone so every search that surfaces it shares one cached path;
+        `jobs` is only recorded as the jobs the path was created from.
         """
-        job_context = ""
-        if jobs:
-            job_titles = [job.get("title", "") for job in jobs[:3]]
-            job_context = f"\nThis skill is required for: {', '.join(job_titles)}"
-        
         prompt = f"""
         Create a comprehensive learning path for learning: {skill}
-        {job_context}
         
         Include:
         1. Prerequisites (if any)
@@ -43,7 +41,7 @@ class LearningAgent:
         """
         
         try:
-            response_text = generate_json_response(prompt)
+            response_text = await generate_json_response_async(prompt, cache_family="learning_path")
             learning_path = json.loads(response_text)
             learning_path["auto_generated"] = True
             learning_path["created_from_jobs"] = [job.get("id") for job in jobs] if jobs else []
@@ -59,7 +57,8 @@ class LearningAgent:
                 "interview_tips": []
             }
 
-    def generate_test(self, topic: str, difficulty: str = "Intermediate") -> Dict:
+    @timed(AGENT_DURATION, agent="LearningAgent", operation="generate_test")
+    async def generate_test(self, topic: str, difficulty: str = "Intermediate") -> Dict:
         """
         Generates a mock test using LLM.
         """
@@ -84,17 +83,18 @@ class LearningAgent:
         """
         
         try:
-            response_text = generate_json_response(prompt)
+            response_text = await generate_json_response_async(prompt, cache_family="mock_test")
             test_data = json.loads(response_text)
             return test_data
         except Exception as e:
             return {"error": "Failed to generate test", "topic": topic}
 
-    def evaluate_test(self, test_id: str, user_answers: Dict[str, str]) -> Dict:
+    @timed(AGENT_DURATION, agent="LearningAgent", operation="evaluate_test")
+    def evaluate_test(self, user_id: int, test_id: str, user_answers: Dict[str, str]) -> Dict:
         """
         Evaluates a test by comparing user answers to correct answers.
         """
-        test = db.get_skill_test(test_id)
+        test = db.get_skill_test(user_id, test_id)
         if not test:
             return {"error": "Test not found"}
         
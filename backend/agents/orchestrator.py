@@ -2,9 +2,14 @@ from .job_search import JobSearchAgent
 from .skill_advisor import SkillAdvisorAgent
 from .resume_reviewer import ResumeReviewerAgent
 from .learning_agent import LearningAgent
-from llm_engine import generate_json_response
+from .intent_router import IntentRouter
+from llm_engine import generate_json_response_async, stream_response_async
 from database import db
+from fastapi.concurrency import run_in_threadpool
+from task_queue import task_queue
+from metrics import AGENT_DURATION
 import json
+import time
 
 class OrchestratorAgent:
     def __init__(self):
@@ -12,58 +17,108 @@ class OrchestratorAgent:
         self.skill_advisor = SkillAdvisorAgent()
         self.resume_reviewer = ResumeReviewerAgent()
         self.learning_agent = LearningAgent()
+        self.router = IntentRouter()
+        self.router.train_from_history(db.get_routed_messages())
+        # Learning paths and skill tests for skill gaps are generated in the background
+        task_queue.register("learning_path", self._create_learning_path)
+        task_queue.register("skill_test", self._create_skill_test)
+
+    async def process_message(self, user_id: int, message: str, context: dict = {}, session_id: str = None) -> dict:
+        async for event in self.stream_message(user_id, message, context, session_id):
+            if event["event"] == "done":
+                return event["data"]
+
+    async def stream_message(self, user_id: int, message: str, context: dict = {}, session_id: str = None):
+        """
+        Runs the pipeline for one chat turn, yielding events as they happen:
+        routing, jobs, token (reply text), tasks with the background tasks
+        queued for skill gaps (they finish after the stream ends; clients poll
+        GET /api/tasks/{id}), and finally done with the same payload
+        process_message returns.
+        The turn goes to session_id, or to the user's active session if None.
+        """
+        yield {"event": "status", "data": {"stage": "routing"}}
+
+        # Resolved once, so the reply lands next to the message even if the
+        # user switches sessions while this turn is running. The database is
+        # synchronous, so every call from here on runs in the threadpool.
+        if not session_id:
+            session_id = (await run_in_threadpool(db.get_active_session, user_id, message_limit=0))["id"]
 
-    def process_message(self, message: str, context: dict = {}) -> dict:
         # Save User Message
-        db.add_message("user", message)
+        message_id = await run_in_threadpool(db.add_message, user_id, "user", message, session_id=session_id)
 
         # Get Chat History for Context
-        user_context = db.get_user_context()
+        user_context = await run_in_threadpool(db.get_user_context, user_id, session_id)
         history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in user_context.get("chat_history", [])[-5:]])
         user_profile = user_context.get("profile", {})
 
-        prompt = f"""
-        You are an Orchestrator Agent. Route the user's request.
+        # Cheap local routing first; only ambiguous messages pay for the LLM router
+        route_start = time.perf_counter()
+        route_outcome = "ok"
+        local = self.router.classify(message)
+        if local["confidence"] >= self.router.threshold:
+            agent_name = local["agent"]
+            reasoning = f"Fast path ({local['source']}, confidence {local['confidence']})"
+            needs_clarification = False
+            missing_info = []
+            route_source = local["source"]
+            self.router.record(local["source"], agent_name)
+        else:
+            prompt = f"""
+            You are an Orchestrator Agent. Route the user's request.
         
-        Chat History:
-        {history_str}
+            Chat History:
+            {history_str}
         
-        User Message: "{message}"
-        User Profile Location: {user_profile.get('location', 'Not specified')}
-        User Skills: {', '.join(user_profile.get('skills', [])) if user_profile.get('skills') else 'Not specified'}
+            User Message: "{message}"
+            User Profile Location: {user_profile.get('location', 'Not specified')}
+            User Skills: {', '.join(user_profile.get('skills', [])) if user_profile.get('skills') else 'Not specified'}
         
-        Available Agents:
-        1. JobSearch: Finding jobs, job hunting, career opportunities.
-        2. SkillAdvisor: Advice on skills, learning paths, career guidance.
-        3. ResumeReviewer: Resume feedback and analysis.
-        4. LearningAgent: Creating mock tests, quizzes, skill assessments.
-        5. Chat: General conversation, greetings, questions, asking for clarification.
+            Available Agents:
+            1. JobSearch: Finding jobs, job hunting, career opportunities.
+            2. SkillAdvisor: Advice on skills, learning paths, career guidance.
+            3. ResumeReviewer: Resume feedback and analysis.
+            4. LearningAgent: Creating mock tests, quizzes, skill assessments.
+            5. Chat: General conversation, greetings, questions, asking for clarification.
         
-        Return JSON:
-        {{
-            "agent": "JobSearch" | "SkillAdvisor" | "ResumeReviewer" | "LearningAgent" | "Chat",
-            "reasoning": "...",
-            "needs_clarification": true/false,
-            "missing_info": ["location", "job_role", "experience_level"] (if needs_clarification is true)
-        }}
-        """
+            Return JSON:
+            {{
+                "agent": "JobSearch" | "SkillAdvisor" | "ResumeReviewer" | "LearningAgent" | "Chat",
+                "reasoning": "...",
+                "needs_clarification": true/false,
+                "missing_info": ["location", "job_role", "experience_level"] (if needs_clarification is true)
+            }}
+            """
         
-        try:
-            response_text = generate_json_response(prompt)
-            decision = json.loads(response_text)
-            agent_name = decision.get("agent", "Chat")
-            reasoning = decision.get("reasoning", "Defaulting to chat")
-            needs_clarification = decision.get("needs_clarification", False)
-            missing_info = decision.get("missing_info", [])
-        except:
-            agent_name = "Chat"
-            reasoning = "Error in routing"
-            needs_clarification = False
-            missing_info = []
+            try:
+                response_text = await generate_json_response_async(prompt)
+                decision = json.loads(response_text)
+                agent_name = decision.get("agent", "Chat")
+                reasoning = decision.get("reasoning", "Defaulting to chat")
+                needs_clarification = decision.get("needs_clarification", False)
+                missing_info = decision.get("missing_info", [])
+                route_source = "llm"
+            except:
+                agent_name = "Chat"
+                reasoning = "Error in routing"
+                needs_clarification = False
+                missing_info = []
+                route_outcome = "error"
+                route_source = "error"
+            self.router.record("llm", agent_name)
+        if agent_name == "JobSearch" and needs_clarification and missing_info:
+            route_source = "clarification"
+        await run_in_threadpool(db.set_message_route, message_id, agent_name, route_source)
+        AGENT_DURATION.observe(time.perf_counter() - route_start, agent="Orchestrator", operation="route", outcome=route_outcome)
+
+        yield {"event": "routing", "data": {"agent": agent_name, "reasoning": reasoning}}
 
         response_data = None
         agent_response = ""
         jobs_found = []
+        tasks = []
+        streamed = False
 
         if agent_name == "JobSearch":
             # Check if we need to ask clarifying questions
@@ -82,29 +137,34 @@ class OrchestratorAgent:
                 Return just the question text, no JSON.
                 """
                 
-                try:
-                    from llm_engine import generate_response
-                    agent_response = generate_response(clarification_prompt)
-                except:
+                async for chunk in stream_response_async(clarification_prompt):
+                    agent_response += chunk
+                    yield {"event": "token", "data": {"text": chunk}}
+                if not agent_response:
                     agent_response = f"I'd love to help! Could you tell me more about: {', '.join(missing_info)}?"
+                    yield {"event": "token", "data": {"text": agent_response}}
                 
-                db.add_message("agent", agent_response, "Chat")
-                return {
+                await run_in_threadpool(db.add_message, user_id, "agent", agent_response, "Chat", session_id)
+                yield {"event": "done", "data": {
                     "agent": "Chat",
+                    "session_id": session_id,
                     "response": agent_response,
                     "data": None,
                     "reasoning": "Asking for clarification",
                     "needs_clarification": True
-                }
+                }}
+                return
             
             # Search for jobs
-            jobs = self.job_search.search(message, user_context)
-            db.add_jobs([job.dict() for job in jobs])
+            jobs = await self.job_search.search(user_id, message, user_context)
+            ingested = await run_in_threadpool(db.add_jobs, user_id, [job.dict() for job in jobs])
             jobs_found = [job.dict() for job in jobs]
             response_data = jobs_found
+            yield {"event": "jobs", "data": jobs_found}
             
-            # Log activity
-            db.log_activity("job_search", {"query": message, "results_count": len(jobs)})
+            # Log activity, with how many postings were new, refreshed or unchanged
+            activity = {"query": message, "results_count": len(jobs), "stored": ingested}
+            await run_in_threadpool(db.log_activity, user_id, "job_search", activity)
             
             # Extract unique skills from all jobs
             all_skills = set()
@@ -117,25 +177,6 @@ class OrchestratorAgent:
             # Identify skill gaps
             skill_gaps = list(all_skills - user_skills)
             
-            # Auto-generate learning paths for skill gaps
-            if skill_gaps:
-                for skill in skill_gaps[:3]:  # Limit to top 3 gaps
-                    try:
-                        learning_path = self.learning_agent.create_learning_path(skill, jobs_found)
-                        db.update_learning_path(learning_path)
-                        db.log_activity("learning_started", {"skill": skill, "auto_generated": True})
-                    except Exception as e:
-                        print(f"Failed to create learning path for {skill}: {e}")
-                
-                # Auto-generate skill tests for top gaps
-                for skill in skill_gaps[:2]:  # Top 2 skills
-                    try:
-                        test_questions = self.skill_advisor.generate_test(skill, "intermediate")
-                        job_ids = [job.id for job in jobs if skill in job.requirements]
-                        db.create_skill_test(skill, "intermediate", test_questions, job_ids)
-                    except Exception as e:
-                        print(f"Failed to create test for {skill}: {e}")
-            
             # Build response
             location_msg = ""
             if user_context.get("preferences", {}).get("preferred_location"):
@@ -143,12 +184,28 @@ class OrchestratorAgent:
             
             agent_response = f"🎯 I've found {len(jobs)} real job opportunities{location_msg}!\n\n"
             agent_response += f"✨ These are live positions from company websites. Click 'Apply Now' to go directly to the company's job portal.\n\n"
+            yield {"event": "token", "data": {"text": agent_response}}
             
-            if skill_gaps:
-                agent_response += f"📚 I've also created learning paths for: {', '.join(skill_gaps[:3])}\n"
-                agent_response += f"✅ Skill tests are ready for: {', '.join(skill_gaps[:2])}\n\n"
+            # Queue learning paths and skill tests for skill gaps; they land in the
+            # Learning Hub as workers finish them, without holding up this reply
+            tasks = await self._queue_skill_gap_tasks(user_id, skill_gaps, jobs)
+            if tasks:
+                yield {"event": "tasks", "data": tasks}
+            paths_queued = [t["skill"] for t in tasks if t["kind"] == "learning_path"]
+            tests_queued = [t["skill"] for t in tasks if t["kind"] == "skill_test"]
+
+            summary = ""
+            if paths_queued:
+                summary += f"📚 I'm also creating learning paths for: {', '.join(paths_queued)}\n"
+            if tests_queued:
+                summary += f"✅ Skill tests are being prepared for: {', '.join(tests_queued)}\n"
+            if paths_queued or tests_queued:
+                summary += "They will appear in the Learning Hub in a moment.\n\n"
             
-            agent_response += "💼 Go to the Job Board to view all opportunities and apply directly on company websites!"
+            summary += "💼 Go to the Job Board to view all opportunities and apply directly on company websites!"
+            agent_response += summary
+            yield {"event": "token", "data": {"text": summary}}
+            streamed = True
             
         elif agent_name == "SkillAdvisor":
             role = "software developer"
@@ -157,23 +214,24 @@ class OrchestratorAgent:
             if "backend" in message.lower(): role = "backend developer"
             
             # Update preferred role
-            db.update_user_preference("preferred_role", role)
+            await run_in_threadpool(db.update_user_preference, user_id, "preferred_role", role)
             
-            advice = self.skill_advisor.analyze_gap(user_context.get("profile", {}).get("skills", []), role, user_context)
-            db.update_learning_path(advice)
+            advice = await self.skill_advisor.analyze_gap(user_id, user_context.get("profile", {}).get("skills", []),
+                                                          role, user_context)
+            await run_in_threadpool(db.update_learning_path, user_id, advice)
             response_data = advice
             agent_response = advice.get("message", "Advice generated. Check Learning Hub for your personalized path.")
             
-            db.log_activity("skill_advice", {"role": role})
+            await run_in_threadpool(db.log_activity, user_id, "skill_advice", {"role": role})
             
         elif agent_name == "ResumeReviewer":
             resume_text = context.get("resume_text", message)
-            review = self.resume_reviewer.review(resume_text)
-            db.add_resume_review(review.dict())
+            review = await self.resume_reviewer.review(resume_text)
+            await run_in_threadpool(db.add_resume_review, user_id, review.dict())
             response_data = review.dict()
             agent_response = f"📄 Resume reviewed! Score: {review.score}/100.\n\nCheck the Resume page for detailed feedback."
             
-            db.log_activity("resume_review", {"score": review.score})
+            await run_in_threadpool(db.log_activity, user_id, "resume_review", {"score": review.score})
 
         elif agent_name == "LearningAgent":
             # Extract topic
@@ -182,7 +240,7 @@ class OrchestratorAgent:
             elif "react" in message.lower(): topic = "React"
             elif "javascript" in message.lower(): topic = "JavaScript"
             
-            test = self.learning_agent.generate_test(topic)
+            test = await self.learning_agent.generate_test(topic)
             response_data = test
             agent_response = f"📝 I've generated a {topic} mock test for you! Check the Learning Hub to take it."
             
@@ -199,20 +257,57 @@ class OrchestratorAgent:
             
             Keep response concise (2-3 sentences).
             """
-            try:
-                from llm_engine import generate_response
-                agent_response = generate_response(chat_prompt)
-            except:
+            async for chunk in stream_response_async(chat_prompt):
+                agent_response += chunk
+                yield {"event": "token", "data": {"text": chunk}}
+            if not agent_response:
                 agent_response = "Hi! I can help you find jobs, develop skills, review your resume, or take skill tests. What would you like to do?"
+                yield {"event": "token", "data": {"text": agent_response}}
+            streamed = True
+
+        if not streamed:
+            yield {"event": "token", "data": {"text": agent_response}}
 
         # Save Agent Response
-        db.add_message("agent", agent_response, agent_name)
+        await run_in_threadpool(db.add_message, user_id, "agent", agent_response, agent_name, session_id)
 
-        return {
+        yield {"event": "done", "data": {
             "agent": agent_name,
+            "session_id": session_id,
             "response": agent_response,
             "data": response_data,
             "reasoning": reasoning,
-            "jobs_found": len(jobs_found) if jobs_found else 0
-        }
+            "jobs_found": len(jobs_found) if jobs_found else 0,
+            "tasks": tasks
+        }}
+
+    async def _queue_skill_gap_tasks(self, user_id: int, skill_gaps: list, jobs: list) -> list:
+        """
+        Enqueues learning paths for the top 3 gaps and skill tests for the top 2.
+        Payloads carry job ids only; the jobs themselves are already stored.
+        """
+        tasks = []
+        job_ids = [job.id for job in jobs]
+        for skill in skill_gaps[:3]:  # Limit to top 3 gaps
+            task_id = await task_queue.enqueue(user_id, "learning_path", {"skill": skill, "job_ids": job_ids})
+            tasks.append({"id": task_id, "kind": "learning_path", "skill": skill})
+        for skill in skill_gaps[:2]:  # Top 2 skills
+            job_ids = [job.id for job in jobs if skill in job.requirements]
+            task_id = await task_queue.enqueue(user_id, "skill_test", {"skill": skill, "job_ids": job_ids})
+            tasks.append({"id": task_id, "kind": "skill_test", "skill": skill})
+        return tasks
+
+    async def _create_learning_path(self, user_id: int, payload: dict) -> dict:
+        skill = payload["skill"]
+        jobs = await run_in_threadpool(db.get_jobs_by_ids, user_id, payload["job_ids"])
+        learning_path = await self.learning_agent.create_learning_path(skill, jobs)
+        await run_in_threadpool(db.update_learning_path, user_id, learning_path)
+        await run_in_threadpool(db.log_activity, user_id, "learning_started", {"skill": skill, "auto_generated": True})
+        return {"skill": skill}
 
+    async def _create_skill_test(self, user_id: int, payload: dict) -> dict:
+        skill = payload["skill"]
+        test_questions = await self.skill_advisor.generate_test(skill, "intermediate")
+        test_id = await run_in_threadpool(db.create_skill_test, user_id, skill, "intermediate", test_questions,
+                                          payload.get("job_ids"))
+        return {"skill": skill, "test_id": test_id}
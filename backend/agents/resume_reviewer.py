@@ -1,16 +1,23 @@
 from models import ResumeReview
-from llm_engine import generate_json_response
+from llm_engine import generate_json_response_async
+from resume_compactor import compact_resume
+from metrics import AGENT_DURATION, timed
 import json
 
 class ResumeReviewerAgent:
-    def review(self, resume_text: str) -> ResumeReview:
+    @timed(AGENT_DURATION, agent="ResumeReviewer", operation="review")
+    async def review(self, resume_text: str) -> ResumeReview:
         """
-        Reviews the resume text using LLM.
+        Reviews the resume text using LLM, after compacting it to the token budget.
         """
+        compacted = compact_resume(resume_text)
+        print(f"Resume compacted: {compacted['original_tokens']} -> {compacted['compacted_tokens']} tokens "
+              f"({compacted['saved_tokens']} saved), sections: {', '.join(compacted['sections'])}")
+
         prompt = f"""
         Act as an expert resume reviewer.
         Review the following resume text:
-        "{resume_text}"
+        "{compacted['text']}"
         
         Provide a score out of 100.
         Provide 3-5 specific, actionable bullet points of feedback.
@@ -23,7 +30,7 @@ class ResumeReviewerAgent:
         """
         
         try:
-            response_text = generate_json_response(prompt)
+            response_text = await generate_json_response_async(prompt, cache_family="resume_review")
             data = json.loads(response_text)
             return ResumeReview(
                 score=data.get("score", 70),
@@ -1,9 +1,12 @@
 from typing import List, Dict
-from llm_engine import generate_json_response
+from llm_engine import generate_json_response_async
+from fastapi.concurrency import run_in_threadpool
+from metrics import AGENT_DURATION, timed
 import json
 
 class SkillAdvisorAgent:
-    def generate_test(self, skill: str, difficulty: str = "intermediate") -> List[Dict]:
+    @timed(AGENT_DURATION, agent="SkillAdvisor", operation="generate_test")
+    async def generate_test(self, skill: str, difficulty: str = "intermediate") -> List[Dict]:
         """
         Generates test questions for a specific skill.
         """
@@ -29,7 +32,7 @@ class SkillAdvisorAgent:
         """
         
         try:
-            response_text = generate_json_response(prompt)
+            response_text = await generate_json_response_async(prompt, cache_family="skill_test")
             questions = json.loads(response_text)
             return questions if isinstance(questions, list) else []
         except Exception as e:
@@ -44,7 +47,9 @@ class SkillAdvisorAgent:
                 }
             ]
 
-    def analyze_gap(self, current_skills: List[str], desired_role: str, user_context: dict = None) -> dict:
+    @timed(AGENT_DURATION, agent="SkillAdvisor", operation="analyze_gap")
+    async def analyze_gap(self, user_id: int, current_skills: List[str], desired_role: str,
+                          user_context: dict = None) -> dict:
         """
         Uses LLM to analyze skill gaps and provide learning resources.
         Now tracks learned skills from previous interactions.
@@ -77,16 +82,17 @@ class SkillAdvisorAgent:
         """
         
         try:
-            response_text = generate_json_response(prompt)
+            response_text = await generate_json_response_async(prompt, cache_family="skill_gap")
             advice = json.loads(response_text)
             
             # Track recommended skills as "learned" for next time
             if user_context:
                 from database import db
                 new_skills = [rec["skill"] for rec in advice.get("recommendations", [])]
-                current_learned = db.get_user_profile().get("preferences", {}).get("learned_skills", [])
+                profile = await run_in_threadpool(db.get_user_profile, user_id)
+                current_learned = profile.get("preferences", {}).get("learned_skills", [])
                 current_learned.extend(new_skills)
-                db.update_user_preference("learned_skills", current_learned)
+                await run_in_threadpool(db.update_user_preference, user_id, "learned_skills", current_learned)
             
             return advice
         except Exception as e:
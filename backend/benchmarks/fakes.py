@@ -0,0 +1,136 @@
+import asyncio
+import json
+import random
+import re
+
+class LatencyModel:
+    """
+    Simulated call latency: a base delay (seconds, or a (min, max) range)
+    plus, with probability slow_rate, an extra slow_latency for a long tail.
+    """
+    def __init__(self, latency=0.0, slow_rate: float = 0.0, slow_latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        delay = self._random.uniform(*self.latency) if isinstance(self.latency, tuple) else self.latency
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            delay += self.slow_latency
+        return delay
+
+KNOWN_SKILLS = ["Python", "Django", "React", "Kafka", "Java", "Spring", "Go", "Kubernetes", "Docker", "AWS", "SQL"]
+
+class _Response:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        # Same shape as Gemini's usage metadata, so token metrics see real counts
+        self.usage_metadata = type("Usage", (), {
+            "prompt_token_count": (len(prompt) + 3) // 4,
+            "candidates_token_count": (len(text) + 3) // 4,
+        })()
+
+class _Stream:
+    def __init__(self, text: str, prompt: str, chunk_delay: float):
+        self._words = text.split(" ")
+        self._chunk_delay = chunk_delay
+        self.usage_metadata = _Response(text, prompt).usage_metadata
+
+    async def __aiter__(self):
+        for i, word in enumerate(self._words):
+            if self._chunk_delay:
+                await asyncio.sleep(self._chunk_delay)
+            yield _Response(word if i == 0 else " " + word, "")
+
+class FakeModel:
+    """
+    Deterministic stand-in for the Gemini model in llm_engine. It recognises
+    each agent's prompt and answers with well-formed JSON (or chat text), after
+    a simulated latency; failure_rate of calls raise instead.
+    """
+    model_name = "fake-model"
+
+    def __init__(self, latency: LatencyModel = None, failure_rate: float = 0.0, stream_chunk_delay: float = 0.0,
+                 seed: int = 0):
+        self.latency = latency or LatencyModel()
+        self.failure_rate = failure_rate
+        self.stream_chunk_delay = stream_chunk_delay
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("fake model failure")
+        text = self.respond(prompt)
+        if stream:
+            return _Stream(text, prompt, self.stream_chunk_delay)
+        return _Response(text, prompt)
+
+    @staticmethod
+    def _skills_in(text: str):
+        return [s for s in KNOWN_SKILLS if re.search(rf"\b{re.escape(s)}\b", text, re.I)] or ["Python"]
+
+    def respond(self, prompt: str) -> str:
+        if "Extract job search parameters" in prompt:
+            query = prompt.split('query: "', 1)[1].split('"', 1)[0]
+            location = re.search(r"\bin ([A-Z][a-z]+)", query.title())
+            return json.dumps({"keywords": self._skills_in(query), "location": location.group(1) if location else None})
+        if "You are an Orchestrator Agent" in prompt:
+            return json.dumps({"agent": "Chat", "reasoning": "General question", "needs_clarification": False})
+        if "multiple-choice questions to test knowledge of" in prompt:
+            skill = prompt.split("knowledge of:", 1)[1].split("\n", 1)[0].strip()
+            return json.dumps([_question(skill, i) for i in range(1, 6)])
+        if "multiple-choice mock test for" in prompt:
+            topic = prompt.split("mock test for:", 1)[1].split("\n", 1)[0].strip()
+            return json.dumps({"topic": topic, "questions": [_question(topic, i) for i in range(1, 6)]})
+        if "learning path for learning" in prompt:
+            skill = prompt.split("learning:", 1)[1].split("\n", 1)[0].strip()
+            return json.dumps({
+                "skill": skill, "duration_weeks": 4, "prerequisites": [],
+                "milestones": [{"week": w, "title": f"{skill} week {w}", "topics": [f"Topic {w}"], "resources": []}
+                               for w in range(1, 5)],
+                "practice_projects": [f"Build something with {skill}"], "interview_tips": ["Practice"]
+            })
+        if "Act as a career coach" in prompt:
+            skills = ["Docker", "Kubernetes", "AWS"]
+            return json.dumps({
+                "missing_skills": skills,
+                "recommendations": [{"skill": s, "resource": "https://example.com", "type": "Documentation"} for s in skills],
+                "message": "Focus on deployment skills next."
+            })
+        if "Act as an expert resume reviewer" in prompt:
+            return json.dumps({"score": 70 + len(prompt) % 25, "feedback": ["Quantify achievements", "Tighten the summary"]})
+        return "I can help you find jobs, plan what to learn next, review your resume or take a mock test."
+
+def _question(skill: str, n: int) -> dict:
+    return {
+        "id": n, "question": f"{skill} question {n}?",
+        "options": ["Option A", "Option B", "Option C", "Option D"],
+        "correct_answer": "Option A", "explanation": "Because."
+    }
+
+def make_pdf(pages) -> bytes:
+    """A minimal text PDF with one page per string, for resume upload load tests."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font_id = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        lines = [line.replace("(", "").replace(")", "").replace("\\", "") for line in text.split("\n")]
+        stream = "BT /F1 11 Tf 50 750 Td 14 TL " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = "%PDF-1.4\n", []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
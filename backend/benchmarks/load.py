@@ -0,0 +1,364 @@
+"""
+Concurrent load test for the FastAPI app.
+
+Virtual users loop over a weighted mix of actions (chat, job board,
+dashboard, skill tests, resume upload) with think time between them. Users
+start gradually over the ramp-up period and stop at the end of the run.
+
+By default the app runs in-process over ASGI, with the same fake Gemini and
+web search as benchmarks/run.py and a freshly seeded database; pass --url
+to drive a running server instead (e.g. uvicorn main:app). With --tenants,
+virtual users are spread over that many users, each with its own API key;
+otherwise they all act as the default user. Run from the backend directory:
+
+    python benchmarks/load.py --users 50 --ramp 10 --duration 60
+    python benchmarks/load.py --mix chat=1,jobs=4,dashboard=2 --jobs 100000
+    python benchmarks/load.py --url http://localhost:8000 --users 20
+    python benchmarks/load.py --tenants 1000 --users 100
+
+Every few seconds the server's /metrics are sampled, and event loop stalls
+and SQLite lock waits are reported as they happen, together with the
+requests in flight at the time. Metrics are per worker process, so against
+a multi-worker server each sample covers whichever worker answered it. Per-endpoint throughput, tail latency and
+error rates are printed at the end and saved as JSON under benchmarks/results/.
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import datetime
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import make_pdf
+from benchmarks.run import (
+    BACKEND_DIR, RESULTS_DIR, RESUME_TEXT, add_fake_arguments, fake_environment, git_commit, install_fakes,
+    seed_database, summarize, _latency
+)
+
+DEFAULT_MIX = "chat=2,jobs=4,dashboard=3,tests=1,resume=1"
+CHAT_MESSAGES = [
+    "find python developer jobs in pune", "react developer jobs in hyderabad", "hello",
+    "what should i learn to become a backend developer", "give me a python mock test", "I am not sure what to do next",
+]
+# Event loop lag and lock waits at or above these bounds (which are histogram buckets) count as a stall
+LOOP_STALL_SECONDS = "0.1"
+LOCK_WAIT_SECONDS = "0.01"
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+
+def parse_metrics(text: str) -> dict:
+    """{(name, labels): value} for every sample in Prometheus text output."""
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE_RE.match(line)
+        if match:
+            samples[(match.group(1), match.group(2) or "")] = float(match.group(3))
+    return samples
+
+def count_above(samples: dict, histogram: str, bound: str, label: str = "") -> float:
+    """Observations of a histogram (series whose labels contain `label`) greater than bucket `bound`."""
+    total = below = 0.0
+    for (name, labels), value in samples.items():
+        if label not in labels:
+            continue
+        if name == f"{histogram}_count":
+            total += value
+        elif name == f"{histogram}_bucket" and f'le="{bound}"' in labels:
+            below += value
+    return total - below
+
+def say(text: str):
+    # The in-process app's own logging is silenced, so write to the real stdout
+    print(text, file=sys.__stdout__, flush=True)
+
+def metric_total(samples: dict, name: str) -> float:
+    return sum(value for (n, _), value in samples.items() if n == name)
+
+class LoadTest:
+    def __init__(self, client, args, auth_headers=None):
+        self.client = client
+        self.args = args
+        # Virtual user i sends auth_headers[i % len(auth_headers)]
+        self.auth_headers = auth_headers or [{}]
+        self.random = random.Random(args.seed)
+        self.mix = [(action, float(weight)) for action, weight in
+                    (part.split("=") for part in args.mix.split(",") if part)]
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.statuses = collections.defaultdict(collections.Counter)
+        self.in_flight = collections.Counter()
+        self.active_users = 0
+        # Worst lag of the load generator's own event loop since the last report
+        self.driver_lag = 0.0
+        self.timeline = []
+        self.warnings = []
+        self.resumes = [make_pdf(RESUME_TEXT.replace("Jane Doe", f"Candidate {i}").split("\f"))
+                        for i in range(args.resume_variants)]
+
+    async def request(self, auth: dict, label: str, method: str, path: str, **kwargs):
+        self.in_flight[label] += 1
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await self.client.request(method, path, headers=auth, timeout=self.args.timeout, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight[label] -= 1
+        self.latencies[label].append(time.perf_counter() - start)
+        self.statuses[label][str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+
+    # --- User actions ---
+
+    async def chat(self, auth: dict):
+        await self.request(auth, "POST /api/chat", "POST", "/api/chat", json={"message": self.random.choice(CHAT_MESSAGES)})
+
+    async def jobs(self, auth: dict):
+        response = await self.request(auth, "GET /api/jobs", "GET", "/api/jobs", params={"limit": 50})
+        await self.request(auth, "GET /api/jobs/search", "GET", "/api/jobs/search",
+                           params={"q": self.random.choice(["python", "react", "kafka engineer"]), "location": "pune"})
+        jobs = response.json() if response else []
+        if jobs and self.random.random() < 0.2:
+            await self.request(auth, "POST /api/jobs/{job_id}/apply", "POST", f"/api/jobs/{self.random.choice(jobs)['id']}/apply")
+
+    async def dashboard(self, auth: dict):
+        await self.request(auth, "GET /api/dashboard", "GET", "/api/dashboard")
+        await self.request(auth, "GET /api/activity", "GET", "/api/activity")
+
+    async def tests(self, auth: dict):
+        response = await self.request(auth, "GET /api/tests", "GET", "/api/tests")
+        tests = response.json() if response else []
+        if not tests:
+            return
+        test_id = self.random.choice(tests)["id"]
+        response = await self.request(auth, "GET /api/tests/{test_id}", "GET", f"/api/tests/{test_id}")
+        if not response:
+            return
+        questions = response.json().get("questions", [])
+        answers = {str(q["id"]): self.random.choice(q.get("options") or [""]) for q in questions}
+        await self.request(auth, "POST /api/tests/{test_id}/submit", "POST", f"/api/tests/{test_id}/submit",
+                           json={"answers": answers, "time_taken": self.random.randint(60, 600)})
+
+    async def resume(self, auth: dict):
+        content = self.random.choice(self.resumes)
+        await self.request(auth, "POST /api/resume/upload", "POST", "/api/resume/upload",
+                           files={"file": ("resume.pdf", content, "application/pdf")})
+
+    # --- Driver ---
+
+    async def user(self, deadline: float, auth: dict):
+        actions, weights = zip(*self.mix)
+        self.active_users += 1
+        try:
+            while time.monotonic() < deadline:
+                await getattr(self, self.random.choices(actions, weights)[0])(auth)
+                await asyncio.sleep(self.random.uniform(*self.args.think))
+        finally:
+            self.active_users -= 1
+
+    async def probe_driver(self, interval: float = 0.05):
+        """
+        Tracks how late this process's own event loop runs. When the driver is
+        saturated, measured latencies include client-side queueing.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.driver_lag = max(self.driver_lag, loop.time() - start - interval)
+
+    async def monitor(self, started: float):
+        """Samples /metrics every interval and reports stalls and lock waits since the last sample."""
+        previous = parse_metrics((await self.client.get("/metrics")).text)
+        completed = 0
+        while True:
+            await asyncio.sleep(self.args.interval)
+            try:
+                samples = parse_metrics((await self.client.get("/metrics", timeout=self.args.timeout)).text)
+            except Exception as e:
+                say(f"  could not read /metrics: {e}")
+                continue
+            elapsed = time.monotonic() - started
+            done = sum(len(v) for v in self.latencies.values())
+            point = {
+                "elapsed": round(elapsed, 1),
+                "users": self.active_users,
+                "rps": round((done - completed) / self.args.interval, 1),
+                "errors": sum(self.errors.values()),
+                "loop_stalls": count_above(samples, "event_loop_lag_seconds", LOOP_STALL_SECONDS)
+                               - count_above(previous, "event_loop_lag_seconds", LOOP_STALL_SECONDS),
+                "loop_lag_seconds": round(metric_total(samples, "event_loop_lag_seconds_sum")
+                                          - metric_total(previous, "event_loop_lag_seconds_sum"), 3),
+                "lock_waits": count_above(samples, "db_lock_wait_seconds", LOCK_WAIT_SECONDS)
+                              - count_above(previous, "db_lock_wait_seconds", LOCK_WAIT_SECONDS),
+                "locked_errors": metric_total(samples, "db_locked_errors_total")
+                                 - metric_total(previous, "db_locked_errors_total"),
+            }
+            self.timeline.append(point)
+            completed, previous = done, samples
+
+            say(f"[{elapsed:6.1f}s] users {point['users']:>4}  {point['rps']:>7.1f} req/s  errors {point['errors']}")
+            in_flight = ", ".join(f"{label} x{n}" for label, n in self.in_flight.most_common() if n) or "nothing"
+            problems = []
+            if point["loop_stalls"]:
+                problems.append(f"event loop stalled {point['loop_stalls']:.0f}x over {float(LOOP_STALL_SECONDS) * 1000:.0f} ms")
+            if point["lock_waits"]:
+                problems.append(f"{point['lock_waits']:.0f} SQLite lock waits over {float(LOCK_WAIT_SECONDS) * 1000:.0f} ms")
+            if point["locked_errors"]:
+                problems.append(f"{point['locked_errors']:.0f} 'database is locked' errors")
+            if self.args.url and self.driver_lag >= float(LOOP_STALL_SECONDS):
+                problems.append(f"the load generator itself lagged {self.driver_lag * 1000:.0f} ms, "
+                                f"so latencies include client overhead; use fewer users or several drivers")
+            self.driver_lag = 0.0
+            for problem in problems:
+                warning = f"[{elapsed:6.1f}s] WARNING {problem}; in flight: {in_flight}"
+                self.warnings.append(warning)
+                say(warning)
+
+    async def run(self) -> dict:
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        monitor = asyncio.ensure_future(self.monitor(started))
+        probe = asyncio.ensure_future(self.probe_driver())
+        users = []
+        for i in range(self.args.users):
+            # Spread user start times evenly over the ramp-up period
+            delay = started + self.args.ramp * i / max(self.args.users, 1) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            auth = self.auth_headers[i % len(self.auth_headers)]
+            users.append(asyncio.ensure_future(self.user(deadline, auth)))
+        await asyncio.gather(*users)
+        wall = time.monotonic() - started
+        monitor.cancel()
+        probe.cancel()
+        await asyncio.gather(monitor, probe, return_exceptions=True)
+
+        endpoints = {}
+        for label in sorted(self.latencies):
+            result = summarize(self.latencies[label], self.errors[label], wall)
+            result["error_rate"] = round(self.errors[label] / len(self.latencies[label]), 4)
+            result["statuses"] = dict(self.statuses[label])
+            endpoints[label] = result
+        return {"wall_seconds": round(wall, 2), "endpoints": endpoints, "timeline": self.timeline,
+                "warnings": self.warnings}
+
+def print_report(report: dict):
+    print(f"\n{'Endpoint':<34} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for label, r in report["endpoints"].items():
+        latency = r["latency_ms"]
+        print(f"{label:<34} {r['requests']:>8} {r['throughput_rps']:>7.1f} {latency['p50']:>8.1f} {latency['p95']:>8.1f} "
+              f"{latency['p99']:>8.1f} {latency['max']:>8.1f} {r['error_rate'] * 100:>6.1f}%")
+    stalls = sum(p["loop_stalls"] for p in report["timeline"])
+    lock_waits = sum(p["lock_waits"] for p in report["timeline"])
+    print(f"\nEvent loop stalls over {float(LOOP_STALL_SECONDS) * 1000:.0f} ms: {stalls:.0f}, "
+          f"SQLite lock waits over {float(LOCK_WAIT_SECONDS) * 1000:.0f} ms: {lock_waits:.0f}")
+
+def seed_skill_tests(db, user_id: int):
+    for skill in ("Python", "React", "Docker"):
+        questions = [{"id": n, "question": f"{skill} question {n}?", "options": ["A", "B", "C", "D"],
+                      "correct_answer": "A", "explanation": ""} for n in range(1, 6)]
+        db.create_skill_test(user_id, skill, "intermediate", questions)
+
+async def run_in_process(args) -> dict:
+    import httpx
+    main = install_fakes(args)
+    from database import db, DEFAULT_USER_ID
+
+    # The seeded jobs and messages belong to the default user; extra tenants start empty
+    seed_database(db, args.jobs, args.messages, args.seed)
+    seed_skill_tests(db, DEFAULT_USER_ID)
+    auth_headers = None
+    if args.tenants:
+        auth_headers = []
+        for n in range(args.tenants):
+            user = db.create_user(f"Load user {n}")
+            seed_skill_tests(db, user["id"])
+            auth_headers.append({"Authorization": f"Bearer {user['api_key']}"})
+
+    await main.start_background_work()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            return await LoadTest(client, args, auth_headers).run()
+    finally:
+        await main.stop_background_work()
+
+async def run_remote(args) -> dict:
+    import httpx
+    async with httpx.AsyncClient(base_url=args.url) as client:
+        return await LoadTest(client, args).run()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for the FastAPI app")
+    parser.add_argument("--url", help="Base URL of a running server (default: run the app in-process)")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which users start")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run, including the ramp-up")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted user actions (default: {DEFAULT_MIX})")
+    parser.add_argument("--think", type=lambda v: _latency(v) if "-" in v else (float(v), float(v)),
+                        default=(0.5, 2.0), help="Seconds between a user's actions, or a min-max range")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between progress reports")
+    parser.add_argument("--resume-variants", type=int, default=5,
+                        help="Distinct resumes uploaded; repeats are served from the review cache")
+    parser.add_argument("--jobs", type=int, default=10000, help="Stored jobs to seed (in-process only)")
+    parser.add_argument("--messages", type=int, default=1000, help="Chat messages to seed (in-process only)")
+    parser.add_argument("--tenants", type=int, default=0,
+                        help="Spread virtual users over this many users with their own API keys (in-process only)")
+    add_fake_arguments(parser)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own log output (in-process only)")
+    args = parser.parse_args(argv)
+    for part in args.mix.split(","):
+        action = part.split("=")[0]
+        if action not in ("chat", "jobs", "dashboard", "tests", "resume"):
+            parser.error(f"unknown action '{action}' in --mix")
+    return args
+
+def main():
+    args = parse_args()
+    if args.url:
+        report = asyncio.run(run_remote(args))
+    else:
+        with tempfile.TemporaryDirectory(prefix="load-") as workdir:
+            os.environ.update(fake_environment(workdir, args.warm_caches))
+            os.chdir(BACKEND_DIR)
+            if args.verbose:
+                report = asyncio.run(run_in_process(args))
+            else:
+                # The app logs every request; keep the console for the load report
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), \
+                        contextlib.redirect_stderr(devnull):
+                    report = asyncio.run(run_in_process(args))
+
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "target": args.url or "in-process",
+        "config": {k: getattr(args, k) for k in ("users", "ramp", "duration", "mix", "think", "jobs", "messages",
+                                                  "tenants")},
+        **report,
+    }
+    print_report(report)
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+if __name__ == "__main__":
+    main()
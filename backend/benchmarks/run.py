@@ -0,0 +1,355 @@
+"""
+Offline end-to-end benchmark for the orchestrator and the API.
+
+Gemini and the web search are replaced by deterministic fakes with
+configurable latency and failure rates, and every database size runs in its
+own process against a fresh SQLite file, so results are comparable between
+runs. Run from the backend directory:
+
+    python benchmarks/run.py
+    python benchmarks/run.py --jobs 0 100000 --messages 0 10000 --requests 200 --concurrency 8
+    python benchmarks/run.py --scenarios job_search api_jobs_search --compare benchmarks/results/before.json
+
+Results (throughput, p50/p95/p99 latency and error counts per scenario) are
+printed and saved as JSON under benchmarks/results/.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+CITIES = ["Pune", "Bangalore", "Hyderabad", "Mumbai", "Chennai", "Delhi", "Remote"]
+ROLES = ["Python Developer", "Backend Engineer", "Data Engineer", "React Developer", "Java Developer",
+         "DevOps Engineer", "Go Developer", "ML Engineer", "QA Engineer", "Full Stack Developer"]
+COMPANIES = ["Acme Labs", "Globex", "Initech", "Umbrella Tech", "Hooli", "Stark Systems", "Wayne Digital", "Tyrell Data"]
+SKILLS = ["Python", "Django", "React", "Kafka", "Java", "Spring", "Go", "Kubernetes", "Docker", "AWS", "SQL"]
+
+RESUME_TEXT = "\f".join(
+    f"Jane Doe · jane@example.com\nPage {page}\n"
+    "EXPERIENCE\n" + "\n".join(f"Built service {page}-{i} handling 10k requests per second in Python and Kafka."
+                               for i in range(25)) +
+    "\nSKILLS\nPython, Django, Kafka, SQL, Docker\nEDUCATION\nB.Tech Computer Science"
+    for page in range(1, 4)
+)
+
+# Scenario -> (kind, messages or request). Chat scenarios cycle through their messages.
+SCENARIOS = {
+    "job_search": ("chat", ["find python developer jobs in pune", "kafka engineer jobs in bangalore",
+                            "react developer jobs in hyderabad", "remote golang developer jobs"]),
+    "skill_advice": ("chat", ["what should i learn to become a backend developer",
+                              "give me a roadmap to become a data engineer"]),
+    "resume_review": ("chat", ["please review my resume"]),
+    "mock_test": ("chat", ["give me a python mock test", "quiz me on react"]),
+    "chat": ("chat", ["hello", "hi there", "thanks a lot"]),
+    "llm_route": ("chat", ["I am not sure what to do next", "my manager said I should grow"]),
+    "api_chat": ("api", ("POST", "/api/chat", {"message": "find python developer jobs in pune"})),
+    "api_dashboard": ("api", ("GET", "/api/dashboard", None)),
+    "api_jobs": ("api", ("GET", "/api/jobs?limit=50", None)),
+    "api_jobs_search": ("api", ("GET", "/api/jobs/search?q=python&location=pune", None)),
+    "api_history": ("api", ("GET", "/api/chat/history", None)),
+    "api_sessions": ("api", ("GET", "/api/chat/sessions", None)),
+}
+
+def percentile(sorted_values, p: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, errors: int, wall: float) -> dict:
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(values) / len(values)) if values else 0.0,
+            "p50": ms(percentile(values, 50)),
+            "p95": ms(percentile(values, 95)),
+            "p99": ms(percentile(values, 99)),
+            "max": ms(values[-1]) if values else 0.0,
+        },
+    }
+
+def _latency(value: str):
+    # "0.2" or "0.1-0.4" (seconds)
+    if "-" in value:
+        low, high = value.split("-", 1)
+        return (float(low), float(high))
+    return float(value)
+
+# --- Child process: one database size ---
+
+def seed_database(db, jobs: int, messages: int, seed: int):
+    from database import DEFAULT_USER_ID
+    rng = random.Random(seed)
+    batch = []
+    for i in range(jobs):
+        role = rng.choice(ROLES)
+        company = rng.choice(COMPANIES)
+        requirements = rng.sample(SKILLS, 3)
+        batch.append({
+            "id": f"bench-{i}",
+            "title": f"{rng.choice(['Junior', 'Senior', 'Lead', ''])} {role}".strip(),
+            "company": company,
+            "location": rng.choice(CITIES),
+            "description": f"{company} is hiring a {role} to work with {', '.join(requirements)} on products "
+                           f"used by {rng.randint(1, 900)}k people. Posting {i}.",
+            "salary_range": f"₹{rng.randint(4, 20)}-{rng.randint(21, 40)} LPA",
+            "requirements": requirements,
+        })
+        if len(batch) == 1000:
+            db.add_jobs(DEFAULT_USER_ID, batch)
+            batch = []
+    if batch:
+        db.add_jobs(DEFAULT_USER_ID, batch)
+    for i in range(0, jobs, 100):
+        db.mark_job_applied(DEFAULT_USER_ID, f"bench-{i}")
+
+    # A long conversation in the active session, cycling through every route
+    agents = {"job_search": "JobSearch", "skill_advice": "SkillAdvisor", "resume_review": "ResumeReviewer",
+              "mock_test": "LearningAgent", "chat": "Chat", "llm_route": "Chat"}
+    history = [(msgs[0], agents[name]) for name, (kind, msgs) in SCENARIOS.items() if kind == "chat"]
+    for i in range(messages // 2):
+        message, agent = history[i % len(history)]
+        db.add_message(DEFAULT_USER_ID, "user", message)
+        db.add_message(DEFAULT_USER_ID, "agent", f"Reply {i} from {agent}.", agent)
+
+async def wait_for_tasks(db, timeout: float = 30.0):
+    """Lets background tasks queued by one scenario finish before the next starts."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with db._read() as cur:
+            cur.execute("SELECT count(*) FROM tasks WHERE status IN ('queued', 'running')")
+            if cur.fetchone()[0] == 0:
+                return
+        await asyncio.sleep(0.1)
+
+async def run_scenario(name: str, orchestrator, client, requests: int, concurrency: int, warmup: int) -> dict:
+    kind, spec = SCENARIOS[name]
+    # Shared by the workers, so together they make exactly `requests` calls
+    counter = iter(range(warmup + requests))
+
+    from database import DEFAULT_USER_ID
+
+    async def call(i: int) -> bool:
+        if kind == "chat":
+            message = spec[i % len(spec)]
+            context = {"resume_text": RESUME_TEXT} if name == "resume_review" else {}
+            result = await orchestrator.process_message(DEFAULT_USER_ID, message, context)
+            return result is not None
+        method, path, body = spec
+        response = await client.request(method, path, json=body)
+        return response.status_code < 400
+
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    for _ in range(warmup):
+        await call(next(counter))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+def install_fakes(args):
+    """
+    Imports the app with Gemini and the web search replaced by fakes configured
+    from args, and returns the main module. DATABASE_PATH and the cache
+    settings must already be in the environment.
+    """
+    import llm_engine
+    from benchmarks.fakes import FakeModel, LatencyModel
+    from search_backends import FakeSearchBackend
+
+    llm_engine.model = FakeModel(
+        LatencyModel(_latency(args.llm_latency), args.llm_slow_rate, args.llm_slow_latency, seed=args.seed),
+        failure_rate=args.llm_failure_rate, seed=args.seed
+    )
+    import main
+    from agents.job_search import JobSearchAgent
+
+    main.orchestrator.job_search = JobSearchAgent(backend=FakeSearchBackend(
+        _latency(args.search_latency), args.search_failure_rate, seed=args.seed
+    ))
+    return main
+
+def add_fake_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", default="0.2-0.6", help="Seconds per LLM call, or a min-max range")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.02, help="Share of LLM calls that are slow")
+    parser.add_argument("--llm-slow-latency", type=float, default=3.0, help="Extra seconds for slow LLM calls")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-latency", default="0.1-0.5", help="Seconds per web search query, or a min-max range")
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--warm-caches", action="store_true", help="Keep the LLM and web search caches enabled")
+
+def fake_environment(workdir: str, warm_caches: bool) -> dict:
+    """Environment for a benchmarked app whose database and caches live in workdir."""
+    env = dict(os.environ, DATABASE_PATH=os.path.join(workdir, "bench.db"),
+               LLM_CACHE_PATH=os.path.join(workdir, "llm_cache.db"))
+    if not warm_caches:
+        # Measure the full pipeline rather than cache hits
+        env.update(LLM_CACHE_ENABLED="false", SEARCH_CACHE_TTL_SECONDS="0", SEARCH_CACHE_STALE_SECONDS="0")
+    return env
+
+async def run_child(args) -> dict:
+    # Imported here so DATABASE_PATH and the cache settings are in place first
+    import httpx
+    main = install_fakes(args)
+    from database import db
+    from task_queue import task_queue
+
+    start = time.perf_counter()
+    seed_database(db, args.jobs[0], args.messages[0], args.seed)
+    seed_seconds = time.perf_counter() - start
+    progress(f"jobs={args.jobs[0]} messages={args.messages[0]}: seeded in {seed_seconds:.1f}s")
+
+    results = {}
+    await task_queue.start()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            for name in args.scenarios:
+                results[name] = await run_scenario(name, main.orchestrator, client, args.requests,
+                                                   args.concurrency, args.warmup)
+                await wait_for_tasks(db)
+                progress(f"  {name:<16} {format_result(results[name])}")
+    finally:
+        await task_queue.stop()
+    return {"jobs": args.jobs[0], "messages": args.messages[0], "seed_seconds": round(seed_seconds, 2),
+            "scenarios": results}
+
+def progress(text: str):
+    print(text, file=sys.__stderr__, flush=True)
+
+def format_result(result: dict) -> str:
+    latency = result["latency_ms"]
+    return (f"{result['throughput_rps']:>8.1f} req/s  p50 {latency['p50']:>8.1f} ms  "
+            f"p95 {latency['p95']:>8.1f} ms  p99 {latency['p99']:>8.1f} ms  errors {result['errors']}")
+
+# --- Parent process ---
+
+def child_command(args, jobs: int, messages: int, out_path: str) -> list:
+    command = [sys.executable, os.path.abspath(__file__), "--child", out_path,
+               "--jobs", str(jobs), "--messages", str(messages),
+               "--scenarios", *args.scenarios]
+    for option in ("requests", "concurrency", "warmup", "seed", "llm_latency", "llm_slow_rate", "llm_slow_latency",
+                   "llm_failure_rate", "search_latency", "search_failure_rate"):
+        command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    if args.warm_caches:
+        command.append("--warm-caches")
+    if args.verbose:
+        command.append("--verbose")
+    return command
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def compare(baseline: dict, current: dict):
+    """Prints the change in throughput and latency for runs present in both result files."""
+    before = {(r["jobs"], r["messages"], name): result
+              for r in baseline["runs"] for name, result in r["scenarios"].items()}
+    print(f"\nCompared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('created_at', '?')}):")
+    change = lambda old, new: f"{(new - old) / old * 100:+6.1f}%" if old else "   n/a"
+    for run in current["runs"]:
+        for name, result in run["scenarios"].items():
+            old = before.get((run["jobs"], run["messages"], name))
+            if not old:
+                continue
+            print(f"  jobs={run['jobs']:<7} messages={run['messages']:<6} {name:<16} "
+                  f"throughput {change(old['throughput_rps'], result['throughput_rps'])}  "
+                  f"p50 {change(old['latency_ms']['p50'], result['latency_ms']['p50'])}  "
+                  f"p95 {change(old['latency_ms']['p95'], result['latency_ms']['p95'])}  "
+                  f"p99 {change(old['latency_ms']['p99'], result['latency_ms']['p99'])}")
+
+def run_parent(args):
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for jobs in args.jobs:
+            for messages in args.messages:
+                run_dir = os.path.join(workdir, f"{jobs}-{messages}")
+                os.makedirs(run_dir)
+                out_path = os.path.join(run_dir, "result.json")
+                env = fake_environment(run_dir, args.warm_caches)
+                subprocess.run(child_command(args, jobs, messages, out_path), cwd=BACKEND_DIR, env=env, check=True)
+                with open(out_path) as f:
+                    runs.append(json.load(f))
+
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {k: getattr(args, k) for k in (
+            "requests", "concurrency", "warmup", "seed", "llm_latency", "llm_slow_rate", "llm_slow_latency",
+            "llm_failure_rate", "search_latency", "search_failure_rate", "warm_caches")},
+        "runs": runs,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the orchestrator and API")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--jobs", nargs="+", type=int, default=[0, 10000, 100000], help="Stored jobs to seed")
+    parser.add_argument("--messages", nargs="+", type=int, default=[0, 10000], help="Messages in the active session")
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before each scenario")
+    add_fake_arguments(parser)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own log output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    if not args.child:
+        run_parent(args)
+        return
+
+    sys.path.insert(0, BACKEND_DIR)
+    if args.verbose:
+        result = asyncio.run(run_child(args))
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            result = asyncio.run(run_child(args))
+    with open(args.child, "w") as f:
+        json.dump(result, f)
+
+if __name__ == "__main__":
+    main()
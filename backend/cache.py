@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with per-entry TTL and least-recently-used eviction.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class StaleWhileRevalidateCache:
+    """
+    LRU cache whose entries are fresh for `ttl` seconds, then served as stale
+    for up to `stale_ttl` more seconds while one caller refreshes them.
+    """
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = LRUCache(maxsize)  # key -> (value, fresh_until)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Returns (value, is_stale); value is None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None, False
+        value, fresh_until = entry
+        stale = fresh_until <= time.time()
+        with self._lock:
+            self.stats["stale_hits" if stale else "hits"] += 1
+        return value, stale
+
+    def set(self, key: str, value: Any):
+        self._entries.set(key, (value, time.time() + self.ttl), self.ttl + self.stale_ttl)
+
+    def begin_refresh(self, key: str) -> bool:
+        """True if the caller should refresh key, i.e. no refresh of it is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.stats["refreshes"] += 1
+            return True
+
+    def end_refresh(self, key: str):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": round((total - stats["misses"]) / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_ttl
+        }
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Tests run against a throwaway database and LLM cache, never a real job_agent.db.
+# Set before anything imports database, which opens its singleton on import.
+_tmp = tempfile.mkdtemp(prefix="job-agent-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "test.db")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_tmp, "llm_cache.db")
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
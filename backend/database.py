@@ -2,11 +2,138 @@ import sqlite3
 import json
 import datetime
 import uuid
-from typing import List, Dict, Any
+import os
+import re
+import time
+import base64
+import hashlib
+import queue
+import secrets
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
+from dedupe import NEAR_DUPLICATE_THRESHOLD, band_keys, similarity
+from metrics import DB_DURATION, DB_LOCK_WAIT, DB_LOCKED_ERRORS, time_methods
 
+# Number of pooled read connections. Writes go through one dedicated
+# connection; with WAL journaling readers never wait behind its commits.
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Owner of data created before users existed, and of requests that carry no
+# API key while authentication is optional
+DEFAULT_USER_ID = 1
+
+# Jobs are keyed by (user_id, id): the same posting can be saved by many users
+JOBS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        user_id INTEGER NOT NULL,
+        id TEXT NOT NULL,
+        title TEXT,
+        company TEXT,
+        description TEXT,
+        location TEXT,
+        salary_range TEXT,
+        requirements TEXT, -- JSON list
+        status TEXT,
+        application_details TEXT, -- JSON dict
+        application_status TEXT,
+        applied_date TEXT,
+        PRIMARY KEY (user_id, id)
+    )
+"""
+
+# Full-text index over job postings. Stored jobs share their jobs.rowid;
+# the static search catalogue uses negative rowids so the two never collide.
+# `owner` holds one token per row ("u<user id>" or "catalogue") so a search
+# only walks the postings of the user asking.
+JOBS_FTS_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5 (
+        job_id UNINDEXED,
+        title,
+        company,
+        description,
+        requirements,
+        location,
+        salary_range UNINDEXED,
+        owner,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+CATALOGUE_OWNER = "catalogue"
+
+# Days of per-day application and activity counts in daily_stats that are read
+# and rebuilt (the longest window /api/dashboard accepts)
+STATS_HISTORY_DAYS = 365
+# daily_stats kinds: jobs applied to, and one per activity type ("activity:job_search")
+APPLICATIONS_KIND = "applications"
+ACTIVITY_KIND_PREFIX = "activity:"
+# Newest jobs and resume scores listed under the dashboard's recent activity
+RECENT_JOBS = 3
+RECENT_RESUME_SCORES = 2
+
+# Length of the last-message preview kept on each chat session
+MESSAGE_PREVIEW_CHARS = 100
+
+# Recomputes chat_sessions.message_count and last_message_preview from chat_messages
+SESSION_SUMMARY_SQL = f"""
+    UPDATE chat_sessions SET
+        message_count = (
+            SELECT count(*) FROM chat_messages AS m
+            WHERE m.user_id = chat_sessions.user_id AND m.session_id = chat_sessions.id
+        ),
+        last_message_preview = (
+            SELECT CASE WHEN length(m.content) > {MESSAGE_PREVIEW_CHARS}
+                        THEN substr(m.content, 1, {MESSAGE_PREVIEW_CHARS}) || '...' ELSE m.content END
+            FROM chat_messages AS m
+            WHERE m.user_id = chat_sessions.user_id AND m.session_id = chat_sessions.id
+            ORDER BY m.id DESC LIMIT 1
+        )
+"""
+
+# Per-user totals and recent items, kept current by the write paths so the
+# dashboard never aggregates on read
+DASHBOARD_STATS_SQL = """
+    CREATE TABLE IF NOT EXISTS dashboard_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_jobs INTEGER,
+        jobs_applied INTEGER,
+        active_learning_paths INTEGER,
+        resume_score INTEGER, -- score of the latest review, 0 if none
+        recent_jobs TEXT, -- JSON list of {id, title}, newest first
+        recent_resume_scores TEXT, -- JSON list, newest first
+        updated_at TEXT
+    )
+"""
+
+# Per-day counters; a write bumps one row instead of rewriting the user's history
+DAILY_STATS_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL, -- YYYY-MM-DD
+        kind TEXT NOT NULL, -- APPLICATIONS_KIND or ACTIVITY_KIND_PREFIX + activity type
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day, kind)
+    ) WITHOUT ROWID
+"""
+
+def _owner(user_id: int) -> str:
+    return f"u{user_id}"
+
+def _scanned_table(plan_step: str) -> Optional[str]:
+    # "SCAN jobs", "SCAN jobs USING INDEX ..." (older SQLite: "SCAN TABLE jobs ...")
+    match = re.match(r"SCAN (?:TABLE )?(\w+)", plan_step)
+    return match.group(1) if match else None
+
+def _preview(text: str) -> str:
+    return text[:MESSAGE_PREVIEW_CHARS] + ("..." if len(text) > MESSAGE_PREVIEW_CHARS else "")
+
+# Every public method is timed into db_method_duration_seconds
+@time_methods(DB_DURATION)
 class Database:
     _instance = None
-    DB_NAME = "job_agent.db"
+    DB_NAME = os.getenv("DATABASE_PATH", "job_agent.db")
 
     def __new__(cls):
         if cls._instance is None:
@@ -15,15 +142,82 @@ class Database:
         return cls._instance
 
     def init_db(self):
-        self.conn = sqlite3.connect(self.DB_NAME, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
-        self._create_tables()
+        self._write_conn = self._connect()
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._read_pool = queue.Queue()
+        for _ in range(DB_READ_POOL_SIZE):
+            self._read_pool.put(self._connect())
+
+        self._migrate()
         self._seed_default_data()
 
-    def _create_tables(self):
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are managed explicitly by _write()
+        conn = sqlite3.connect(self.DB_NAME, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable enough under WAL, far fewer fsyncs
+        conn.execute("PRAGMA cache_size=-16000")   # 16 MB page cache per connection
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def _read(self):
+        """Borrows a pooled connection for the duration of the block and yields a cursor."""
+        start = time.perf_counter()
+        conn = self._read_pool.get()
+        DB_LOCK_WAIT.observe(time.perf_counter() - start, lock="read")
+        try:
+            yield conn.cursor()
+        finally:
+            self._read_pool.put(conn)
+
+    @contextmanager
+    def _write(self):
+        """
+        Serializes writers on the dedicated write connection and wraps the block
+        in one transaction. Nested _write() blocks join the outer transaction.
+        """
+        start = time.perf_counter()
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            if self._write_depth == 0:
+                # Waits up to the busy timeout while another process holds the write lock
+                try:
+                    cursor.execute("BEGIN IMMEDIATE")
+                except sqlite3.OperationalError as e:
+                    if "locked" in str(e):
+                        DB_LOCKED_ERRORS.inc()
+                    raise
+                DB_LOCK_WAIT.observe(time.perf_counter() - start, lock="write")
+            self._write_depth += 1
+            try:
+                yield cursor
+            except BaseException:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._write_conn.rollback()
+                raise
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._write_conn.commit()
+
+    def _create_tables(self, cur):
+        """Creates every table that does not exist yet."""
+        # Users Table (API keys are stored as SHA-256 hashes)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                api_key_hash TEXT UNIQUE,
+                created_at TEXT
+            )
+        """)
+
         # User Profile Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS user_profile (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT,
@@ -38,22 +232,10 @@ class Database:
         """)
 
         # Jobs Table
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS jobs (
-                id TEXT PRIMARY KEY,
-                title TEXT,
-                company TEXT,
-                description TEXT,
-                location TEXT,
-                salary_range TEXT,
-                requirements TEXT, -- JSON list
-                status TEXT,
-                application_details TEXT -- JSON dict
-            )
-        """)
+        cur.execute(JOBS_TABLE_SQL.format(name="jobs"))
 
         # Resume Reviews Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS resume_reviews (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 score INTEGER,
@@ -63,7 +245,7 @@ class Database:
         """)
 
         # Learning Paths Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS learning_paths (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 data TEXT, -- JSON dict
@@ -72,7 +254,7 @@ class Database:
         """)
 
         # Chat Sessions Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS chat_sessions (
                 id TEXT PRIMARY KEY,
                 title TEXT,
@@ -81,9 +263,52 @@ class Database:
                 updated_at TEXT
             )
         """)
-        
+    
+        # Job Requirements Table (one row per job requirement, for indexed filtering)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS job_requirements (
+                job_id TEXT,
+                requirement TEXT,
+                FOREIGN KEY (job_id) REFERENCES jobs(id)
+            )
+        """)
+
+        # Full-text index over job postings
+        cur.execute(JOBS_FTS_SQL)
+
+        # MinHash signatures of web postings, with their LSH band keys, for
+        # spotting the same posting syndicated on several job boards. Shared
+        # by all users: they describe public postings, not anyone's data.
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS job_signatures (
+                job_id TEXT PRIMARY KEY,
+                signature TEXT -- JSON list of ints
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS job_signature_bands (
+                band_key TEXT,
+                job_id TEXT
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_job_signature_bands_key ON job_signature_bands (band_key)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_job_signature_bands_job ON job_signature_bands (job_id)")
+
+        # Chat Messages Table (one row per message, replaces chat_sessions.messages)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT,
+                role TEXT,
+                content TEXT,
+                agent_name TEXT,
+                timestamp TEXT,
+                FOREIGN KEY (session_id) REFERENCES chat_sessions(id)
+            )
+        """)
+    
         # Skill Tests Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS skill_tests (
                 id TEXT PRIMARY KEY,
                 skill_name TEXT,
@@ -93,9 +318,9 @@ class Database:
                 job_related_ids TEXT -- JSON list of job IDs this test is for
             )
         """)
-        
+    
         # Test Results Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS test_results (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 test_id TEXT,
@@ -108,9 +333,9 @@ class Database:
                 FOREIGN KEY (test_id) REFERENCES skill_tests(id)
             )
         """)
-        
+    
         # User Activity Table
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS user_activity (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 activity_type TEXT, -- 'job_search', 'job_view', 'job_apply', 'test_taken', 'learning_started'
@@ -118,168 +343,548 @@ class Database:
                 timestamp TEXT
             )
         """)
-        
-        self.conn.commit()
+
+        # Background Tasks Table (durable queue for work done after a chat reply)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                kind TEXT,
+                payload TEXT, -- JSON dict
+                status TEXT, -- 'queued', 'running', 'done', 'failed'
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER,
+                result TEXT, -- JSON
+                error TEXT,
+                run_after REAL, -- unix time the task may next run at
+                created_at TEXT,
+                updated_at TEXT
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_queue ON tasks (status, run_after)")
+
+    def _migrations(self):
+        """
+        Schema migrations, oldest first; a migration's version is its position
+        in this list. Append new ones and never reorder or edit a released one.
+        """
+        return [
+            self._create_tables,
+            self._add_application_columns,
+            self._add_resume_content_hash,
+            self._move_chat_messages,
+            self._scope_data_to_users,
+            self._add_active_session,
+            self._add_summary_columns,
+            self._add_task_leases,
+            self._add_message_routes,
+            self._add_daily_stats,
+        ]
+
+    def _migrate(self):
+        """
+        Applies, in order, every migration not yet recorded in schema_version.
+        Each runs in one transaction with its version row, so a failing
+        migration leaves the schema at the previous version. Databases created
+        before schema_version existed replay all of them once, which is why
+        every migration is idempotent.
+        """
+        with self._write() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT,
+                    applied_at TEXT
+                )
+            """)
+            cur.execute("SELECT coalesce(max(version), 0) FROM schema_version")
+            current = cur.fetchone()[0]
+
+        for version, migration in enumerate(self._migrations(), start=1):
+            if version <= current:
+                continue
+            with self._write() as cur:
+                # Another worker process may have applied it while we waited for the lock
+                cur.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,))
+                if cur.fetchone():
+                    continue
+                migration(cur)
+                name = migration.__name__.lstrip("_")
+                cur.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                            (version, name, datetime.datetime.now().isoformat()))
+            print(f"Applied schema migration {version}: {name}")
+
+    def schema_version(self) -> int:
+        with self._read() as cur:
+            cur.execute("SELECT coalesce(max(version), 0) FROM schema_version")
+            return cur.fetchone()[0]
+
+    def _add_column(self, cur, table: str, column: str, definition: str) -> bool:
+        cur.execute(f"PRAGMA table_info({table})")
+        if column in [row['name'] for row in cur.fetchall()]:
+            return False
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+
+    def _add_application_columns(self, cur):
+        """Application status and date, promoted out of the application_details JSON."""
+        if self._add_column(cur, "jobs", "application_status", "TEXT"):
+            cur.execute("""
+                UPDATE jobs SET application_status = json_extract(application_details, '$.status')
+                WHERE application_details IS NOT NULL
+            """)
+        if self._add_column(cur, "jobs", "applied_date", "TEXT"):
+            cur.execute("""
+                UPDATE jobs SET applied_date = json_extract(application_details, '$.applied_date')
+                WHERE application_details IS NOT NULL
+            """)
+
+    def _add_resume_content_hash(self, cur):
+        """Content hash of the uploaded file a review was made for."""
+        self._add_column(cur, "resume_reviews", "content_hash", "TEXT")
+
+    def _move_chat_messages(self, cur):
+        """Moves messages still stored in the legacy chat_sessions.messages JSON blob into chat_messages."""
+        cur.execute("SELECT id, messages FROM chat_sessions WHERE messages IS NOT NULL AND messages != '[]'")
+        for row in cur.fetchall():
+            messages = json.loads(row['messages'])
+            cur.executemany("""
+                INSERT INTO chat_messages (session_id, role, content, agent_name, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(row['id'], m.get('role'), m.get('content'), m.get('agent_name'), m.get('timestamp')) for m in messages])
+            cur.execute("UPDATE chat_sessions SET messages = '[]' WHERE id = ?", (row['id'],))
+
+    def _scope_data_to_users(self, cur):
+        """User ownership of every row, with per-user indexes."""
+        # Every row belongs to a user; data from before users existed goes to the default user
+        for table in ("user_profile", "resume_reviews", "learning_paths", "chat_sessions", "chat_messages",
+                      "job_requirements", "skill_tests", "test_results", "user_activity", "tasks"):
+            self._add_column(cur, table, "user_id", f"INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID}")
+
+        # The jobs primary key changed from (id) to (user_id, id), which needs a
+        # rebuild; rowids are copied so jobs_fts keeps pointing at the right rows
+        cur.execute("PRAGMA table_info(jobs)")
+        if "user_id" not in [row['name'] for row in cur.fetchall()]:
+            cur.execute(JOBS_TABLE_SQL.format(name="jobs_new"))
+            cur.execute(f"""
+                INSERT INTO jobs_new (rowid, user_id, id, title, company, description, location, salary_range,
+                                      requirements, status, application_details, application_status, applied_date)
+                SELECT rowid, {DEFAULT_USER_ID}, id, title, company, description, location, salary_range,
+                       requirements, status, application_details, application_status, applied_date
+                FROM jobs
+            """)
+            cur.execute("DROP TABLE jobs")
+            cur.execute("ALTER TABLE jobs_new RENAME TO jobs")
+
+        # jobs_fts gained the owner column; virtual tables cannot be altered, so
+        # it is recreated and refilled below (the catalogue is re-indexed at startup)
+        cur.execute("PRAGMA table_info(jobs_fts)")
+        if "owner" not in [row['name'] for row in cur.fetchall()]:
+            cur.execute("DROP TABLE jobs_fts")
+            cur.execute(JOBS_FTS_SQL)
+
+        # Indexes that predate users, replaced by the per-user ones below
+        for index in ("idx_jobs_applied_date", "idx_jobs_status", "idx_jobs_company", "idx_jobs_location",
+                      "idx_jobs_title", "idx_jobs_status_title", "idx_jobs_status_company",
+                      "idx_resume_reviews_hash", "idx_job_requirements_requirement", "idx_job_requirements_job",
+                      "idx_chat_messages_session"):
+            cur.execute(f"DROP INDEX IF EXISTS {index}")
+
+        # Every user-facing query starts from user_id; the rest of each index
+        # matches a filter or sort order, so per-request cost does not grow
+        # with the number of users
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_user_profile_user ON user_profile (user_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (user_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_applied_date ON jobs (user_id, applied_date)")
+        # Job board filters and sort orders
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_status ON jobs (user_id, status)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_company ON jobs (user_id, company COLLATE NOCASE)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_location ON jobs (user_id, location COLLATE NOCASE)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_title ON jobs (user_id, title COLLATE NOCASE)")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_user_status_title ON jobs (user_id, status, title COLLATE NOCASE)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_user_status_company ON jobs (user_id, status, company COLLATE NOCASE)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_job_requirements_user_requirement
+            ON job_requirements (user_id, requirement COLLATE NOCASE, job_id)
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_job_requirements_user_job ON job_requirements (user_id, job_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_reviews_user ON resume_reviews (user_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_reviews_user_hash ON resume_reviews (user_id, content_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_learning_paths_user ON learning_paths (user_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_user ON chat_sessions (user_id, updated_at)")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_chat_messages_user_session ON chat_messages (user_id, session_id, id)
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_skill_tests_user ON skill_tests (user_id, created_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_test_results_user ON test_results (user_id, test_id, taken_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_test_results_user_taken ON test_results (user_id, taken_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_user_activity_user ON user_activity (user_id, timestamp)")
+
+        # Requirements of jobs stored before job_requirements existed
+        cur.execute("SELECT 1 FROM job_requirements LIMIT 1")
+        if not cur.fetchone():
+            cur.execute("""
+                INSERT INTO job_requirements (user_id, job_id, requirement)
+                SELECT jobs.user_id, jobs.id, json_each.value FROM jobs, json_each(jobs.requirements)
+            """)
+
+        # Jobs stored before jobs_fts existed (or before it had an owner column)
+        cur.execute("SELECT 1 FROM jobs_fts WHERE rowid > 0 LIMIT 1")
+        if not cur.fetchone():
+            cur.execute("""
+                INSERT INTO jobs_fts (rowid, job_id, title, company, description, requirements, location,
+                                      salary_range, owner)
+                SELECT rowid, id, title, company, description,
+                       (SELECT group_concat(value, char(10)) FROM json_each(jobs.requirements)),
+                       location, salary_range, 'u' || user_id
+                FROM jobs
+            """)
+
+    def _add_active_session(self, cur):
+        """Chat session new messages go to, kept in the database so every worker process agrees on it."""
+        self._add_column(cur, "users", "active_session_id", "TEXT")
+
+    def _add_summary_columns(self, cur):
+        """Summaries kept up to date on write, so list endpoints do not decode full payloads."""
+        if self._add_column(cur, "chat_sessions", "message_count", "INTEGER NOT NULL DEFAULT 0"):
+            self._add_column(cur, "chat_sessions", "last_message_preview", "TEXT")
+            cur.execute(SESSION_SUMMARY_SQL)
+        if self._add_column(cur, "skill_tests", "question_count", "INTEGER"):
+            cur.execute("UPDATE skill_tests SET question_count = json_array_length(questions)")
+        if self._add_column(cur, "learning_paths", "skill", "TEXT"):
+            self._add_column(cur, "learning_paths", "message", "TEXT")
+            self._add_column(cur, "learning_paths", "recommendations", "TEXT") # JSON list
+            cur.execute("""
+                UPDATE learning_paths SET
+                    skill = json_extract(data, '$.skill'),
+                    message = json_extract(data, '$.message'),
+                    recommendations = CASE WHEN json_type(data, '$.recommendations') = 'array'
+                                           THEN json_extract(data, '$.recommendations') ELSE '[]' END
+            """)
+
+    def _add_task_leases(self, cur):
+        """Owner and lease expiry of running tasks, so only abandoned ones are requeued."""
+        self._add_column(cur, "tasks", "claimed_by", "TEXT")
+        self._add_column(cur, "tasks", "lease_expires_at", "REAL") # unix time
+
+    def _add_message_routes(self, cur):
+        """
+        The routing decision for each user message and how it was made, so the
+        intent router trains on LLM decisions rather than on whichever agent replied.
+        Earlier messages have no recorded source and are not used for training.
+        """
+        self._add_column(cur, "chat_messages", "routed_agent", "TEXT")
+        # rules / model (local fast path), llm, error (LLM router failed), clarification
+        self._add_column(cur, "chat_messages", "route_source", "TEXT")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_route_source ON chat_messages (route_source)")
+
+    def _add_daily_stats(self, cur):
+        """
+        Creates the dashboard stats tables: a row of totals per user and
+        per-day counters in daily_stats. Databases from before this migration
+        kept the per-day counts as JSON maps in dashboard_stats. Stats are
+        derived data, so that table is dropped rather than converted; each
+        user's stats are recomputed on first use.
+        """
+        cur.execute("PRAGMA table_info(dashboard_stats)")
+        if "applications_by_day" in [row['name'] for row in cur.fetchall()]:
+            cur.execute("DROP TABLE dashboard_stats")
+        cur.execute(DASHBOARD_STATS_SQL)
+        cur.execute(DAILY_STATS_SQL)
 
     def _seed_default_data(self):
-        # Check if user profile exists
-        self.cursor.execute("SELECT count(*) FROM user_profile")
-        if self.cursor.fetchone()[0] == 0:
-            default_profile = {
-                "name": "Alex Johnson",
-                "email": "alex.johnson@example.com",
-                "role": "Senior Frontend Developer",
-                "location": "San Francisco, CA",
-                "salary_min": "$120,000",
-                "salary_max": "$160,000",
-                "skills": json.dumps(['React', 'TypeScript', 'Node.js', 'Tailwind CSS']),
-                "preferences": json.dumps({
-                    "preferred_location": "Remote",
-                    "preferred_role": "Frontend Developer",
-                    "learned_skills": []
-                })
-            }
-            self.cursor.execute("""
-                INSERT INTO user_profile (name, email, role, location, salary_min, salary_max, skills, preferences)
-                VALUES (:name, :email, :role, :location, :salary_min, :salary_max, :skills, :preferences)
-            """, default_profile)
-            self.conn.commit()
-
-        # Create default session if none exists
-        self.cursor.execute("SELECT count(*) FROM chat_sessions")
-        if self.cursor.fetchone()[0] == 0:
-            self.create_session("Welcome Chat")
-
-        # Seed sample jobs if none exist
-        self.cursor.execute("SELECT count(*) FROM jobs")
-        if self.cursor.fetchone()[0] == 0:
-            sample_jobs = [
-                {
-                    "id": "1",
-                    "title": "Senior Frontend Engineer",
-                    "company": "TechCorp",
-                    "description": "We are looking for an experienced Frontend Engineer to join our team.",
-                    "location": "Remote",
-                    "salary_range": "₹120,000 - ₹160,000",
-                    "requirements": ["React", "TypeScript", "Node.js"],
-                    "status": "Saved",
-                    "application_details": None
-                },
-                {
-                    "id": "2",
-                    "title": "Full Stack Developer",
-                    "company": "StartupInc",
-                    "description": "Join a fast-paced startup building the future of AI.",
+        with self._write() as cur:
+            # The default user owns pre-existing data and keyless requests; it has no API key
+            cur.execute("""
+                INSERT OR IGNORE INTO users (id, name, api_key_hash, created_at) VALUES (?, 'Default user', NULL, ?)
+            """, (DEFAULT_USER_ID, datetime.datetime.now().isoformat()))
+
+            # Check if user profile exists
+            cur.execute("SELECT count(*) FROM user_profile WHERE user_id = ?", (DEFAULT_USER_ID,))
+            if cur.fetchone()[0] == 0:
+                default_profile = {
+                    "user_id": DEFAULT_USER_ID,
+                    "name": "Alex Johnson",
+                    "email": "alex.johnson@example.com",
+                    "role": "Senior Frontend Developer",
                     "location": "San Francisco, CA",
-                    "salary_range": "₹140,000 - ₹180,000",
-                    "requirements": ["Python", "React", "FastAPI"],
-                    "status": "Saved",
-                    "application_details": None
-                },
-                {
-                    "id": "3",
-                    "title": "Product Designer",
-                    "company": "DesignStudio",
-                    "description": "Looking for a creative Product Designer with UI/UX skills.",
-                    "location": "New York, NY",
-                    "salary_range": "₹100,000 - ₹140,000",
-                    "requirements": ["Figma", "Adobe XD", "HTML/CSS"],
-                    "status": "Saved",
-                    "application_details": None
+                    "salary_min": "$120,000",
+                    "salary_max": "$160,000",
+                    "skills": json.dumps(['React', 'TypeScript', 'Node.js', 'Tailwind CSS']),
+                    "preferences": json.dumps({
+                        "preferred_location": "Remote",
+                        "preferred_role": "Frontend Developer",
+                        "learned_skills": []
+                    })
                 }
-            ]
-            self.add_jobs(sample_jobs)
+                cur.execute("""
+                    INSERT INTO user_profile (user_id, name, email, role, location, salary_min, salary_max, skills, preferences)
+                    VALUES (:user_id, :name, :email, :role, :location, :salary_min, :salary_max, :skills, :preferences)
+                """, default_profile)
+
+            # Create default session if none exists
+            cur.execute("SELECT count(*) FROM chat_sessions WHERE user_id = ?", (DEFAULT_USER_ID,))
+            if cur.fetchone()[0] == 0:
+                self.create_session(DEFAULT_USER_ID, "Welcome Chat")
+
+            # Seed sample jobs if none exist
+            cur.execute("SELECT 1 FROM jobs WHERE user_id = ? LIMIT 1", (DEFAULT_USER_ID,))
+            if cur.fetchone() is None:
+                sample_jobs = [
+                    {
+                        "id": "1",
+                        "title": "Senior Frontend Engineer",
+                        "company": "TechCorp",
+                        "description": "We are looking for an experienced Frontend Engineer to join our team.",
+                        "location": "Remote",
+                        "salary_range": "₹120,000 - ₹160,000",
+                        "requirements": ["React", "TypeScript", "Node.js"],
+                        "status": "Saved",
+                        "application_details": None
+                    },
+                    {
+                        "id": "2",
+                        "title": "Full Stack Developer",
+                        "company": "StartupInc",
+                        "description": "Join a fast-paced startup building the future of AI.",
+                        "location": "San Francisco, CA",
+                        "salary_range": "₹140,000 - ₹180,000",
+                        "requirements": ["Python", "React", "FastAPI"],
+                        "status": "Saved",
+                        "application_details": None
+                    },
+                    {
+                        "id": "3",
+                        "title": "Product Designer",
+                        "company": "DesignStudio",
+                        "description": "Looking for a creative Product Designer with UI/UX skills.",
+                        "location": "New York, NY",
+                        "salary_range": "₹100,000 - ₹140,000",
+                        "requirements": ["Figma", "Adobe XD", "HTML/CSS"],
+                        "status": "Saved",
+                        "application_details": None
+                    }
+                ]
+                self.add_jobs(DEFAULT_USER_ID, sample_jobs)
+
+    # --- Users ---
+    @staticmethod
+    def _hash_api_key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
+    def create_user(self, name: str) -> Dict:
+        """
+        Adds a user with an empty profile. Returns its id and API key; only a
+        hash of the key is stored, so it cannot be shown again.
+        """
+        api_key = secrets.token_urlsafe(32)
+        with self._write() as cur:
+            cur.execute("""
+                INSERT INTO users (name, api_key_hash, created_at) VALUES (?, ?, ?)
+            """, (name, self._hash_api_key(api_key), datetime.datetime.now().isoformat()))
+            user_id = cur.lastrowid
+            cur.execute("""
+                INSERT INTO user_profile (user_id, name, email, role, location, salary_min, salary_max, skills, preferences)
+                VALUES (?, ?, '', '', '', '', '', '[]', ?)
+            """, (user_id, name, json.dumps({"learned_skills": []})))
+        return {"id": user_id, "name": name, "api_key": api_key}
+
+    def get_user_id_for_key(self, api_key: str) -> Optional[int]:
+        with self._read() as cur:
+            cur.execute("SELECT id FROM users WHERE api_key_hash = ?", (self._hash_api_key(api_key),))
+            row = cur.fetchone()
+        return row['id'] if row else None
 
     # --- Session Management ---
-    def create_session(self, title: str = None) -> str:
-        session_id = str(uuid.uuid4())[:8]
+    def create_session(self, user_id: int, title: str = None) -> str:
+        """Creates a session and makes it the user's active one."""
+        session_id = str(uuid.uuid4())
         if not title:
             # We'll update title later based on first message
             title = "New Chat"
         
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            INSERT INTO chat_sessions (id, title, messages, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (session_id, title, json.dumps([]), now, now))
-        self.conn.commit()
-        self.active_session_id = session_id
+        with self._write() as cur:
+            cur.execute("""
+                INSERT INTO chat_sessions (id, user_id, title, messages, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (session_id, user_id, title, json.dumps([]), now, now))
+            cur.execute("UPDATE users SET active_session_id = ? WHERE id = ?", (session_id, user_id))
         return session_id
 
-    def get_active_session(self) -> Dict:
-        if not hasattr(self, 'active_session_id') or not self.active_session_id:
-            # Get most recent session
-            self.cursor.execute("SELECT id FROM chat_sessions ORDER BY updated_at DESC LIMIT 1")
-            row = self.cursor.fetchone()
-            if row:
-                self.active_session_id = row['id']
-            else:
-                self.active_session_id = self.create_session()
-        
-        self.cursor.execute("SELECT * FROM chat_sessions WHERE id = ?", (self.active_session_id,))
-        row = self.cursor.fetchone()
+    @staticmethod
+    def _active_session_row(cur, user_id: int):
+        cur.execute("""
+            SELECT chat_sessions.id, chat_sessions.title, chat_sessions.created_at, chat_sessions.updated_at
+            FROM users JOIN chat_sessions ON chat_sessions.id = users.active_session_id
+            WHERE users.id = ? AND chat_sessions.user_id = users.id
+        """, (user_id,))
+        return cur.fetchone()
+
+    def get_active_session(self, user_id: int, message_limit: int = None) -> Dict:
+        """
+        The session new messages go to: the user's stored pointer, else their
+        most recently updated session, else a new one.
+        """
+        with self._read() as cur:
+            row = self._active_session_row(cur, user_id)
         if not row:
-             # Fallback if active session was deleted
-             self.active_session_id = self.create_session()
-             return self.get_active_session()
+            with self._write() as cur:
+                # Checked again under the write lock so concurrent requests settle on one session
+                row = self._active_session_row(cur, user_id)
+                if not row:
+                    cur.execute("""
+                        SELECT id FROM chat_sessions WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1
+                    """, (user_id,))
+                    latest = cur.fetchone()
+                    if latest:
+                        cur.execute("UPDATE users SET active_session_id = ? WHERE id = ?", (latest['id'], user_id))
+                    else:
+                        self.create_session(user_id)
+                    row = self._active_session_row(cur, user_id)
+        return self._session_from_row(user_id, row, message_limit)
+
+    def get_session(self, user_id: int, session_id: str, message_limit: int = None) -> Optional[Dict]:
+        """One of the user's sessions by id, or None."""
+        with self._read() as cur:
+            cur.execute("""
+                SELECT id, title, created_at, updated_at FROM chat_sessions WHERE user_id = ? AND id = ?
+            """, (user_id, session_id))
+            row = cur.fetchone()
+        return self._session_from_row(user_id, row, message_limit) if row else None
 
+    def _session_from_row(self, user_id: int, row, message_limit: int = None) -> Dict:
         return {
             "id": row['id'],
             "title": row['title'],
-            "messages": json.loads(row['messages']),
+            "messages": self._get_messages(user_id, row['id'], message_limit),
             "created_at": row['created_at'],
             "updated_at": row['updated_at']
         }
 
-    def switch_session(self, session_id: str) -> bool:
-        self.cursor.execute("SELECT 1 FROM chat_sessions WHERE id = ?", (session_id,))
-        if self.cursor.fetchone():
-            self.active_session_id = session_id
-            return True
-        return False
+    def _get_messages(self, user_id: int, session_id: str, limit: int = None) -> List[Dict]:
+        """Messages of a session in chronological order; only the last `limit` if given."""
+        if limit == 0:
+            return []
+        with self._read() as cur:
+            if limit is not None:
+                cur.execute("""
+                    SELECT role, content, agent_name, timestamp FROM chat_messages
+                    WHERE user_id = ? AND session_id = ? ORDER BY id DESC LIMIT ?
+                """, (user_id, session_id, limit))
+                rows = cur.fetchall()[::-1]
+            else:
+                cur.execute("""
+                    SELECT role, content, agent_name, timestamp FROM chat_messages
+                    WHERE user_id = ? AND session_id = ? ORDER BY id
+                """, (user_id, session_id))
+                rows = cur.fetchall()
+        return [self._message_from_row(r) for r in rows]
 
-    def delete_session(self, session_id: str) -> bool:
-        self.cursor.execute("SELECT count(*) FROM chat_sessions")
-        count = self.cursor.fetchone()[0]
-        if count <= 1:
-            return False # Cannot delete last session
+    def get_routed_messages(self, limit: int = 5000) -> List[tuple]:
+        """
+        (user message, agent the LLM router chose) pairs, most recent first, for
+        training the intent router. Fast-path decisions, routing errors and
+        clarification turns are left out, so the router never learns from its
+        own guesses or from fallbacks. Drawn from all users, as the router is shared.
+        """
+        with self._read() as cur:
+            cur.execute("""
+                SELECT content, routed_agent FROM chat_messages
+                WHERE route_source = 'llm' AND routed_agent IS NOT NULL
+                ORDER BY id DESC LIMIT ?
+            """, (limit,))
+            return [(row['content'], row['routed_agent']) for row in cur.fetchall()]
 
-        self.cursor.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
-        self.conn.commit()
-        
-        if self.active_session_id == session_id:
-            self.active_session_id = None # Will be reset by get_active_session
-        return True
+    def set_message_route(self, message_id: int, agent: str, source: str):
+        """Records which agent a user message was routed to and how the decision was made."""
+        with self._write() as cur:
+            cur.execute("UPDATE chat_messages SET routed_agent = ?, route_source = ? WHERE id = ?",
+                        (agent, source, message_id))
 
-    def add_message(self, role: str, content: str, agent_name: str = None):
-        session = self.get_active_session()
-        messages = session["messages"]
-        messages.append({
-            "role": role,
-            "content": content,
-            "agent_name": agent_name,
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-        
-        # Update title if it's the first user message
-        title = session["title"]
-        if len(messages) == 1 and role == "user":
-            title = content[:50] + ("..." if len(content) > 50 else "")
-        elif len(messages) == 2 and role == "user" and session["title"] == "New Chat": # Handle case where welcome message exists
-             title = content[:50] + ("..." if len(content) > 50 else "")
+    @staticmethod
+    def _message_from_row(row) -> Dict:
+        return {
+            "role": row['role'],
+            "content": row['content'],
+            "agent_name": row['agent_name'],
+            "timestamp": row['timestamp']
+        }
+
+    def switch_session(self, user_id: int, session_id: str) -> bool:
+        with self._write() as cur:
+            cur.execute("""
+                UPDATE users SET active_session_id = ?
+                WHERE id = ? AND EXISTS (SELECT 1 FROM chat_sessions WHERE user_id = ? AND id = ?)
+            """, (session_id, user_id, user_id, session_id))
+            return cur.rowcount > 0
+
+    def delete_session(self, user_id: int, session_id: str) -> bool:
+        with self._write() as cur:
+            cur.execute("SELECT count(*) FROM chat_sessions WHERE user_id = ?", (user_id,))
+            count = cur.fetchone()[0]
+            if count <= 1:
+                return False # Cannot delete last session
+
+            cur.execute("DELETE FROM chat_sessions WHERE user_id = ? AND id = ?", (user_id, session_id))
+            if cur.rowcount == 0:
+                return False
+            cur.execute("DELETE FROM chat_messages WHERE user_id = ? AND session_id = ?", (user_id, session_id))
+            # The next get_active_session falls back to the most recent session
+            cur.execute("""
+                UPDATE users SET active_session_id = NULL WHERE id = ? AND active_session_id = ?
+            """, (user_id, session_id))
+        return True
 
+    def add_message(self, user_id: int, role: str, content: str, agent_name: str = None, session_id: str = None):
+        """
+        Appends a message to `session_id`, or to the active session if None,
+        and returns its id. Raises ValueError if session_id is not one of the
+        user's sessions.
+        """
+        if session_id:
+            session = self.get_session(user_id, session_id, message_limit=0)
+            if session is None:
+                raise ValueError("Session not found")
+        else:
+            session = self.get_active_session(user_id, message_limit=0)
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            UPDATE chat_sessions 
-            SET messages = ?, title = ?, updated_at = ?
-            WHERE id = ?
-        """, (json.dumps(messages), title, now, session["id"]))
-        self.conn.commit()
+
+        with self._write() as cur:
+            cur.execute("SELECT message_count FROM chat_sessions WHERE id = ?", (session["id"],))
+            previous_count = cur.fetchone()[0]
+
+            cur.execute("""
+                INSERT INTO chat_messages (user_id, session_id, role, content, agent_name, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, session["id"], role, content, agent_name, now))
+            message_id = cur.lastrowid
+            
+            # Update title if it's the first user message
+            title = session["title"]
+            if previous_count == 0 and role == "user":
+                title = content[:50] + ("..." if len(content) > 50 else "")
+            elif previous_count == 1 and role == "user" and session["title"] == "New Chat": # Handle case where welcome message exists
+                 title = content[:50] + ("..." if len(content) > 50 else "")
+
+            cur.execute("""
+                UPDATE chat_sessions 
+                SET title = ?, updated_at = ?, message_count = message_count + 1, last_message_preview = ?
+                WHERE id = ?
+            """, (title, now, _preview(content), session["id"]))
+        return message_id
 
     # --- User Profile ---
-    def get_user_profile(self) -> Dict:
-        self.cursor.execute("SELECT * FROM user_profile LIMIT 1")
-        row = self.cursor.fetchone()
+    def get_user_profile(self, user_id: int) -> Dict:
+        with self._read() as cur:
+            return self._get_user_profile(cur, user_id)
+
+    def _get_user_profile(self, cur, user_id: int) -> Dict:
+        cur.execute("SELECT * FROM user_profile WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
         if row:
             return {
                 "name": row['name'],
@@ -293,137 +898,465 @@ class Database:
             }
         return {}
 
-    def update_user_profile(self, data: Dict):
-        # Fetch current to merge
-        current = self.get_user_profile()
-        updated = {**current, **data}
-        
-        self.cursor.execute("""
-            UPDATE user_profile
-            SET name = :name, email = :email, role = :role, location = :location,
-                salary_min = :salary_min, salary_max = :salary_max, 
-                skills = :skills, preferences = :preferences
-            WHERE id = (SELECT id FROM user_profile LIMIT 1)
-        """, {
-            "name": updated['name'],
-            "email": updated['email'],
-            "role": updated['role'],
-            "location": updated['location'],
-            "salary_min": updated['salary_min'],
-            "salary_max": updated['salary_max'],
-            "skills": json.dumps(updated['skills']),
-            "preferences": json.dumps(updated['preferences'])
-        })
-        self.conn.commit()
+    def update_user_profile(self, user_id: int, data: Dict):
+        with self._write() as cur:
+            # Fetch current to merge
+            current = self._get_user_profile(cur, user_id)
+            updated = {**current, **data}
+            
+            cur.execute("""
+                INSERT INTO user_profile (user_id, name, email, role, location, salary_min, salary_max, skills, preferences)
+                VALUES (:user_id, :name, :email, :role, :location, :salary_min, :salary_max, :skills, :preferences)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    name = excluded.name, email = excluded.email, role = excluded.role,
+                    location = excluded.location, salary_min = excluded.salary_min,
+                    salary_max = excluded.salary_max, skills = excluded.skills,
+                    preferences = excluded.preferences
+            """, {
+                "user_id": user_id,
+                "name": updated.get('name'),
+                "email": updated.get('email'),
+                "role": updated.get('role'),
+                "location": updated.get('location'),
+                "salary_min": updated.get('salary_min'),
+                "salary_max": updated.get('salary_max'),
+                "skills": json.dumps(updated.get('skills', [])),
+                "preferences": json.dumps(updated.get('preferences', {}))
+            })
 
-    def update_user_preference(self, key: str, value: Any):
+    def update_user_preference(self, user_id: int, key: str, value: Any):
         """Update a specific preference key in user profile"""
-        profile = self.get_user_profile()
-        preferences = profile.get('preferences', {})
-        preferences[key] = value
-        
-        self.cursor.execute("""
-            UPDATE user_profile
-            SET preferences = ?
-            WHERE id = (SELECT id FROM user_profile LIMIT 1)
-        """, (json.dumps(preferences),))
-        self.conn.commit()
-
-    def get_user_context(self) -> Dict:
-        profile = self.get_user_profile()
-        session = self.get_active_session()
+        with self._write() as cur:
+            profile = self._get_user_profile(cur, user_id)
+            preferences = profile.get('preferences', {})
+            preferences[key] = value
+            
+            cur.execute("""
+                UPDATE user_profile
+                SET preferences = ?
+                WHERE user_id = ?
+            """, (json.dumps(preferences), user_id))
+
+    def get_user_context(self, user_id: int, session_id: str = None) -> Dict:
+        profile = self.get_user_profile(user_id)
+        if session_id:
+            session = self.get_session(user_id, session_id, message_limit=5) or {"messages": []}
+        else:
+            session = self.get_active_session(user_id, message_limit=5)
         return {
             "preferences": profile.get("preferences", {}),
             "profile": profile,
-            "chat_history": session["messages"][-5:]
+            "chat_history": session["messages"]
         }
 
     # --- Jobs ---
-    def add_jobs(self, jobs: List[Dict]):
+    def add_jobs(self, user_id: int, jobs: List[Dict]) -> Dict:
+        """
+        Upserts a batch of jobs in one transaction. New jobs are inserted as Saved;
+        existing ones get their listing fields refreshed while their status and
+        application details are kept. Rows whose content did not change are
+        skipped by SQLite. Returns inserted/updated/skipped counts.
+        """
+        # Last occurrence wins when the batch repeats an id
+        rows = {}
         for j in jobs:
-            # Check if exists
-            self.cursor.execute("SELECT 1 FROM jobs WHERE id = ?", (j['id'],))
-            if not self.cursor.fetchone():
-                self.cursor.execute("""
-                    INSERT INTO jobs (id, title, company, description, location, salary_range, requirements, status, application_details)
-                    VALUES (:id, :title, :company, :description, :location, :salary_range, :requirements, :status, :application_details)
-                """, {
-                    "id": j['id'],
-                    "title": j['title'],
-                    "company": j['company'],
-                    "description": j['description'],
-                    "location": j.get('location', 'Remote'),
-                    "salary_range": j.get('salary_range', 'Not specified'),
-                    "requirements": json.dumps(j.get('requirements', [])),
-                    "status": "Saved",
-                    "application_details": None
-                })
-        self.conn.commit()
+            rows[j['id']] = {
+                "user_id": user_id,
+                "id": j['id'],
+                "title": j.get('title'),
+                "company": j.get('company'),
+                "description": j.get('description'),
+                "location": j.get('location', 'Remote'),
+                "salary_range": j.get('salary_range', 'Not specified'),
+                "requirements": json.dumps(j.get('requirements', []))
+            }
+        if not rows:
+            return {"inserted": 0, "updated": 0, "skipped": 0}
+
+        with self._write() as cur:
+            stats = self._load_stats(cur, user_id)
+            # New rows always get a rowid above the current maximum, which lets
+            # us tell inserts from updates without checking ids one by one
+            cur.execute("SELECT coalesce(max(rowid), 0) FROM jobs")
+            max_rowid = cur.fetchone()[0]
+            changes_before = self._write_conn.total_changes
+
+            cur.executemany("""
+                INSERT INTO jobs (user_id, id, title, company, description, location, salary_range, requirements,
+                                  status, application_details)
+                VALUES (:user_id, :id, :title, :company, :description, :location, :salary_range, :requirements,
+                        'Saved', NULL)
+                ON CONFLICT(user_id, id) DO UPDATE SET
+                    title = excluded.title,
+                    company = excluded.company,
+                    description = excluded.description,
+                    location = excluded.location,
+                    salary_range = excluded.salary_range,
+                    requirements = excluded.requirements
+                WHERE title IS NOT excluded.title
+                   OR company IS NOT excluded.company
+                   OR description IS NOT excluded.description
+                   OR location IS NOT excluded.location
+                   OR salary_range IS NOT excluded.salary_range
+                   OR requirements IS NOT excluded.requirements
+            """, list(rows.values()))
+
+            changed = self._write_conn.total_changes - changes_before
+            cur.execute("SELECT count(*) FROM jobs WHERE rowid > ?", (max_rowid,))
+            inserted = cur.fetchone()[0]
+
+            cur.executemany("DELETE FROM job_requirements WHERE user_id = ? AND job_id = ?",
+                            [(user_id, job_id) for job_id in rows])
+            cur.executemany("""
+                INSERT INTO job_requirements (user_id, job_id, requirement) VALUES (?, ?, ?)
+            """, [(user_id, job_id, req) for job_id, r in rows.items()
+                  for req in dict.fromkeys(json.loads(r['requirements']))])
+
+            cur.executemany("DELETE FROM jobs_fts WHERE rowid = (SELECT rowid FROM jobs WHERE user_id = ? AND id = ?)",
+                            [(user_id, job_id) for job_id in rows])
+            cur.executemany("""
+                INSERT INTO jobs_fts (rowid, job_id, title, company, description, requirements, location,
+                                      salary_range, owner)
+                SELECT rowid, id, title, company, description, ?, location, salary_range, ?
+                FROM jobs WHERE user_id = ? AND id = ?
+            """, [("\n".join(json.loads(r['requirements'])), _owner(user_id), user_id, job_id)
+                  for job_id, r in rows.items()])
+
+            if changed:
+                stats["total_jobs"] += inserted
+                stats["recent_jobs"] = self._recent_jobs(cur, user_id)
+                self._save_stats(cur, user_id, stats)
+
+        updated = changed - inserted
+        return {"inserted": inserted, "updated": updated, "skipped": len(rows) - inserted - updated}
 
-    def get_jobs(self) -> List[Dict]:
-        self.cursor.execute("SELECT * FROM jobs")
-        rows = self.cursor.fetchall()
-        jobs = []
+    # Sort name -> (column expression, direction) for get_jobs_page; rowid breaks ties
+    JOB_SORTS = {
+        "newest": (None, "DESC"),
+        "oldest": (None, "ASC"),
+        "title": ("title COLLATE NOCASE", "ASC"),
+        "company": ("company COLLATE NOCASE", "ASC"),
+    }
+
+    def add_job_signatures(self, signatures: Dict[str, List[int]]):
+        """Stores (or replaces) the near-duplicate signature of each job id."""
+        with self._write() as cur:
+            cur.executemany("DELETE FROM job_signature_bands WHERE job_id = ?", [(job_id,) for job_id in signatures])
+            cur.executemany("""
+                INSERT OR REPLACE INTO job_signatures (job_id, signature) VALUES (?, ?)
+            """, [(job_id, json.dumps(sig)) for job_id, sig in signatures.items()])
+            cur.executemany("""
+                INSERT INTO job_signature_bands (band_key, job_id) VALUES (?, ?)
+            """, [(key, job_id) for job_id, sig in signatures.items() for key in band_keys(sig)])
+
+    def find_near_duplicate(self, signature: List[int], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> Optional[str]:
+        """
+        Id of the most similar known posting at or above threshold, or None.
+        Signatures are only recorded for postings that get stored, for any user.
+        """
+        keys = band_keys(signature)
+        if not keys:
+            return None
+        with self._read() as cur:
+            cur.execute(f"""
+                SELECT job_id, signature FROM job_signatures
+                WHERE job_id IN (
+                    SELECT job_id FROM job_signature_bands WHERE band_key IN ({",".join("?" * len(keys))})
+                )
+            """, keys)
+            candidates = cur.fetchall()
+        best, best_score = None, threshold
+        for row in candidates:
+            score = similarity(signature, json.loads(row['signature']))
+            if score >= best_score:
+                best, best_score = row['job_id'], score
+        return best
+
+    def get_jobs(self, user_id: int) -> List[Dict]:
+        with self._read() as cur:
+            cur.execute("SELECT * FROM jobs WHERE user_id = ?", (user_id,))
+            rows = cur.fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def get_jobs_by_ids(self, user_id: int, job_ids: List[str]) -> List[Dict]:
+        """The user's jobs with the given ids, in the order given; unknown ids are skipped."""
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        with self._read() as cur:
+            cur.execute(f"""
+                SELECT * FROM jobs WHERE user_id = ? AND id IN ({placeholders})
+            """, [user_id] + list(job_ids))
+            jobs = {row['id']: self._job_from_row(row) for row in cur.fetchall()}
+        return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+
+    def get_jobs_page(self, user_id: int, status: str = None, company: str = None, location: str = None,
+                      requirement: str = None, sort: str = "newest", limit: int = 50,
+                      cursor: str = None) -> Dict:
+        """
+        One page of jobs, filtered and sorted in SQL with keyset pagination.
+        `cursor` is the opaque next_cursor of the previous page; None starts from the top.
+        Raises ValueError for an unknown sort or a malformed cursor.
+        """
+        sql, params, column = self._jobs_page_query(user_id, status, company, location, requirement, sort, limit,
+                                                    cursor)
+        with self._read() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            key = last[column.split()[0]] if column else None
+            next_cursor = base64.urlsafe_b64encode(json.dumps([key, last['_rowid']]).encode()).decode()
+        return {"jobs": [self._job_from_row(row) for row in rows], "next_cursor": next_cursor}
+
+    def _jobs_page_query(self, user_id: int, status: str = None, company: str = None, location: str = None,
+                         requirement: str = None, sort: str = "newest", limit: int = 50, cursor: str = None):
+        """The SQL and parameters behind get_jobs_page, plus the sort column."""
+        if sort not in self.JOB_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'")
+        column, direction = self.JOB_SORTS[sort]
+        op = "<" if direction == "DESC" else ">"
+
+        where, params = ["user_id = ?"], [user_id]
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if company:
+            where.append("company = ? COLLATE NOCASE")
+            params.append(company)
+        if location:
+            where.append("location LIKE ? ESCAPE '\\'")
+            params.append(location.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if requirement:
+            where.append("""
+                id IN (SELECT job_id FROM job_requirements WHERE user_id = ? AND requirement = ? COLLATE NOCASE)
+            """)
+            params.extend([user_id, requirement])
+
+        if cursor:
+            try:
+                key, last_rowid = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            except Exception:
+                raise ValueError("Invalid cursor")
+            if column:
+                # Written as a range on the sort column so SQLite can seek the index
+                where.append(f"{column} {op}= ? AND ({column} {op} ? OR rowid {op} ?)")
+                params.extend([key, key, last_rowid])
+            else:
+                where.append(f"rowid {op} ?")
+                params.append(last_rowid)
+
+        order = f"{column} {direction}, rowid {direction}" if column else f"rowid {direction}"
+        sql = f"SELECT rowid AS _rowid, * FROM jobs WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?"
+        # One extra row tells whether another page exists
+        return sql, params + [limit + 1], column
+
+    def index_catalogue(self, jobs: List[Dict]):
+        """Replaces the static search catalogue in jobs_fts; it is searched alongside stored jobs."""
+        with self._write() as cur:
+            cur.execute("DELETE FROM jobs_fts WHERE rowid < 0")
+            cur.executemany("""
+                INSERT INTO jobs_fts (rowid, job_id, title, company, description, requirements, location,
+                                      salary_range, owner)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(-(i + 1), j['id'], j.get('title'), j.get('company'), j.get('description'),
+                   "\n".join(j.get('requirements', [])), j.get('location', 'Remote'),
+                   j.get('salary_range', 'Not specified'), CATALOGUE_OWNER) for i, j in enumerate(jobs)])
+
+    # bm25 column weights, in jobs_fts column order
+    SEARCH_WEIGHTS = (0.0, 10.0, 3.0, 1.0, 5.0, 2.0, 0.0, 0.0)
+    # Columns user text is matched against, so a query can never hit the owner tokens
+    SEARCH_COLUMNS = "{title company description requirements location}"
+    # Score multiplier for postings in the searched location (bm25 is negative, lower is better)
+    LOCATION_BOOST = 2.0
+
+    @staticmethod
+    def _fts_terms(text: str) -> List[str]:
+        # Quote every token so user input can never be parsed as FTS5 syntax.
+        # Only the last token is a prefix, as it is the one still being typed;
+        # expanding every token costs far more on large indexes.
+        tokens = [f'"{token}"' for token in re.findall(r"\w+", text.lower())]
+        if tokens:
+            tokens[-1] += "*"
+        return tokens
+
+    def search_jobs(self, user_id: int, query: str, location: str = None, limit: int = 20,
+                    include_catalogue: bool = False) -> List[Dict]:
+        """
+        Full-text job search ranked by bm25 with prefix matching; postings in
+        `location` are boosted. Only the user's stored jobs are searched unless
+        include_catalogue is set. Stored results are full job dicts, catalogue
+        results have no status. Each result carries its `score`.
+        """
+        search = self._search_query(user_id, query, location, limit, include_catalogue)
+        if search is None:
+            return []
+        with self._read() as cur:
+            cur.execute(*search)
+            rows = cur.fetchall()
+
+        results = []
         for row in rows:
-            jobs.append({
-                "id": row['id'],
-                "title": row['title'],
-                "company": row['company'],
-                "description": row['description'],
-                "location": row['location'],
-                "salary_range": row['salary_range'],
-                "requirements": json.loads(row['requirements']),
-                "status": row['status'],
-                "application_details": json.loads(row['application_details']) if row['application_details'] else None
-            })
-        return jobs
+            if row['_rowid'] > 0:
+                job = self._job_from_row({**dict(row), "id": row['job_id']})
+            else:
+                job = {
+                    "id": row['job_id'],
+                    "title": row['title'],
+                    "company": row['company'],
+                    "description": row['description'],
+                    "location": row['location'],
+                    "salary_range": row['salary_range'],
+                    "requirements": row['fts_requirements'].split("\n") if row['fts_requirements'] else [],
+                    "status": None,
+                    "application_details": None
+                }
+            job["score"] = round(-row['score'], 4)
+            results.append(job)
+        return results
+
+    def _search_query(self, user_id: int, query: str, location: str = None, limit: int = 20,
+                      include_catalogue: bool = False):
+        """The SQL and parameters behind search_jobs, or None when there is nothing to search for."""
+        terms = self._fts_terms(query or "")
+        columns = self.SEARCH_COLUMNS
+        if not terms and location:
+            # Without keywords, fall back to everything in the location
+            terms = self._fts_terms(location)
+            columns = "location"
+        if not terms:
+            return None
+
+        owners = [f'owner : "{_owner(user_id)}"']
+        if include_catalogue:
+            owners.append(f'owner : "{CATALOGUE_OWNER}"')
+        match = f"({' OR '.join(owners)}) AND {columns} : ({' OR '.join(terms)})"
+
+        weights = ", ".join(str(w) for w in self.SEARCH_WEIGHTS)
+        # Rank inside the index first so only the top hits are joined to jobs
+        sql = f"""
+            SELECT hits.*, jobs.requirements, jobs.status, jobs.application_details
+            FROM (
+                SELECT rowid AS _rowid, job_id, title, company, description, location, salary_range,
+                       requirements AS fts_requirements,
+                       bm25(jobs_fts, {weights})
+                       * (CASE WHEN ?1 IS NOT NULL AND instr(lower(location), lower(?1)) > 0
+                          THEN {self.LOCATION_BOOST} ELSE 1.0 END) AS score
+                FROM jobs_fts
+                WHERE jobs_fts MATCH ?2
+                ORDER BY score
+                LIMIT ?3
+            ) AS hits
+            LEFT JOIN jobs ON jobs.rowid = hits._rowid AND hits._rowid > 0
+            ORDER BY hits.score
+        """
+        return sql, (location, match, limit)
+
+    @staticmethod
+    def _job_from_row(row) -> Dict:
+        return {
+            "id": row['id'],
+            "title": row['title'],
+            "company": row['company'],
+            "description": row['description'],
+            "location": row['location'],
+            "salary_range": row['salary_range'],
+            "requirements": json.loads(row['requirements']),
+            "status": row['status'],
+            "application_details": json.loads(row['application_details']) if row['application_details'] else None
+        }
 
-    def mark_job_applied(self, job_id: str) -> bool:
+    def mark_job_applied(self, user_id: int, job_id: str) -> bool:
         now = datetime.datetime.now().isoformat()
         details = json.dumps({
             "applied_date": now,
             "status": "Applied",
             "notes": ""
         })
-        self.cursor.execute("""
-            UPDATE jobs 
-            SET status = 'Applied', application_details = ?
-            WHERE id = ?
-        """, (details, job_id))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
-
-    def update_job_application_status(self, job_id: str, status: str, notes: str = None) -> bool:
-        self.cursor.execute("SELECT application_details FROM jobs WHERE id = ?", (job_id,))
-        row = self.cursor.fetchone()
-        if not row or not row['application_details']:
-            return False
-        
-        details = json.loads(row['application_details'])
-        details['status'] = status
-        if notes:
-            details['notes'] = notes
+        with self._write() as cur:
+            cur.execute("SELECT status, applied_date FROM jobs WHERE user_id = ? AND id = ?", (user_id, job_id))
+            previous = cur.fetchone()
+            if not previous:
+                return False
+            stats = self._load_stats(cur, user_id)
+            cur.execute("""
+                UPDATE jobs 
+                SET status = 'Applied', application_details = ?,
+                    application_status = 'Applied', applied_date = ?
+                WHERE user_id = ? AND id = ?
+            """, (details, now, user_id, job_id))
+
+            if previous['status'] != 'Applied':
+                stats["jobs_applied"] += 1
+                self._save_stats(cur, user_id, stats)
+            if previous['applied_date']:
+                # Applying again moves the application to today
+                self._count_day(cur, user_id, previous['applied_date'][:10], APPLICATIONS_KIND, -1)
+            self._count_day(cur, user_id, now[:10], APPLICATIONS_KIND)
+            return True
+
+    def update_job_application_status(self, user_id: int, job_id: str, status: str, notes: str = None) -> bool:
+        with self._write() as cur:
+            cur.execute("SELECT application_details FROM jobs WHERE user_id = ? AND id = ?", (user_id, job_id))
+            row = cur.fetchone()
+            if not row or not row['application_details']:
+                return False
             
-        self.cursor.execute("""
-            UPDATE jobs 
-            SET application_details = ?
-            WHERE id = ?
-        """, (json.dumps(details), job_id))
-        self.conn.commit()
-        return True
+            details = json.loads(row['application_details'])
+            details['status'] = status
+            if notes:
+                details['notes'] = notes
+                
+            cur.execute("""
+                UPDATE jobs 
+                SET application_details = ?, application_status = ?
+                WHERE user_id = ? AND id = ?
+            """, (json.dumps(details), status, user_id, job_id))
+            return True
 
     # --- Resume ---
-    def add_resume_review(self, review: Dict):
+    def add_resume_review(self, user_id: int, review: Dict, content_hash: str = None):
+        """
+        Records a review. Re-uploading the file behind the latest review does
+        not add a second copy of it.
+        """
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            INSERT INTO resume_reviews (score, feedback, timestamp)
-            VALUES (?, ?, ?)
-        """, (review['score'], json.dumps(review['feedback']), now))
-        self.conn.commit()
-
-    def get_latest_resume_review(self) -> Dict:
-        self.cursor.execute("SELECT * FROM resume_reviews ORDER BY id DESC LIMIT 1")
-        row = self.cursor.fetchone()
+        with self._write() as cur:
+            if content_hash:
+                cur.execute("""
+                    SELECT content_hash FROM resume_reviews WHERE user_id = ? ORDER BY id DESC LIMIT 1
+                """, (user_id,))
+                latest = cur.fetchone()
+                if latest and latest['content_hash'] == content_hash:
+                    return
+            stats = self._load_stats(cur, user_id)
+            cur.execute("""
+                INSERT INTO resume_reviews (user_id, score, feedback, timestamp, content_hash)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, review['score'], json.dumps(review['feedback']), now, content_hash))
+
+            stats["resume_score"] = review['score']
+            stats["recent_resume_scores"] = ([review['score']] + stats["recent_resume_scores"])[:RECENT_RESUME_SCORES]
+            self._save_stats(cur, user_id, stats)
+
+    def get_resume_review_by_hash(self, user_id: int, content_hash: str) -> Optional[Dict]:
+        with self._read() as cur:
+            cur.execute("""
+                SELECT score, feedback FROM resume_reviews WHERE user_id = ? AND content_hash = ?
+                ORDER BY id DESC LIMIT 1
+            """, (user_id, content_hash))
+            row = cur.fetchone()
+        if row:
+            return {"score": row['score'], "feedback": json.loads(row['feedback'])}
+        return None
+
+    def get_latest_resume_review(self, user_id: int) -> Dict:
+        with self._read() as cur:
+            cur.execute("SELECT * FROM resume_reviews WHERE user_id = ? ORDER BY id DESC LIMIT 1", (user_id,))
+            row = cur.fetchone()
         if row:
             return {
                 "score": row['score'],
@@ -433,120 +1366,273 @@ class Database:
         return {}
 
     # --- Learning ---
-    def update_learning_path(self, path: Dict):
+    def update_learning_path(self, user_id: int, path: Dict):
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            INSERT INTO learning_paths (data, timestamp)
-            VALUES (?, ?)
-        """, (json.dumps(path), now))
-        self.conn.commit()
-
-    def get_latest_learning_path(self) -> Dict:
-        self.cursor.execute("SELECT * FROM learning_paths ORDER BY id DESC LIMIT 1")
-        row = self.cursor.fetchone()
+        with self._write() as cur:
+            stats = self._load_stats(cur, user_id)
+            recommendations = path.get("recommendations")
+            cur.execute("""
+                INSERT INTO learning_paths (user_id, data, timestamp, skill, message, recommendations)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, json.dumps(path), now, path.get("skill"), path.get("message"),
+                  json.dumps(recommendations if isinstance(recommendations, list) else [])))
+
+            stats["active_learning_paths"] += 1
+            self._save_stats(cur, user_id, stats)
+
+    def get_latest_learning_path(self, user_id: int) -> Dict:
+        with self._read() as cur:
+            cur.execute("SELECT * FROM learning_paths WHERE user_id = ? ORDER BY id DESC LIMIT 1", (user_id,))
+            row = cur.fetchone()
         if row:
             return json.loads(row['data'])
         return {}
     
-    def get_all_learning_paths(self) -> List[Dict]:
-        self.cursor.execute("SELECT * FROM learning_paths ORDER BY id DESC")
-        rows = self.cursor.fetchall()
-        return [{"timestamp": r['timestamp'], "data": json.loads(r['data'])} for r in rows]
+    def get_all_learning_paths(self, user_id: int) -> List[Dict]:
+        """Summaries of the user's learning paths, newest first; get_learning_path has the full path."""
+        with self._read() as cur:
+            cur.execute("""
+                SELECT id, timestamp, skill, message, recommendations FROM learning_paths
+                WHERE user_id = ? ORDER BY id DESC
+            """, (user_id,))
+            rows = cur.fetchall()
+        return [{
+            "id": r['id'],
+            "timestamp": r['timestamp'],
+            "skill": r['skill'],
+            "message": r['message'],
+            "recommendations": json.loads(r['recommendations'])
+        } for r in rows]
+
+    def get_learning_path(self, user_id: int, path_id: int) -> Dict:
+        with self._read() as cur:
+            cur.execute("SELECT id, timestamp, data FROM learning_paths WHERE user_id = ? AND id = ?", (user_id, path_id))
+            row = cur.fetchone()
+        if row:
+            return {"id": row['id'], "timestamp": row['timestamp'], "data": json.loads(row['data'])}
+        return {}
 
     # --- Stats ---
-    def get_dashboard_stats(self):
-        self.cursor.execute("SELECT count(*) FROM jobs")
-        total_jobs = self.cursor.fetchone()[0]
-        
-        self.cursor.execute("SELECT count(*) FROM jobs WHERE status = 'Applied'")
-        jobs_applied = self.cursor.fetchone()[0]
-        
-        self.cursor.execute("SELECT count(*) FROM learning_paths")
-        active_learning_paths = self.cursor.fetchone()[0]
-        
-        latest_resume = self.get_latest_resume_review()
-        resume_score = latest_resume.get("score", 0)
-        
+    def get_dashboard_stats(self, user_id: int, days: int = 7):
+        stats = self._read_stats(user_id)
+
+        activity = [f"Found job: {job['title']}" for job in stats["recent_jobs"]]
+        activity += [f"Resume reviewed: Score {score}" for score in stats["recent_resume_scores"]]
+
         return {
-            "total_jobs": total_jobs,
-            "jobs_applied": jobs_applied,
-            "active_learning_paths": active_learning_paths,
-            "resume_score": resume_score,
-            "recent_activity": self._get_recent_activity(),
-            "application_history": self._get_application_history()
+            "total_jobs": stats["total_jobs"],
+            "jobs_applied": stats["jobs_applied"],
+            "active_learning_paths": stats["active_learning_paths"],
+            "resume_score": stats["resume_score"],
+            "recent_activity": activity,
+            "application_history": self._application_history(self._applications_by_day(user_id, days), days)
         }
 
-    def _get_recent_activity(self):
-        activity = []
-        # Recent jobs
-        self.cursor.execute("SELECT title FROM jobs ORDER BY rowid DESC LIMIT 3")
-        for row in self.cursor.fetchall():
-            activity.append(f"Found job: {row['title']}")
-            
-        # Recent resume
-        self.cursor.execute("SELECT score FROM resume_reviews ORDER BY id DESC LIMIT 2")
-        for row in self.cursor.fetchall():
-            activity.append(f"Resume reviewed: Score {row['score']}")
-            
-        return activity
-
-    def _get_application_history(self):
-        # Get applications grouped by date for the last 7 days
-        history = []
+    @staticmethod
+    def _application_history(by_day: Dict[str, int], days: int = 7):
+        # Applications per day for the last `days` days, oldest first
         today = datetime.date.today()
-        for i in range(6, -1, -1):
-            date = today - datetime.timedelta(days=i)
-            date_str = date.isoformat()
-            
-            # Count jobs applied on this date (using the JSON application_details)
-            # Note: This is a bit complex in SQLite with JSON, so we'll do a simpler approximation or fetch all and filter in python
-            # For production readiness with SQLite JSON, we can use LIKE or just fetch applied jobs
-            
-            count = 0
-            self.cursor.execute("SELECT application_details FROM jobs WHERE status = 'Applied'")
-            rows = self.cursor.fetchall()
-            for row in rows:
-                if row['application_details']:
-                    details = json.loads(row['application_details'])
-                    if details.get('applied_date', '').startswith(date_str):
-                        count += 1
-            
+        start = today - datetime.timedelta(days=days - 1)
+        history = []
+        for i in range(days):
+            date = start + datetime.timedelta(days=i)
             history.append({
-                "name": date.strftime("%a"), # Mon, Tue, etc.
-                "jobs": count
+                "name": date.strftime("%a") if days <= 7 else date.strftime("%b %d"), # Mon, Tue, etc.
+                "date": date.isoformat(),
+                "jobs": by_day.get(date.isoformat(), 0)
             })
         return history
 
-    @property
-    def chat_sessions(self):
-        # Helper to maintain compatibility with some existing code that might iterate sessions
-        # Ideally we should replace usages, but for now we can return a dict of all sessions
-        self.cursor.execute("SELECT * FROM chat_sessions")
-        sessions = {}
-        for row in self.cursor.fetchall():
-            sessions[row['id']] = {
+    def _applications_by_day(self, user_id: int, days: int) -> Dict[str, int]:
+        start = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+        with self._read() as cur:
+            cur.execute("""
+                SELECT day, count FROM daily_stats WHERE user_id = ? AND day >= ? AND kind = ?
+            """, (user_id, start, APPLICATIONS_KIND))
+            return {row['day']: row['count'] for row in cur.fetchall()}
+
+    def _read_stats(self, user_id: int) -> Dict:
+        with self._read() as cur:
+            cur.execute("SELECT * FROM dashboard_stats WHERE user_id = ?", (user_id,))
+            row = cur.fetchone()
+        if row:
+            return self._stats_from_row(row)
+        # First read for a user whose data predates dashboard_stats
+        with self._write() as cur:
+            return self._load_stats(cur, user_id)
+
+    def _load_stats(self, cur, user_id: int) -> Dict:
+        """
+        The user's stats for a write path to update. A user with no row yet gets
+        one computed from scratch, daily counters included, and stored. Write
+        paths load it before changing anything, so it does not already include
+        their own write.
+        """
+        cur.execute("SELECT * FROM dashboard_stats WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        if row:
+            return self._stats_from_row(row)
+        stats = self._compute_stats(cur, user_id)
+        self._save_stats(cur, user_id, stats)
+        self._replace_daily_counts(cur, user_id, self._compute_daily_counts(cur, user_id))
+        return stats
+
+    @staticmethod
+    def _stats_from_row(row) -> Dict:
+        return {
+            "total_jobs": row['total_jobs'],
+            "jobs_applied": row['jobs_applied'],
+            "active_learning_paths": row['active_learning_paths'],
+            "resume_score": row['resume_score'],
+            "recent_jobs": json.loads(row['recent_jobs']),
+            "recent_resume_scores": json.loads(row['recent_resume_scores'])
+        }
+
+    def _save_stats(self, cur, user_id: int, stats: Dict):
+        cur.execute("""
+            INSERT OR REPLACE INTO dashboard_stats (
+                user_id, total_jobs, jobs_applied, active_learning_paths, resume_score, recent_jobs,
+                recent_resume_scores, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, stats["total_jobs"], stats["jobs_applied"], stats["active_learning_paths"],
+              stats["resume_score"], json.dumps(stats["recent_jobs"]), json.dumps(stats["recent_resume_scores"]),
+              datetime.datetime.now().isoformat()))
+
+    @staticmethod
+    def _count_day(cur, user_id: int, day: str, kind: str, delta: int = 1):
+        """Adds delta to one daily counter; counters that reach zero are removed."""
+        cur.execute("""
+            INSERT INTO daily_stats (user_id, day, kind, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, day, kind) DO UPDATE SET count = count + excluded.count
+        """, (user_id, day, kind, delta))
+        if delta < 0:
+            cur.execute("DELETE FROM daily_stats WHERE user_id = ? AND day = ? AND kind = ? AND count <= 0",
+                        (user_id, day, kind))
+
+    @staticmethod
+    def _stored_daily_counts(cur, user_id: int) -> Dict[Tuple[str, str], int]:
+        start = (datetime.date.today() - datetime.timedelta(days=STATS_HISTORY_DAYS - 1)).isoformat()
+        cur.execute("SELECT day, kind, count FROM daily_stats WHERE user_id = ? AND day >= ?", (user_id, start))
+        return {(row['day'], row['kind']): row['count'] for row in cur.fetchall()}
+
+    @staticmethod
+    def _replace_daily_counts(cur, user_id: int, counts: Dict[Tuple[str, str], int]):
+        cur.execute("DELETE FROM daily_stats WHERE user_id = ?", (user_id,))
+        cur.executemany("INSERT INTO daily_stats (user_id, day, kind, count) VALUES (?, ?, ?, ?)",
+                        [(user_id, day, kind, count) for (day, kind), count in counts.items()])
+
+    @staticmethod
+    def _recent_jobs(cur, user_id: int) -> List[Dict]:
+        cur.execute("""
+            SELECT id, title FROM jobs WHERE user_id = ? ORDER BY rowid DESC LIMIT ?
+        """, (user_id, RECENT_JOBS))
+        return [{"id": row['id'], "title": row['title']} for row in cur.fetchall()]
+
+    def _compute_stats(self, cur, user_id: int) -> Dict:
+        """Dashboard stats aggregated from the underlying tables."""
+        cur.execute("SELECT count(*) FROM jobs WHERE user_id = ?", (user_id,))
+        total_jobs = cur.fetchone()[0]
+
+        cur.execute("SELECT count(*) FROM jobs WHERE user_id = ? AND status = 'Applied'", (user_id,))
+        jobs_applied = cur.fetchone()[0]
+
+        cur.execute("SELECT count(*) FROM learning_paths WHERE user_id = ?", (user_id,))
+        active_learning_paths = cur.fetchone()[0]
+
+        cur.execute("SELECT score FROM resume_reviews WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                    (user_id, RECENT_RESUME_SCORES))
+        resume_scores = [row['score'] for row in cur.fetchall()]
+
+        return {
+            "total_jobs": total_jobs,
+            "jobs_applied": jobs_applied,
+            "active_learning_paths": active_learning_paths,
+            "resume_score": resume_scores[0] if resume_scores else 0,
+            "recent_jobs": self._recent_jobs(cur, user_id),
+            "recent_resume_scores": resume_scores
+        }
+
+    @staticmethod
+    def _compute_daily_counts(cur, user_id: int) -> Dict[Tuple[str, str], int]:
+        """daily_stats counters for the last STATS_HISTORY_DAYS days, aggregated from the underlying tables."""
+        start = (datetime.date.today() - datetime.timedelta(days=STATS_HISTORY_DAYS - 1)).isoformat()
+        cur.execute("""
+            SELECT substr(applied_date, 1, 10) AS day, ? AS kind, count(*) AS count
+            FROM jobs
+            WHERE user_id = ? AND applied_date >= ?
+            GROUP BY day
+            UNION ALL
+            SELECT substr(timestamp, 1, 10) AS day, ? || activity_type AS kind, count(*) AS count
+            FROM user_activity
+            WHERE user_id = ? AND timestamp >= ?
+            GROUP BY day, activity_type
+        """, (APPLICATIONS_KIND, user_id, start, ACTIVITY_KIND_PREFIX, user_id, start))
+        return {(row['day'], row['kind']): row['count'] for row in cur.fetchall()}
+
+    def rebuild_dashboard_stats(self, user_id: int = None) -> List[int]:
+        """
+        Recomputes dashboard stats and daily counters from the underlying
+        tables, for one user or all of them, dropping counters older than
+        STATS_HISTORY_DAYS. Returns the ids of users whose stored stats were wrong.
+        """
+        if user_id is None:
+            with self._read() as cur:
+                cur.execute("SELECT id FROM users ORDER BY id")
+                user_ids = [row['id'] for row in cur.fetchall()]
+        else:
+            user_ids = [user_id]
+
+        drifted = []
+        for uid in user_ids:
+            # One transaction per user, so writers are never held up for long
+            with self._write() as cur:
+                cur.execute("SELECT * FROM dashboard_stats WHERE user_id = ?", (uid,))
+                row = cur.fetchone()
+                stats = self._compute_stats(cur, uid)
+                counts = self._compute_daily_counts(cur, uid)
+                if row and (self._stats_from_row(row) != stats or self._stored_daily_counts(cur, uid) != counts):
+                    drifted.append(uid)
+                self._save_stats(cur, uid, stats)
+                self._replace_daily_counts(cur, uid, counts)
+        return drifted
+
+    def get_chat_sessions(self, user_id: int) -> Dict[str, Dict]:
+        """
+        Summaries of the user's sessions by session id, most recently updated
+        first. get_session has the messages.
+        """
+        with self._read() as cur:
+            cur.execute("""
+                SELECT id, title, message_count, last_message_preview, created_at, updated_at
+                FROM chat_sessions WHERE user_id = ? ORDER BY updated_at DESC
+            """, (user_id,))
+            return {row['id']: {
                 "id": row['id'],
                 "title": row['title'],
-                "messages": json.loads(row['messages']),
+                "message_count": row['message_count'],
+                "last_message_preview": row['last_message_preview'],
                 "created_at": row['created_at'],
                 "updated_at": row['updated_at']
-            }
-        return sessions
+            } for row in cur.fetchall()}
 
     # --- Skill Tests ---
-    def create_skill_test(self, skill_name: str, difficulty: str, questions: List[Dict], job_ids: List[str] = None) -> str:
-        test_id = str(uuid.uuid4())[:8]
+    def create_skill_test(self, user_id: int, skill_name: str, difficulty: str, questions: List[Dict],
+                          job_ids: List[str] = None) -> str:
+        test_id = str(uuid.uuid4())
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            INSERT INTO skill_tests (id, skill_name, difficulty, questions, created_at, job_related_ids)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (test_id, skill_name, difficulty, json.dumps(questions), now, json.dumps(job_ids or [])))
-        self.conn.commit()
+        with self._write() as cur:
+            cur.execute("""
+                INSERT INTO skill_tests (id, user_id, skill_name, difficulty, questions, question_count, created_at,
+                                         job_related_ids)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (test_id, user_id, skill_name, difficulty, json.dumps(questions), len(questions), now,
+                  json.dumps(job_ids or [])))
         return test_id
 
-    def get_skill_test(self, test_id: str) -> Dict:
-        self.cursor.execute("SELECT * FROM skill_tests WHERE id = ?", (test_id,))
-        row = self.cursor.fetchone()
+    def get_skill_test(self, user_id: int, test_id: str) -> Dict:
+        with self._read() as cur:
+            cur.execute("SELECT * FROM skill_tests WHERE user_id = ? AND id = ?", (user_id, test_id))
+            row = cur.fetchone()
         if row:
             return {
                 "id": row['id'],
@@ -558,38 +1644,45 @@ class Database:
             }
         return {}
 
-    def get_all_skill_tests(self) -> List[Dict]:
-        self.cursor.execute("SELECT * FROM skill_tests ORDER BY created_at DESC")
-        tests = []
-        for row in self.cursor.fetchall():
-            tests.append({
+    def get_all_skill_tests(self, user_id: int) -> List[Dict]:
+        with self._read() as cur:
+            cur.execute("""
+                SELECT id, skill_name, difficulty, question_count, created_at FROM skill_tests
+                WHERE user_id = ? ORDER BY created_at DESC
+            """, (user_id,))
+            return [{
                 "id": row['id'],
                 "skill_name": row['skill_name'],
                 "difficulty": row['difficulty'],
-                "question_count": len(json.loads(row['questions'])),
+                "question_count": row['question_count'],
                 "created_at": row['created_at']
-            })
-        return tests
+            } for row in cur.fetchall()]
 
-    def save_test_result(self, test_id: str, score: int, total: int, answers: Dict, feedback: List, time_taken: int):
+    def save_test_result(self, user_id: int, test_id: str, score: int, total: int, answers: Dict, feedback: List,
+                         time_taken: int):
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            INSERT INTO test_results (test_id, score, total_questions, answers, feedback, taken_at, time_taken_seconds)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (test_id, score, total, json.dumps(answers), json.dumps(feedback), now, time_taken))
-        self.conn.commit()
-        
-        # Log activity
-        self.log_activity("test_taken", {"test_id": test_id, "score": score, "total": total})
+        with self._write() as cur:
+            cur.execute("""
+                INSERT INTO test_results (user_id, test_id, score, total_questions, answers, feedback, taken_at,
+                                          time_taken_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (user_id, test_id, score, total, json.dumps(answers), json.dumps(feedback), now, time_taken))
+            
+            # Log activity
+            self.log_activity(user_id, "test_taken", {"test_id": test_id, "score": score, "total": total})
 
-    def get_test_results(self, test_id: str = None) -> List[Dict]:
-        if test_id:
-            self.cursor.execute("SELECT * FROM test_results WHERE test_id = ? ORDER BY taken_at DESC", (test_id,))
-        else:
-            self.cursor.execute("SELECT * FROM test_results ORDER BY taken_at DESC")
+    def get_test_results(self, user_id: int, test_id: str = None) -> List[Dict]:
+        with self._read() as cur:
+            if test_id:
+                cur.execute("""
+                    SELECT * FROM test_results WHERE user_id = ? AND test_id = ? ORDER BY taken_at DESC
+                """, (user_id, test_id))
+            else:
+                cur.execute("SELECT * FROM test_results WHERE user_id = ? ORDER BY taken_at DESC", (user_id,))
+            rows = cur.fetchall()
         
         results = []
-        for row in self.cursor.fetchall():
+        for row in rows:
             results.append({
                 "id": row['id'],
                 "test_id": row['test_id'],
@@ -604,21 +1697,25 @@ class Database:
         return results
 
     # --- Activity Tracking ---
-    def log_activity(self, activity_type: str, activity_data: Dict):
+    def log_activity(self, user_id: int, activity_type: str, activity_data: Dict):
         now = datetime.datetime.now().isoformat()
-        self.cursor.execute("""
-            INSERT INTO user_activity (activity_type, activity_data, timestamp)
-            VALUES (?, ?, ?)
-        """, (activity_type, json.dumps(activity_data), now))
-        self.conn.commit()
-
-    def get_recent_activities(self, limit: int = 10) -> List[Dict]:
-        self.cursor.execute("""
-            SELECT * FROM user_activity ORDER BY timestamp DESC LIMIT ?
-        """, (limit,))
+        with self._write() as cur:
+            self._load_stats(cur, user_id)
+            cur.execute("""
+                INSERT INTO user_activity (user_id, activity_type, activity_data, timestamp)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, activity_type, json.dumps(activity_data), now))
+            self._count_day(cur, user_id, now[:10], ACTIVITY_KIND_PREFIX + activity_type)
+
+    def get_recent_activities(self, user_id: int, limit: int = 10) -> List[Dict]:
+        with self._read() as cur:
+            cur.execute("""
+                SELECT * FROM user_activity WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?
+            """, (user_id, limit))
+            rows = cur.fetchall()
         
         activities = []
-        for row in self.cursor.fetchall():
+        for row in rows:
             activities.append({
                 "type": row['activity_type'],
                 "data": json.loads(row['activity_data']),
@@ -626,21 +1723,243 @@ class Database:
             })
         return activities
 
-    def get_activity_stats(self, days: int = 7) -> Dict:
-        cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat()
-        
-        stats = {}
-        self.cursor.execute("""
-            SELECT activity_type, COUNT(*) as count 
-            FROM user_activity 
-            WHERE timestamp >= ? 
-            GROUP BY activity_type
-        """, (cutoff,))
-        
-        for row in self.cursor.fetchall():
-            stats[row['activity_type']] = row['count']
-        
-        return stats
+    def get_activity_stats(self, user_id: int, days: int = 7) -> Dict:
+        """Activities per type over the last `days` calendar days, today included."""
+        start = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+        self._read_stats(user_id)  # fills in the counters of a user whose data predates them
+        with self._read() as cur:
+            cur.execute("""
+                SELECT substr(kind, ?) AS activity_type, sum(count) AS count FROM daily_stats
+                WHERE user_id = ? AND day >= ? AND kind LIKE ?
+                GROUP BY kind
+            """, (len(ACTIVITY_KIND_PREFIX) + 1, user_id, start, ACTIVITY_KIND_PREFIX + "%"))
+            return {row['activity_type']: row['count'] for row in cur.fetchall()}
+
+    # --- Background Tasks ---
+    def enqueue_task(self, user_id: int, kind: str, payload: Dict, max_attempts: int) -> str:
+        task_id = str(uuid.uuid4())
+        now = datetime.datetime.now().isoformat()
+        with self._write() as cur:
+            cur.execute("""
+                INSERT INTO tasks (id, user_id, kind, payload, status, attempts, max_attempts, run_after,
+                                   created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?, ?)
+            """, (task_id, user_id, kind, json.dumps(payload), max_attempts, time.time(), now, now))
+        return task_id
+
+    def claim_task(self, kinds: List[str], owner: str, lease_seconds: float) -> Optional[Dict]:
+        """
+        Marks the oldest due queued task of one of `kinds` as running under
+        `owner`, leased for lease_seconds, and returns it; None if there is none.
+        """
+        if not kinds:
+            return None
+        now = time.time()
+        with self._write() as cur:
+            cur.execute(f"""
+                SELECT * FROM tasks
+                WHERE status = 'queued' AND run_after <= ? AND kind IN ({",".join("?" * len(kinds))})
+                ORDER BY run_after LIMIT 1
+            """, [now] + list(kinds))
+            row = cur.fetchone()
+            if not row:
+                return None
+            cur.execute("""
+                UPDATE tasks SET status = 'running', attempts = attempts + 1, claimed_by = ?, lease_expires_at = ?,
+                                 updated_at = ?
+                WHERE id = ?
+            """, (owner, now + lease_seconds, datetime.datetime.now().isoformat(), row['id']))
+        task = self._task_from_row(row)
+        task["status"] = "running"
+        task["attempts"] += 1
+        return task
+
+    def renew_task_lease(self, task_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extends the lease of a task `owner` is still running. False if it no longer holds it."""
+        with self._write() as cur:
+            cur.execute("""
+                UPDATE tasks SET lease_expires_at = ?
+                WHERE id = ? AND status = 'running' AND claimed_by = ?
+            """, (time.time() + lease_seconds, task_id, owner))
+            return cur.rowcount > 0
+
+    def finish_task(self, task_id: str, owner: str, result: Any):
+        with self._write() as cur:
+            cur.execute("""
+                UPDATE tasks SET status = 'done', result = ?, error = NULL, claimed_by = NULL, lease_expires_at = NULL,
+                                 updated_at = ?
+                WHERE id = ? AND claimed_by = ?
+            """, (json.dumps(result), datetime.datetime.now().isoformat(), task_id, owner))
+
+    def fail_task(self, task_id: str, owner: str, error: str, retry_delay: float) -> str:
+        """Queues the task again after retry_delay seconds, or fails it for good once out of attempts."""
+        with self._write() as cur:
+            cur.execute("""
+                UPDATE tasks SET
+                    status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                    run_after = ?, error = ?, claimed_by = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND claimed_by = ?
+            """, (time.time() + retry_delay, error, datetime.datetime.now().isoformat(), task_id, owner))
+            cur.execute("SELECT status FROM tasks WHERE id = ?", (task_id,))
+            row = cur.fetchone()
+        return row['status'] if row else None
+
+    def requeue_running_tasks(self, owner: str = None) -> int:
+        """
+        Puts running tasks back on the queue: those held by `owner` (a worker
+        shutting down), or else every task whose lease has expired because the
+        process running it died. Tasks leased by live workers are left alone.
+        """
+        now = time.time()
+        with self._write() as cur:
+            if owner:
+                where, params = "claimed_by = ?", (owner,)
+            else:
+                where, params = "(lease_expires_at IS NULL OR lease_expires_at <= ?)", (now,)
+            cur.execute(f"""
+                UPDATE tasks SET status = 'queued', run_after = ?, claimed_by = NULL, lease_expires_at = NULL,
+                                 updated_at = ?
+                WHERE status = 'running' AND {where}
+            """, (now, datetime.datetime.now().isoformat()) + params)
+            return cur.rowcount
+
+    def get_task(self, user_id: int, task_id: str) -> Optional[Dict]:
+        with self._read() as cur:
+            cur.execute("SELECT * FROM tasks WHERE id = ? AND user_id = ?", (task_id, user_id))
+            row = cur.fetchone()
+        return self._task_from_row(row) if row else None
+
+    @staticmethod
+    def _task_from_row(row) -> Dict:
+        return {
+            "id": row['id'],
+            "user_id": row['user_id'],
+            "kind": row['kind'],
+            "payload": json.loads(row['payload']),
+            "status": row['status'],
+            "attempts": row['attempts'],
+            "max_attempts": row['max_attempts'],
+            "result": json.loads(row['result']) if row['result'] else None,
+            "error": row['error'],
+            "created_at": row['created_at'],
+            "updated_at": row['updated_at']
+        }
+
+    # --- Query Plans ---
+    def _hot_queries(self, user_id: int) -> List[tuple]:
+        """
+        (label, sql, params) for the queries behind request paths and the task
+        worker. Job listing and search come from the builders the request
+        paths use; the rest are copies, so keep them in step with their methods.
+        """
+        queries = [
+            ("user by API key", "SELECT id FROM users WHERE api_key_hash = ?", ("",)),
+            ("active session", """
+                SELECT chat_sessions.id, chat_sessions.title, chat_sessions.created_at, chat_sessions.updated_at
+                FROM users JOIN chat_sessions ON chat_sessions.id = users.active_session_id
+                WHERE users.id = ? AND chat_sessions.user_id = users.id
+            """, (user_id,)),
+            ("latest session", "SELECT id FROM chat_sessions WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1",
+             (user_id,)),
+            ("session list", """
+                SELECT id, title, message_count, last_message_preview, created_at, updated_at
+                FROM chat_sessions WHERE user_id = ? ORDER BY updated_at DESC
+            """, (user_id,)),
+            ("session", "SELECT id, title, created_at, updated_at FROM chat_sessions WHERE user_id = ? AND id = ?",
+             (user_id, "")),
+            ("recent messages", """
+                SELECT role, content, agent_name, timestamp FROM chat_messages
+                WHERE user_id = ? AND session_id = ? ORDER BY id DESC LIMIT ?
+            """, (user_id, "", 10)),
+            ("session messages", """
+                SELECT role, content, agent_name, timestamp FROM chat_messages
+                WHERE user_id = ? AND session_id = ? ORDER BY id
+            """, (user_id, "")),
+            ("profile", "SELECT * FROM user_profile WHERE user_id = ?", (user_id,)),
+            ("job", "SELECT status, applied_date FROM jobs WHERE user_id = ? AND id = ?", (user_id, "")),
+            ("newest jobs", "SELECT id, title FROM jobs WHERE user_id = ? ORDER BY rowid DESC LIMIT ?",
+             (user_id, RECENT_JOBS)),
+            ("latest resume review", "SELECT * FROM resume_reviews WHERE user_id = ? ORDER BY id DESC LIMIT 1",
+             (user_id,)),
+            ("resume review by hash", """
+                SELECT score, feedback FROM resume_reviews WHERE user_id = ? AND content_hash = ?
+                ORDER BY id DESC LIMIT 1
+            """, (user_id, "")),
+            ("latest learning path", "SELECT * FROM learning_paths WHERE user_id = ? ORDER BY id DESC LIMIT 1",
+             (user_id,)),
+            ("learning path list", """
+                SELECT id, timestamp, skill, message, recommendations FROM learning_paths
+                WHERE user_id = ? ORDER BY id DESC
+            """, (user_id,)),
+            ("learning path", "SELECT id, timestamp, data FROM learning_paths WHERE user_id = ? AND id = ?",
+             (user_id, 0)),
+            ("dashboard stats", "SELECT * FROM dashboard_stats WHERE user_id = ?", (user_id,)),
+            ("applications by day", """
+                SELECT day, count FROM daily_stats WHERE user_id = ? AND day >= ? AND kind = ?
+            """, (user_id, "", APPLICATIONS_KIND)),
+            ("activity by type", """
+                SELECT substr(kind, ?) AS activity_type, sum(count) AS count FROM daily_stats
+                WHERE user_id = ? AND day >= ? AND kind LIKE ?
+                GROUP BY kind
+            """, (0, user_id, "", "")),
+            ("skill test list", """
+                SELECT id, skill_name, difficulty, question_count, created_at FROM skill_tests
+                WHERE user_id = ? ORDER BY created_at DESC
+            """, (user_id,)),
+            ("skill test", "SELECT * FROM skill_tests WHERE user_id = ? AND id = ?", (user_id, "")),
+            ("test results", "SELECT * FROM test_results WHERE user_id = ? ORDER BY taken_at DESC", (user_id,)),
+            ("test results for a test", """
+                SELECT * FROM test_results WHERE user_id = ? AND test_id = ? ORDER BY taken_at DESC
+            """, (user_id, "")),
+            ("recent activity", "SELECT * FROM user_activity WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
+             (user_id, 10)),
+            ("near-duplicate candidates", """
+                SELECT job_id, signature FROM job_signatures
+                WHERE job_id IN (SELECT job_id FROM job_signature_bands WHERE band_key IN (?, ?))
+            """, ("", "")),
+            ("claim task", """
+                SELECT * FROM tasks
+                WHERE status = 'queued' AND run_after <= ? AND kind IN (?, ?)
+                ORDER BY run_after LIMIT 1
+            """, (0, "", "")),
+            ("task", "SELECT * FROM tasks WHERE id = ? AND user_id = ?", ("", user_id)),
+        ]
+
+        filters = [{}, {"status": "Saved"}, {"company": "Acme"}, {"location": "Remote"}, {"requirement": "Python"}]
+        for sort, (column, _) in self.JOB_SORTS.items():
+            cursor = base64.urlsafe_b64encode(json.dumps(["" if column else None, 1]).encode()).decode()
+            for job_filter in filters:
+                for page_cursor in (None, cursor):
+                    sql, params, _ = self._jobs_page_query(user_id, sort=sort, cursor=page_cursor, **job_filter)
+                    label = ", ".join([f"sort={sort}"] + [f"{k}=..." for k in job_filter]
+                                      + (["next page"] if page_cursor else []))
+                    queries.append((f"jobs page ({label})", sql, params))
+
+        for location in (None, "Pune"):
+            for include_catalogue in (False, True):
+                sql, params = self._search_query(user_id, "python developer", location, 20, include_catalogue)
+                queries.append((f"job search (location={location}, catalogue={include_catalogue})", sql, params))
+        return queries
+
+    def check_query_plans(self, user_id: int = DEFAULT_USER_ID) -> List[Dict]:
+        """
+        EXPLAIN QUERY PLAN for every hot query. `full_scans` lists the plan
+        steps that read a whole table or index; any at all means a query is
+        missing an index.
+        """
+        results = []
+        with self._read() as cur:
+            cur.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL TABLE%'")
+            tables = {row['name'] for row in cur.fetchall()}
+            for label, sql, params in self._hot_queries(user_id):
+                cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = [row['detail'] for row in cur.fetchall()]
+                results.append({
+                    "query": label,
+                    "plan": plan,
+                    "full_scans": [step for step in plan if _scanned_table(step) in tables]
+                })
+        return results
 
 
 db = Database()
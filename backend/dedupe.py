@@ -0,0 +1,76 @@
+import hashlib
+import os
+import random
+import re
+from typing import List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Postings whose estimated Jaccard similarity reaches this are treated as the same job
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
+NUM_PERMUTATIONS = 64
+BANDS = 16  # LSH bands of NUM_PERMUTATIONS // BANDS rows each
+SHINGLE_SIZE = 3
+
+_MASK = (1 << 64) - 1
+# Fixed seed: signatures are stored, so they must be comparable across restarts
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERMUTATIONS)]
+
+TRACKING_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "ref", "refid", "trk", "src"}
+
+def normalize_link(link: str) -> str:
+    """Lowercases scheme and host, drops the fragment, tracking parameters and trailing slash."""
+    parts = urlsplit((link or "").strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k.lower() not in TRACKING_PARAMS]
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/"), urlencode(sorted(query)), ""))
+
+def _normalize_text(text: str) -> str:
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+def job_id_for(link: str, title: str) -> str:
+    """Deterministic id for a web result, so the same posting always maps to the same row."""
+    key = f"{normalize_link(link)}\n{_normalize_text(title)}"
+    return "web-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+def _shingles(text: str) -> set:
+    words = _normalize_text(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash(text: str) -> List[int]:
+    """MinHash signature over word shingles of text; empty text gives an empty signature."""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in _shingles(text)]
+    if not hashes:
+        return []
+    return [min(((a * h + b) & _MASK) >> 32 for h in hashes) for a, b in _PERMUTATIONS]
+
+def posting_signature(title: str, company: str, description: str) -> List[int]:
+    return minhash(f"{title} {company} {description}")
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def band_keys(signature: List[int]) -> List[str]:
+    """LSH band keys: two signatures sharing any key are near-duplicate candidates."""
+    rows = len(signature) // BANDS
+    return [
+        f"{band}:" + hashlib.sha1(",".join(map(str, signature[band * rows:(band + 1) * rows])).encode()).hexdigest()[:16]
+        for band in range(BANDS)
+    ] if rows else []
+
+def collapse_near_duplicates(signatures: List[List[int]], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[int]:
+    """Indexes of the signatures to keep: the first of every group of near-duplicates."""
+    kept = []
+    for i, signature in enumerate(signatures):
+        if not any(similarity(signature, signatures[k]) >= threshold for k in kept):
+            kept.append(i)
+    return kept
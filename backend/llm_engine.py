@@ -1,6 +1,15 @@
 import os
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from dotenv import load_dotenv
+from cache import LRUCache
+from metrics import LLM_DURATION, LLM_TOKENS
 import sys
 
 load_dotenv()
@@ -14,6 +23,154 @@ genai.configure(api_key=api_key)
 # Using the latest 2.0 Flash model
 model = genai.GenerativeModel('gemini-2.0-flash')
 
+# Async client settings: how many Gemini calls may be in flight at once per
+# worker, and how long a single call may take before we give up on it.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+
+JSON_INSTRUCTION = "\n\nReturn ONLY a valid JSON object. Do not include markdown formatting like ```json."
+
+# Response cache: prompts are deterministic f-strings, so identical prompts for
+# the same model can reuse an earlier answer. Only calls that pass a
+# cache_family are cached; routing and chat replies depend on history and are not.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+
+DAY = 24 * 60 * 60
+CACHE_TTLS = {
+    "job_params": 1 * DAY,
+    "learning_path": 7 * DAY,
+    "skill_test": 7 * DAY,
+    "mock_test": 7 * DAY,
+    "skill_gap": 1 * DAY,
+    "resume_review": 7 * DAY,
+}
+
+_semaphore = None
+_semaphore_loop = None
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # A semaphore is bound to the loop it is first used on, so recreate it if
+    # the app (or a script calling asyncio.run repeatedly) switches loops.
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _semaphore_loop = loop
+    return _semaphore
+
+def _clean_json_text(text: str) -> str:
+    text = text.strip()
+    # Cleanup if model adds markdown
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+class ResponseCache:
+    """
+    Two-tier LLM response cache: an in-memory LRU in front of a SQLite table.
+    Entries are keyed on the model name plus a whitespace-normalized prompt hash.
+    The SQLite tier blocks, so get and set run it on a dedicated thread.
+    """
+    def __init__(self, path: str, maxsize: int):
+        self.memory = LRUCache(maxsize)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "families": {}}
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()  # guards conn
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                family TEXT,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                expires_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache (expires_at)")
+        self.conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{model_name}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _count(self, family: str, outcome: str):
+        with self._stats_lock:
+            self.stats[outcome] += 1
+            if outcome == "stores":
+                return
+            family_stats = self.stats["families"].setdefault(family, {"hits": 0, "misses": 0})
+            family_stats["misses" if outcome == "misses" else "hits"] += 1
+
+    def get_stats(self) -> dict:
+        """A consistent copy of the counters."""
+        with self._stats_lock:
+            families = {family: dict(counts) for family, counts in self.stats["families"].items()}
+            return {**self.stats, "families": families}
+
+    def _disk_get(self, key: str):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+
+    def _disk_set(self, key: str, family: str, model_name: str, response: str, now: float, ttl: float):
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO llm_cache (key, family, model, response, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, family, model_name, response, now, now + ttl))
+            self.conn.commit()
+
+    async def get(self, key: str, family: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(family, "memory_hits")
+            return value
+
+        loop = asyncio.get_running_loop()
+        row = await loop.run_in_executor(self._executor, self._disk_get, key)
+        if row:
+            # Promote to memory for the rest of its lifetime
+            self.memory.set(key, row[0], row[1] - time.time())
+            self._count(family, "disk_hits")
+            return row[0]
+
+        self._count(family, "misses")
+        return None
+
+    async def set(self, key: str, family: str, model_name: str, response: str):
+        ttl = CACHE_TTLS.get(family, DAY)
+        self.memory.set(key, response, ttl)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._disk_set, key, family, model_name, response, time.time(), ttl)
+        self._count(family, "stores")
+
+response_cache = ResponseCache(LLM_CACHE_PATH, LLM_CACHE_SIZE) if LLM_CACHE_ENABLED else None
+
+def get_cache_stats() -> dict:
+    if not response_cache:
+        return {"enabled": False}
+    stats = response_cache.get_stats()
+    total = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+    hits = total - stats["misses"]
+    return {
+        "enabled": True,
+        **stats,
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+        "memory_entries": len(response_cache.memory)
+    }
+
 def generate_response(prompt: str) -> str:
     try:
         print(f"Generating response for prompt: {prompt[:50]}...", file=sys.stderr)
@@ -27,19 +184,130 @@ def generate_json_response(prompt: str) -> str:
     """
     Forces the model to return JSON.
     """
-    json_prompt = f"{prompt}\n\nReturn ONLY a valid JSON object. Do not include markdown formatting like ```json."
+    json_prompt = f"{prompt}{JSON_INSTRUCTION}"
     try:
         print(f"Generating JSON for prompt: {prompt[:50]}...", file=sys.stderr)
         response = model.generate_content(json_prompt)
-        text = response.text.strip()
-        # Cleanup if model adds markdown
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        return text.strip()
+        return _clean_json_text(response.text)
+    except Exception as e:
+        print(f"Error generating JSON: {str(e)}", file=sys.stderr)
+        return "{}"
+
+def _is_valid_json(text: str) -> bool:
+    try:
+        json.loads(_clean_json_text(text))
+        return True
+    except ValueError:
+        return False
+
+def _record_tokens(family: str, response, prompt: str, text: str):
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) if usage else 0
+    response_tokens = getattr(usage, "candidates_token_count", 0) if usage else 0
+    # Without usage metadata, estimate roughly four characters per token
+    LLM_TOKENS.inc(prompt_tokens or (len(prompt) + 3) // 4, family=family, direction="prompt")
+    LLM_TOKENS.inc(response_tokens or (len(text) + 3) // 4, family=family, direction="response")
+
+async def _generate_async(prompt: str, timeout: float = None, cache_family: str = None, validate=None) -> str:
+    """
+    Awaits the shared model without blocking the event loop, bounded by the
+    per-worker concurrency limit and a per-call timeout. When a cache_family
+    is given, the response cache is consulted first and filled on success
+    (only with responses that pass validate, if provided).
+    """
+    family = cache_family or "default"
+    start = time.perf_counter()
+    cache_key = None
+    if response_cache and cache_family:
+        model_name = getattr(model, "model_name", "unknown")
+        cache_key = ResponseCache.make_key(model_name, prompt)
+        cached = await response_cache.get(cache_key, cache_family)
+        if cached is not None:
+            LLM_DURATION.observe(time.perf_counter() - start, family=family, outcome="cache_hit")
+            return cached
+
+    outcome = "error"
+    try:
+        async with _get_semaphore():
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt),
+                timeout=timeout or LLM_TIMEOUT_SECONDS
+            )
+        text = response.text
+        outcome = "ok"
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    finally:
+        LLM_DURATION.observe(time.perf_counter() - start, family=family, outcome=outcome)
+    _record_tokens(family, response, prompt, text)
+
+    if cache_key and (validate is None or validate(text)):
+        await response_cache.set(cache_key, cache_family, model_name, text)
+    return text
+
+async def generate_response_async(prompt: str, timeout: float = None, cache_family: str = None) -> str:
+    try:
+        print(f"Generating response for prompt: {prompt[:50]}...", file=sys.stderr)
+        return await _generate_async(prompt, timeout, cache_family)
+    except asyncio.TimeoutError:
+        print(f"Timed out generating response for prompt: {prompt[:50]}...", file=sys.stderr)
+        return "Error generating response: request timed out"
+    except Exception as e:
+        print(f"Error generating response: {str(e)}", file=sys.stderr)
+        return f"Error generating response: {str(e)}"
+
+async def generate_json_response_async(prompt: str, timeout: float = None, cache_family: str = None) -> str:
+    """
+    Async version of generate_json_response.
+    """
+    try:
+        print(f"Generating JSON for prompt: {prompt[:50]}...", file=sys.stderr)
+        text = await _generate_async(f"{prompt}{JSON_INSTRUCTION}", timeout, cache_family, _is_valid_json)
+        return _clean_json_text(text)
+    except asyncio.TimeoutError:
+        print(f"Timed out generating JSON for prompt: {prompt[:50]}...", file=sys.stderr)
+        return "{}"
     except Exception as e:
         print(f"Error generating JSON: {str(e)}", file=sys.stderr)
         return "{}"
+
+async def stream_response_async(prompt: str, timeout: float = None):
+    """
+    Yields the response text chunk by chunk as Gemini streams it. The timeout
+    applies to the first chunk and to each gap between chunks.
+    """
+    timeout = timeout or LLM_TIMEOUT_SECONDS
+    produced = False
+    start = time.perf_counter()
+    # Stays "cancelled" if the consumer stops iterating early
+    outcome = "cancelled"
+    try:
+        print(f"Streaming response for prompt: {prompt[:50]}...", file=sys.stderr)
+        async with _get_semaphore():
+            response = await asyncio.wait_for(model.generate_content_async(prompt, stream=True), timeout=timeout)
+            chunks = response.__aiter__()
+            text = ""
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    produced = True
+                    text += chunk.text
+                    yield chunk.text
+        outcome = "ok"
+        _record_tokens("stream", response, prompt, text)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        print(f"Timed out streaming response for prompt: {prompt[:50]}...", file=sys.stderr)
+        if not produced:
+            yield "Error generating response: request timed out"
+    except Exception as e:
+        outcome = "error"
+        print(f"Error streaming response: {str(e)}", file=sys.stderr)
+        if not produced:
+            yield f"Error generating response: {str(e)}"
+    finally:
+        LLM_DURATION.observe(time.perf_counter() - start, family="stream", outcome=outcome)
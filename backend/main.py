@@ -1,12 +1,15 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Response, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from agents.orchestrator import OrchestratorAgent
 from agents.resume_reviewer import ResumeReviewerAgent
+from task_queue import task_queue
+from metrics import loop_monitor, render as render_metrics
 from typing import List, Optional, Dict
-import pypdf
-import io
 import os
+import json
 
 app = FastAPI(title="Multi-Agent Job Assistant")
 
@@ -23,11 +26,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 orchestrator = OrchestratorAgent()
 resume_agent = ResumeReviewerAgent()
 
+@app.on_event("startup")
+async def start_background_work():
+    await task_queue.start()
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_background_work():
+    await task_queue.stop()
+    await loop_monitor.stop()
+
 # Root endpoint for health check
 @app.get("/")
 async def root():
@@ -40,6 +54,8 @@ async def root():
 class ChatRequest(BaseModel):
     message: str
     context: Optional[dict] = {}
+    # Session to add the turn to; the user's active session if omitted
+    session_id: Optional[str] = None
 
 class ProfileUpdate(BaseModel):
     name: str
@@ -51,62 +67,148 @@ class ProfileUpdate(BaseModel):
     skills: List[str]
     preferences: Dict
 
-from database import db
+from database import db, DEFAULT_USER_ID
+from llm_engine import get_cache_stats
+from agents.job_search import get_search_cache_stats
+from resume_parser import RESUME_MAX_BYTES, content_hash, extract_text
+from models import ResumeReview
+
+# Without REQUIRE_AUTH, requests that carry no API key act as the default user
+REQUIRE_AUTH = os.getenv("REQUIRE_AUTH", "false").lower() == "true"
+
+def current_user(authorization: Optional[str] = Header(None)) -> int:
+    """Id of the user whose API key is in the `Authorization: Bearer <key>` header"""
+    if authorization:
+        scheme, _, api_key = authorization.partition(" ")
+        user_id = db.get_user_id_for_key(api_key.strip()) if scheme.lower() == "bearer" else None
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Invalid API key", headers={"WWW-Authenticate": "Bearer"})
+        return user_id
+    if REQUIRE_AUTH:
+        raise HTTPException(status_code=401, detail="API key required", headers={"WWW-Authenticate": "Bearer"})
+    return DEFAULT_USER_ID
+
+# The database is synchronous: handlers that only touch it are plain `def`, which
+# FastAPI runs in its threadpool. Async handlers, the agents they await and the
+# task queue hand their DB calls to run_in_threadpool, so a slow query or a held
+# write lock blocks one thread rather than the event loop.
+
+def check_session(user_id: int, session_id: Optional[str]):
+    if session_id and db.get_session(user_id, session_id, message_limit=0) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
 
 @app.post("/api/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, user_id: int = Depends(current_user)):
+    await run_in_threadpool(check_session, user_id, request.session_id)
     try:
-        result = orchestrator.process_message(request.message, request.context)
+        result = await orchestrator.process_message(user_id, request.message, request.context, request.session_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, user_id: int = Depends(current_user)):
+    """Server-Sent Events version of /api/chat: routing, jobs, reply tokens, then done"""
+    await run_in_threadpool(check_session, user_id, request.session_id)
+
+    async def event_stream():
+        try:
+            async for event in orchestrator.stream_message(user_id, request.message, request.context,
+                                                           request.session_id):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/dashboard")
-async def get_dashboard():
-    return db.get_dashboard_stats()
+def get_dashboard(days: int = 7, user_id: int = Depends(current_user)):
+    if not 1 <= days <= 365:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 365")
+    return db.get_dashboard_stats(user_id, days)
 
 @app.get("/api/jobs")
-async def get_jobs():
-    return db.get_jobs()
+def get_jobs(
+    response: Response,
+    status: Optional[str] = None,
+    company: Optional[str] = None,
+    location: Optional[str] = None,
+    requirement: Optional[str] = None,
+    sort: str = "newest",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(current_user)
+):
+    """One page of jobs; the cursor for the next page is returned in the X-Next-Cursor header"""
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+    try:
+        page = db.get_jobs_page(user_id, status, company, location, requirement, sort, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["jobs"]
+
+@app.get("/api/jobs/search")
+def search_jobs(q: str, location: Optional[str] = None, limit: int = 20, user_id: int = Depends(current_user)):
+    """Full-text search over stored jobs, best match first"""
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    return db.search_jobs(user_id, q, location, limit)
 
 @app.get("/api/learning")
-async def get_learning():
-    return db.get_latest_learning_path()
+def get_learning(user_id: int = Depends(current_user)):
+    return db.get_latest_learning_path(user_id)
 
 @app.get("/api/learning/all")
-async def get_all_learning():
-    return db.get_all_learning_paths()
+def get_all_learning(user_id: int = Depends(current_user)):
+    """Summaries of every learning path, newest first"""
+    return db.get_all_learning_paths(user_id)
+
+@app.get("/api/learning/{path_id:int}")
+def get_learning_path(path_id: int, user_id: int = Depends(current_user)):
+    """Get a specific learning path in full"""
+    path = db.get_learning_path(user_id, path_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Learning path not found")
+    return path
 
 @app.get("/api/resume")
-async def get_resume():
-    return db.get_latest_resume_review()
+def get_resume(user_id: int = Depends(current_user)):
+    return db.get_latest_resume_review(user_id)
 
 # Skill Testing Endpoints
 @app.get("/api/tests")
-async def get_all_tests():
+def get_all_tests(user_id: int = Depends(current_user)):
     """Get all available skill tests"""
-    return db.get_all_skill_tests()
+    return db.get_all_skill_tests(user_id)
 
 @app.get("/api/tests/{test_id}")
-async def get_test(test_id: str):
+def get_test(test_id: str, user_id: int = Depends(current_user)):
     """Get a specific test by ID"""
-    test = db.get_skill_test(test_id)
+    test = db.get_skill_test(user_id, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     return test
 
 @app.post("/api/tests/{test_id}/submit")
-async def submit_test(test_id: str, answers: Dict, time_taken: int = 0):
+def submit_test(test_id: str, answers: Dict, time_taken: int = 0, user_id: int = Depends(current_user)):
     """Submit test answers and get results"""
     from agents.learning_agent import LearningAgent
     learning_agent = LearningAgent()
     
-    result = learning_agent.evaluate_test(test_id, answers)
+    result = learning_agent.evaluate_test(user_id, test_id, answers)
     if result.get("error"):
         raise HTTPException(status_code=400, detail=result["error"])
     
     # Save result to database
     db.save_test_result(
+        user_id,
         test_id,
         result["score"],
         result["total"],
@@ -118,107 +220,160 @@ async def submit_test(test_id: str, answers: Dict, time_taken: int = 0):
     return result
 
 @app.get("/api/tests/results")
-async def get_test_results():
+def get_test_results(user_id: int = Depends(current_user)):
     """Get all test results for the user"""
-    return db.get_test_results()
+    return db.get_test_results(user_id)
 
 @app.get("/api/activity")
-async def get_activity():
+def get_activity(user_id: int = Depends(current_user)):
     """Get recent user activity"""
     return {
-        "recent": db.get_recent_activities(20),
-        "stats": db.get_activity_stats(7)
+        "recent": db.get_recent_activities(user_id, 20),
+        "stats": db.get_activity_stats(user_id, 7)
     }
 
 
 @app.post("/api/resume/upload")
-async def upload_resume(file: UploadFile = File(...)):
+async def upload_resume(file: UploadFile = File(...), user_id: int = Depends(current_user)):
+    # Read one byte past the limit so oversized files are rejected without reading them whole
+    content = await file.read(RESUME_MAX_BYTES + 1)
+    if len(content) > RESUME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Resume must be at most {RESUME_MAX_BYTES // 1024} KB")
+
+    # Same file as an earlier upload: return the stored review
+    file_hash = content_hash(content)
+    cached = await run_in_threadpool(db.get_resume_review_by_hash, user_id, file_hash)
+    if cached:
+        review = ResumeReview(**cached)
+        await run_in_threadpool(db.add_resume_review, user_id, review.dict(), file_hash)
+        return review
+
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Extract text from PDF
-        text = ""
-        if file.filename.endswith('.pdf'):
-            pdf_file = io.BytesIO(content)
-            reader = pypdf.PdfReader(pdf_file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        else:
-            # Assume text/markdown for other formats for now, or error
-            text = content.decode('utf-8', errors='ignore')
-            
-        if not text.strip():
-             raise HTTPException(status_code=400, detail="Could not extract text from file")
+        text = await extract_text(content, file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error reading resume: {e}")
+        raise HTTPException(status_code=400, detail="Could not extract text from file")
+
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Could not extract text from file")
 
+    try:
         # Analyze with AI Agent
-        review = resume_agent.review(text)
-        
+        review = await resume_agent.review(text)
+
         # Save to DB
-        db.add_resume_review(review.dict())
-        
+        await run_in_threadpool(db.add_resume_review, user_id, review.dict(), file_hash)
+
         return review
     except Exception as e:
         print(f"Error processing resume: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
 
 @app.get("/api/profile")
-async def get_profile():
-    return db.get_user_profile()
+def get_profile(user_id: int = Depends(current_user)):
+    return db.get_user_profile(user_id)
 
 @app.put("/api/profile")
-async def update_profile(profile: ProfileUpdate):
-    db.update_user_profile(profile.dict())
+def update_profile(profile: ProfileUpdate, user_id: int = Depends(current_user)):
+    db.update_user_profile(user_id, profile.dict())
     return {"status": "updated"}
 
 @app.get("/api/chat/history")
-async def get_history():
-    session = db.get_active_session()
+def get_history(limit: Optional[int] = None, session_id: Optional[str] = None,
+                user_id: int = Depends(current_user)):
+    """Messages of session_id, or of the active session if omitted"""
+    if session_id:
+        session = db.get_session(user_id, session_id, message_limit=limit)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+    else:
+        session = db.get_active_session(user_id, message_limit=limit)
     return session["messages"]
 
 @app.get("/api/chat/sessions")
-async def get_sessions():
-    return list(db.chat_sessions.values())
+def get_sessions(user_id: int = Depends(current_user)):
+    """Session summaries, most recently updated first"""
+    return list(db.get_chat_sessions(user_id).values())
+
+@app.get("/api/chat/sessions/{session_id}")
+def get_session(session_id: str, user_id: int = Depends(current_user)):
+    """A session with all of its messages"""
+    session = db.get_session(user_id, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
 
 @app.post("/api/chat/sessions")
-async def create_session():
-    session_id = db.create_session()
-    return db.chat_sessions[session_id]
+def create_session(user_id: int = Depends(current_user)):
+    session_id = db.create_session(user_id)
+    return db.get_chat_sessions(user_id)[session_id]
 
 @app.put("/api/chat/sessions/{session_id}/activate")
-async def activate_session(session_id: str):
-    if db.switch_session(session_id):
-        return {"status": "activated", "session": db.get_active_session()}
+def activate_session(session_id: str, user_id: int = Depends(current_user)):
+    if db.switch_session(user_id, session_id):
+        return {"status": "activated", "session": db.get_active_session(user_id)}
     raise HTTPException(status_code=404, detail="Session not found")
 
 @app.delete("/api/chat/sessions/{session_id}")
-async def delete_session(session_id: str):
-    if db.delete_session(session_id):
+def delete_session(session_id: str, user_id: int = Depends(current_user)):
+    if db.delete_session(user_id, session_id):
         return {"status": "deleted"}
     raise HTTPException(status_code=400, detail="Cannot delete last session or session not found")
 
 @app.post("/api/jobs/{job_id}/apply")
-async def apply_job(job_id: str):
-    success = db.mark_job_applied(job_id)
+def apply_job(job_id: str, user_id: int = Depends(current_user)):
+    success = db.mark_job_applied(user_id, job_id)
     if not success:
         raise HTTPException(status_code=404, detail="Job not found")
     return {"status": "applied"}
 
 @app.put("/api/jobs/{job_id}/status")
-async def update_job_status(job_id: str, status: str, notes: str = None):
-    success = db.update_job_application_status(job_id, status, notes)
+def update_job_status(job_id: str, status: str, notes: str = None, user_id: int = Depends(current_user)):
+    success = db.update_job_application_status(user_id, job_id, status, notes)
     if not success:
         raise HTTPException(status_code=404, detail="Job not found or not applied")
     return {"status": "updated"}
 
 @app.get("/api/learning/test")
-async def get_test():
-    return db.mock_tests[-1] if db.mock_tests else None
+def get_latest_test(user_id: int = Depends(current_user)):
+    """The most recent skill test in full, or null if there is none"""
+    tests = db.get_all_skill_tests(user_id)
+    return db.get_skill_test(user_id, tests[0]["id"]) if tests else None
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/api/router/stats")
+async def get_router_stats():
+    """How often messages were routed locally vs. by the LLM"""
+    return orchestrator.router.get_stats()
+
+@app.get("/api/tasks/{task_id}")
+def get_task(task_id: str, user_id: int = Depends(current_user)):
+    """Status of a background task, e.g. a learning path queued by a job search"""
+    task = db.get_task(user_id, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+@app.get("/api/search/cache")
+async def get_search_cache():
+    """Web search result cache hit/miss counters"""
+    return get_search_cache_stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Agent, LLM, web search and database latency in Prometheus text format"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/llm/cache")
+async def get_llm_cache_stats():
+    """LLM response cache hit/miss counters"""
+    return get_cache_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
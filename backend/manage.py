@@ -0,0 +1,57 @@
+"""
+Administrative commands. Run from the backend directory:
+
+    python manage.py create-user "Jane Doe"
+    python manage.py rebuild-stats [--user-id N]
+    python manage.py check-plans [--verbose]
+"""
+import argparse
+from database import db
+
+def create_user(args):
+    user = db.create_user(args.name)
+    print(f"Created user {user['id']} ({user['name']})")
+    print(f"API key: {user['api_key']}")
+    print("The key cannot be shown again; send it as 'Authorization: Bearer <key>'.")
+
+def rebuild_stats(args):
+    drifted = db.rebuild_dashboard_stats(args.user_id)
+    print(f"Rebuilt dashboard stats; {len(drifted)} user(s) had drifted")
+    for user_id in drifted:
+        print(f"  user {user_id}")
+    return 1 if drifted else 0
+
+def check_plans(args):
+    results = db.check_query_plans()
+    print(f"Schema version {db.schema_version()}, {len(results)} hot queries")
+    for result in results:
+        if result["full_scans"]:
+            print(f"FULL SCAN  {result['query']}: {'; '.join(result['full_scans'])}")
+        elif args.verbose:
+            print(f"ok         {result['query']}: {'; '.join(result['plan'])}")
+    scanning = sum(1 for result in results if result["full_scans"])
+    print(f"{scanning} quer{'y' if scanning == 1 else 'ies'} with full scans")
+    return 1 if scanning else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job Agent administrative commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create-user", help="Add a user and print their API key")
+    create.add_argument("name")
+    create.set_defaults(func=create_user)
+
+    rebuild = commands.add_parser("rebuild-stats",
+                                  help="Recompute dashboard stats from scratch and report any that were wrong")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Only this user (default: all users)")
+    rebuild.set_defaults(func=rebuild_stats)
+
+    plans = commands.add_parser("check-plans", help="Flag hot queries whose query plan scans a whole table")
+    plans.add_argument("--verbose", action="store_true", help="Show the plan of every query")
+    plans.set_defaults(func=check_plans)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
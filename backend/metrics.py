@@ -0,0 +1,197 @@
+import asyncio
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from sub-millisecond SQLite reads to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# The event loop is checked every LOOP_LAG_INTERVAL_SECONDS; stalls longer
+# than LOOP_LAG_WARN_SECONDS are logged as they happen
+LOOP_LAG_INTERVAL_SECONDS = 0.05
+LOOP_LAG_WARN_SECONDS = float(os.getenv("LOOP_LAG_WARN_SECONDS", "0.1"))
+
+_registry = []
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in Prometheus text format."""
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        bounds = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-2]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bound)} {cumulative}")
+            # Values above the last bound have no slot of their own; +Inf is every observation
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bounds[-1])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def timed(histogram: Histogram, **labels):
+    """
+    Decorator recording a call's duration in histogram with the given labels
+    plus outcome="ok" or "error". Works for plain and async functions.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    histogram.observe(time.perf_counter() - start, outcome=outcome, **labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                histogram.observe(time.perf_counter() - start, outcome=outcome, **labels)
+        return wrapper
+    return decorator
+
+def time_methods(histogram: Histogram, label: str = "method"):
+    """Class decorator applying timed() to every public method, labelled with its name."""
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(member):
+                continue
+            setattr(cls, name, timed(histogram, **{label: name})(member))
+        return cls
+    return decorator
+
+# Shared application metrics
+AGENT_DURATION = Histogram(
+    "agent_duration_seconds", "Time spent in agent operations, including routing",
+    ("agent", "operation", "outcome"))
+LLM_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM call latency; outcome is ok, error, timeout or cache_hit",
+    ("family", "outcome"))
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Prompt and response tokens sent to and received from the LLM",
+    ("family", "direction"))
+WEB_SEARCH_DURATION = Histogram(
+    "web_search_duration_seconds", "Latency of single web search queries",
+    ("backend", "outcome"))
+DB_DURATION = Histogram(
+    "db_method_duration_seconds", "Time spent in Database methods",
+    ("method", "outcome"))
+DB_LOCK_WAIT = Histogram(
+    "db_lock_wait_seconds", "Time spent waiting for the write lock (lock=write) or a pooled read connection (lock=read)",
+    ("lock",))
+DB_LOCKED_ERRORS = Counter(
+    "db_locked_errors_total", "Writes that failed with 'database is locked' after the busy timeout")
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop woke a periodic timer; large values mean blocking work ran on the loop")
+
+class LoopLagMonitor:
+    """
+    Sleeps in short intervals on the event loop and records how late each
+    wake-up is. Anything that blocks the loop (synchronous I/O, a slow
+    SQLite query, CPU-bound parsing) shows up as lag.
+    """
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS, warn_after: float = LOOP_LAG_WARN_SECONDS):
+        self.interval = interval
+        self.warn_after = warn_after
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.warn_after:
+                print(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+loop_monitor = LoopLagMonitor()
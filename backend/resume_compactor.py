@@ -0,0 +1,166 @@
+import os
+import re
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+
+# Upper bound on the resume text sent to the reviewer, in estimated tokens
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "1500"))
+
+PAGE_BREAK = "\f"
+
+# Canonical section -> headings that start it
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "career objective", "about me", "about"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "internships", "internship"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "technologies", "tech stack", "tools"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "education": ["education", "academic background", "academics", "qualifications"],
+    "certifications": ["certifications", "certificates", "courses", "licenses"],
+    "other": ["achievements", "awards", "publications", "languages", "interests", "hobbies", "volunteering",
+              "extracurricular activities", "activities", "references", "declaration", "personal details"],
+}
+_HEADING_LOOKUP = {h: section for section, headings in SECTION_HEADINGS.items() for h in headings}
+
+# Share of the budget each section may claim; unused share flows to the others
+SECTION_WEIGHTS = {
+    "experience": 4.0, "skills": 2.0, "projects": 2.0, "summary": 1.0,
+    "education": 1.0, "certifications": 1.0, "header": 0.5, "other": 0.5,
+}
+SECTION_ORDER = ["header", "summary", "experience", "skills", "projects", "education", "certifications", "other"]
+
+BOILERPLATE = [
+    re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.I),
+    re.compile(r"^references (are )?available (up)?on request\.?$", re.I),
+    re.compile(r"^i hereby declare\b.*", re.I),
+    re.compile(r"^curriculum vitae$|^resume$|^résumé$", re.I),
+]
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose
+    return (len(text) + 3) // 4
+
+def _furniture_key(line: str) -> str:
+    # Page numbers vary from page to page, so footers like "Jane Doe · Page 2" match on
+    # the other words; other lines must repeat exactly
+    key = line.lower()
+    return re.sub(r"\d+", "#", key) if re.search(r"\bpage\b", key) else key
+
+def _furniture(pages: List[List[str]]) -> set:
+    """Lines at the top or bottom of most pages: running headers and footers."""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        counts.update({_furniture_key(line) for line in lines[:2] + lines[-2:]})
+    return {key for key, n in counts.items() if n >= max(2, len(pages) // 2 + 1)}
+
+def _clean_lines(text: str) -> List[str]:
+    pages = [
+        [" ".join(line.split()) for line in page.splitlines() if line.strip()]
+        for page in text.split(PAGE_BREAK)
+    ]
+    furniture = _furniture(pages)
+    seen_furniture = set()
+    lines = []
+    for page in pages:
+        for line in page:
+            key = _furniture_key(line)
+            if key in furniture:
+                # The first copy stays: a running header is often the name and contact line
+                if key in seen_furniture:
+                    continue
+                seen_furniture.add(key)
+            if any(p.match(line) for p in BOILERPLATE):
+                continue
+            if lines and lines[-1] == line:
+                continue
+            lines.append(line)
+    return lines
+
+def _heading(line: str) -> Tuple[Optional[str], Optional[str]]:
+    """(section, inline content) if line starts a section, e.g. "Skills: Python, SQL"."""
+    label, sep, rest = line.partition(":")
+    key = re.sub(r"[^a-z ]", "", label.lower()).strip()
+    section = _HEADING_LOOKUP.get(" ".join(key.split()))
+    if not section:
+        return None, None
+    return section, rest.strip() if sep and rest.strip() else None
+
+def split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """(section, lines) pairs in document order; text before the first heading is the header."""
+    sections = [("header", [])]
+    for line in lines:
+        section, content = _heading(line)
+        if section:
+            sections.append((section, [content] if content else []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, body) for name, body in sections if body]
+
+def _allocate(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """Splits budget across sections by weight, giving what a small section leaves unused to the rest."""
+    allocation = {}
+    remaining = dict(sizes)
+    left = budget
+    while remaining:
+        total_weight = sum(SECTION_WEIGHTS[s] for s in remaining)
+        fits = {s: n for s, n in remaining.items() if n <= left * SECTION_WEIGHTS[s] / total_weight}
+        if not fits:
+            for s in remaining:
+                allocation[s] = int(left * SECTION_WEIGHTS[s] / total_weight)
+            break
+        for s, n in fits.items():
+            allocation[s] = n
+            left -= n
+            del remaining[s]
+    return allocation
+
+def _truncate(lines: List[str], budget: int) -> List[str]:
+    # Resumes list the most recent and most relevant items first, so keep the top
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            if budget - used > 8:
+                kept.append(line[:(budget - used) * 4].rsplit(" ", 1)[0] + " …")
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+def compact_resume(text: str, budget: int = RESUME_TOKEN_BUDGET) -> Dict:
+    """
+    Strips repeated page furniture (keeping its first copy), boilerplate and
+    whitespace from extracted resume text, groups it into sections and trims it to `budget` estimated tokens,
+    favouring experience and skills. Returns the compacted text with the
+    token counts before and after.
+    """
+    original_tokens = estimate_tokens(text)
+    sections = split_sections(_clean_lines(text))
+
+    merged = {}
+    for name, body in sections:
+        merged.setdefault(name, []).extend(body)
+    sizes = {name: sum(estimate_tokens(line) + 1 for line in body) for name, body in merged.items()}
+    # Leave room for the section labels added below
+    allocation = _allocate(sizes, max(budget - 4 * len(merged), 0))
+
+    parts = []
+    for name in SECTION_ORDER:
+        if name not in merged:
+            continue
+        body = _truncate(merged[name], allocation[name])
+        if not body:
+            continue
+        parts.append("\n".join(body) if name == "header" else f"{name.upper()}:\n" + "\n".join(body))
+    compacted = "\n\n".join(parts)
+
+    compacted_tokens = estimate_tokens(compacted)
+    return {
+        "text": compacted,
+        "sections": [name for name in SECTION_ORDER if name in merged],
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": max(original_tokens - compacted_tokens, 0),
+    }
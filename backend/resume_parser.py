@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Upload limits: larger files are rejected before any parsing happens
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "10"))
+# PDF parsing is CPU-bound, so it runs in worker processes instead of the event loop
+RESUME_PARSE_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", "2"))
+RESUME_PARSE_TIMEOUT_SECONDS = float(os.getenv("RESUME_PARSE_TIMEOUT_SECONDS", "20"))
+
+_pool = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Created on first use so importing the app does not fork workers
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RESUME_PARSE_WORKERS)
+    return _pool
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def extract_pdf_text(content: bytes, max_pages: int = RESUME_MAX_PAGES) -> str:
+    """
+    Extracts text page by page. Runs in a worker process; raises ValueError
+    for PDFs over the page limit.
+    """
+    import pypdf
+    reader = pypdf.PdfReader(io.BytesIO(content))
+    if len(reader.pages) > max_pages:
+        raise ValueError(f"Resume has {len(reader.pages)} pages; the limit is {max_pages}")
+    # Pages are separated by form feeds so later stages can spot running headers and footers
+    return "\f".join(page.extract_text() or "" for page in reader.pages)
+
+async def extract_text(content: bytes, filename: str) -> str:
+    """
+    Text of an uploaded resume. PDFs are parsed in the process pool under a
+    timeout; anything else is decoded as UTF-8 text.
+    Raises ValueError for files that break the upload limits.
+    """
+    if len(content) > RESUME_MAX_BYTES:
+        raise ValueError(f"Resume is larger than {RESUME_MAX_BYTES // 1024} KB")
+    if not filename.lower().endswith('.pdf'):
+        return content.decode('utf-8', errors='ignore')
+
+    global _pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_get_pool(), extract_pdf_text, content, RESUME_MAX_PAGES),
+            timeout=RESUME_PARSE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise ValueError("Timed out reading the PDF")
+    except BrokenProcessPool:
+        # A worker died (e.g. on a malformed PDF); start a fresh pool for the next upload
+        _pool = None
+        raise ValueError("Could not read the PDF")
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import random
+import time
+from typing import List, Dict
+
+# Which web search backend JobSearchAgent uses: "duckduckgo" or "fake"
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "duckduckgo").lower()
+# Per-query network timeout for real backends
+SEARCH_QUERY_TIMEOUT_SECONDS = int(os.getenv("SEARCH_QUERY_TIMEOUT_SECONDS", "8"))
+
+class SearchBackend:
+    """
+    A blocking web search client. search() returns result dicts with the
+    keys DuckDuckGo uses: title, href and body. Implementations may raise;
+    callers treat an exception as an empty result for that query.
+    """
+    name = "base"
+
+    def search(self, query: str, max_results: int = 10) -> List[Dict]:
+        raise NotImplementedError
+
+class DuckDuckGoBackend(SearchBackend):
+    name = "duckduckgo"
+
+    def __init__(self, timeout: int = SEARCH_QUERY_TIMEOUT_SECONDS):
+        self.timeout = timeout
+
+    def search(self, query: str, max_results: int = 10) -> List[Dict]:
+        # Imported here so the fake backend works without the package installed
+        from duckduckgo_search import DDGS
+        with DDGS(timeout=self.timeout) as ddgs:
+            return list(ddgs.text(query, max_results=max_results))
+
+def _stable_hash(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:12], 16)
+
+FAKE_COMPANIES = ["Acme Labs", "Globex", "Initech", "Umbrella Tech", "Hooli", "Stark Systems", "Wayne Digital", "Tyrell Data"]
+FAKE_BOARDS = ["naukri.com", "indeed.co.in", "linkedin.com/jobs", "foundit.in"]
+
+class FakeSearchBackend(SearchBackend):
+    """
+    Offline backend for tests and benchmarks. Results are derived from the
+    query, so the same query always returns the same postings, and some
+    postings repeat across boards like real syndicated listings do.
+    latency (seconds, or a (min, max) range) and failure_rate simulate a
+    slow or flaky provider.
+    """
+    name = "fake"
+
+    def __init__(self, latency=0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def search(self, query: str, max_results: int = 10) -> List[Dict]:
+        self.calls += 1
+        if isinstance(self.latency, tuple):
+            time.sleep(self._random.uniform(*self.latency))
+        elif self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError(f"fake search failure for '{query}'")
+
+        terms = query.replace(" jobs", "").replace(" in ", " ").split()
+        query_role = " ".join(t.capitalize() for t in terms[:2]) or "Software"
+        query_seed = _stable_hash(query.lower())
+        # Even slots come from a pool shared by every query on the same first
+        # term, so overlapping queries return overlapping postings
+        pool_seed = _stable_hash(terms[0].lower() if terms else "")
+        results = []
+        for i in range(max_results):
+            shared = i % 2 == 0
+            n = (pool_seed if shared else query_seed) + i
+            role = (terms[0].capitalize() if terms else "Software") if shared else query_role
+            company = FAKE_COMPANIES[n % len(FAKE_COMPANIES)]
+            results.append({
+                "title": f"{role} Engineer {n % 97} - {company}",
+                "href": f"https://{FAKE_BOARDS[n % len(FAKE_BOARDS)]}/job/{n % 100000}",
+                "body": f"{company} is hiring a {role} engineer. Work on services used by millions, "
+                        f"with a team of {n % 40 + 5} engineers. Posting {n % 97}."
+            })
+        return results
+
+def get_search_backend(name: str = SEARCH_BACKEND) -> SearchBackend:
+    if name == "fake":
+        return FakeSearchBackend()
+    if name == "duckduckgo":
+        return DuckDuckGoBackend()
+    raise ValueError(f"Unknown search backend '{name}'")
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+from database import db
+from fastapi.concurrency import run_in_threadpool
+
+# Background workers per process, attempts per task, and how long one attempt may run
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_TIMEOUT_SECONDS = float(os.getenv("TASK_TIMEOUT_SECONDS", "60"))
+# A running task's lease is renewed while its worker is alive; once it
+# lapses, any process may requeue the task
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "30"))
+# Retries back off exponentially from this delay
+TASK_RETRY_BASE_SECONDS = 2.0
+# Idle workers also look for due retries this often
+POLL_SECONDS = 1.0
+
+class TaskQueue:
+    """
+    Durable in-process task queue. Tasks are rows in the tasks table, so
+    queued work survives a restart; asyncio workers claim and run them with
+    the handler registered for their kind, retrying failures with backoff.
+    Every task belongs to a user, whose id is passed to the handler.
+
+    Claimed tasks are leased to this queue and the lease is renewed while
+    they run, so several processes can share the table: only tasks whose
+    lease lapsed (their process died) are requeued. The database calls are
+    writes that may wait on the write lock, so they run in the threadpool.
+    """
+    def __init__(self, workers: int = TASK_WORKERS, lease_seconds: float = TASK_LEASE_SECONDS):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, Callable[[int, Dict], Awaitable[Any]]] = {}
+        self._workers = []
+        self._wakeup = None
+
+    def register(self, kind: str, handler: Callable[[int, Dict], Awaitable[Any]]):
+        self.handlers[kind] = handler
+
+    async def enqueue(self, user_id: int, kind: str, payload: Dict, max_attempts: int = TASK_MAX_ATTEMPTS) -> str:
+        task_id = await run_in_threadpool(db.enqueue_task, user_id, kind, payload, max_attempts)
+        if self._wakeup:
+            self._wakeup.set()
+        return task_id
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        self._workers.append(asyncio.ensure_future(self._requeue_abandoned()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Hand tasks interrupted here straight back instead of waiting for their leases to lapse
+        requeued = await run_in_threadpool(db.requeue_running_tasks, self.owner)
+        if requeued:
+            print(f"Task queue: requeued {requeued} interrupted task(s)")
+
+    async def _requeue_abandoned(self):
+        while True:
+            requeued = await run_in_threadpool(db.requeue_running_tasks)
+            if requeued:
+                print(f"Task queue: requeued {requeued} task(s) whose lease expired")
+                self._wakeup.set()
+            await asyncio.sleep(self.lease_seconds)
+
+    async def _work(self):
+        while True:
+            task = await run_in_threadpool(db.claim_task, list(self.handlers), self.owner, self.lease_seconds)
+            if task is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(task)
+
+    async def _renew_lease(self, task_id: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await run_in_threadpool(db.renew_task_lease, task_id, self.owner, self.lease_seconds):
+                print(f"Task queue: lost the lease on task {task_id}")
+                return
+
+    async def _run(self, task: Dict):
+        heartbeat = asyncio.ensure_future(self._renew_lease(task["id"]))
+        try:
+            result = await asyncio.wait_for(self.handlers[task["kind"]](task["user_id"], task["payload"]), TASK_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            delay = TASK_RETRY_BASE_SECONDS * 2 ** (task["attempts"] - 1)
+            status = await run_in_threadpool(db.fail_task, task["id"], self.owner, error, delay)
+            print(f"Task {task['kind']} {task['id']} failed (attempt {task['attempts']}/{task['max_attempts']}, now {status}): {error}")
+            return
+        finally:
+            heartbeat.cancel()
+        await run_in_threadpool(db.finish_task, task["id"], self.owner, result)
+
+task_queue = TaskQueue()
@@ -0,0 +1,39 @@
+from database import db
+
+def _job(job_id: str, title: str, requirements: list) -> dict:
+    return {"id": job_id, "title": title, "company": "Acme", "description": "", "location": "Pune",
+            "requirements": requirements}
+
+def _ids_requiring(user_id: int, requirement: str) -> list:
+    return [job["id"] for job in db.get_jobs_page(user_id, requirement=requirement)["jobs"]]
+
+def test_upsert_counts():
+    user_id = db.create_user("upsert")["id"]
+    assert db.add_jobs(user_id, [_job("a", "Engineer", ["Go"]), _job("b", "Analyst", ["SQL"])]) == \
+        {"inserted": 2, "updated": 0, "skipped": 0}
+    assert db.add_jobs(user_id, [_job("a", "Engineer", ["Go"]), _job("b", "Senior Analyst", ["SQL"]),
+                                 _job("c", "Tester", [])]) == {"inserted": 1, "updated": 1, "skipped": 1}
+    assert db.add_jobs(user_id, []) == {"inserted": 0, "updated": 0, "skipped": 0}
+
+def test_upsert_keeps_application_status():
+    user_id = db.create_user("upsert-status")["id"]
+    db.add_jobs(user_id, [_job("a", "Engineer", ["Go"])])
+    db.mark_job_applied(user_id, "a")
+    db.add_jobs(user_id, [_job("a", "Lead Engineer", ["Go"])])
+    job = db.get_jobs(user_id)[0]
+    assert (job["title"], job["status"]) == ("Lead Engineer", "Applied")
+
+def test_last_copy_of_a_repeated_id_wins():
+    user_id = db.create_user("upsert-dupes")["id"]
+    batch = [_job("a", "Go Engineer", ["Go", "Docker"]), _job("a", "Rust Engineer", ["Rust", "Docker"])]
+    assert db.add_jobs(user_id, batch) == {"inserted": 1, "updated": 0, "skipped": 0}
+
+    job = db.get_jobs(user_id)[0]
+    assert (job["title"], job["requirements"]) == ("Rust Engineer", ["Rust", "Docker"])
+    assert _ids_requiring(user_id, "Rust") == ["a"] and _ids_requiring(user_id, "Docker") == ["a"]
+    assert _ids_requiring(user_id, "Go") == []
+
+    # Same for updates: the requirements of the first copy are dropped
+    batch = [_job("a", "Rust Engineer", ["Rust", "Docker"]), _job("a", "Rust Engineer", ["Rust"])]
+    assert db.add_jobs(user_id, batch) == {"inserted": 0, "updated": 1, "skipped": 0}
+    assert _ids_requiring(user_id, "Docker") == []
@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from database import db
+import main
+
+client = TestClient(main.app)
+
+def _auth(user: dict) -> dict:
+    return {"Authorization": f"Bearer {user['api_key']}"}
+
+def _tenant(name: str, title: str) -> dict:
+    user = db.create_user(name)
+    db.add_jobs(user["id"], [
+        # Ids are per user, so both tenants can store the same posting
+        {"id": "shared", "title": title, "company": "Acme", "description": "", "requirements": ["Erlang"]},
+        {"id": f"{name}-only", "title": f"{title} II", "company": "Acme", "description": "", "requirements": ["Erlang"]},
+    ])
+    user["session_id"] = db.create_session(user["id"])
+    db.add_message(user["id"], "user", f"message from {name}", session_id=user["session_id"])
+    user["task_id"] = db.enqueue_task(user["id"], "auth", {"owner": name}, max_attempts=3)
+    return user
+
+@pytest.fixture(scope="module")
+def tenants():
+    return _tenant("tenant-a", "Erlang Engineer"), _tenant("tenant-b", "Erlang Architect")
+
+def test_bad_or_missing_key_is_rejected(monkeypatch):
+    assert client.get("/api/jobs", headers={"Authorization": "Bearer not-a-key"}).status_code == 401
+    assert client.get("/api/jobs", headers={"Authorization": "Basic abc"}).status_code == 401
+
+    monkeypatch.setattr(main, "REQUIRE_AUTH", True)
+    response = client.get("/api/jobs")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+def test_tenants_see_only_their_jobs(tenants):
+    a, b = tenants
+    jobs = client.get("/api/jobs", headers=_auth(a)).json()
+    assert {job["id"]: job["title"] for job in jobs} == {"shared": "Erlang Engineer", "tenant-a-only": "Erlang Engineer II"}
+
+    # A cursor from B's listing still only pages through A's jobs
+    response = client.get("/api/jobs", params={"limit": 1}, headers=_auth(b))
+    cursor = response.headers["X-Next-Cursor"]
+    page = client.get("/api/jobs", params={"limit": 10, "cursor": cursor}, headers=_auth(a)).json()
+    assert {job["id"] for job in page} <= {"shared", "tenant-a-only"}
+
+    results = client.get("/api/jobs/search", params={"q": "erlang"}, headers=_auth(a)).json()
+    assert sorted(job["title"] for job in results) == ["Erlang Engineer", "Erlang Engineer II"]
+    # Keyless requests act as the default user, who sees neither tenant's jobs
+    assert "tenant-a-only" not in [job["id"] for job in client.get("/api/jobs/search", params={"q": "erlang"}).json()]
+
+def test_tenants_see_only_their_chat_history(tenants):
+    a, b = tenants
+    history = client.get("/api/chat/history", params={"session_id": a["session_id"]}, headers=_auth(a)).json()
+    assert [m["content"] for m in history] == ["message from tenant-a"]
+    response = client.get("/api/chat/history", params={"session_id": b["session_id"]}, headers=_auth(a))
+    assert response.status_code == 404
+
+    # The active session is per user too
+    history = client.get("/api/chat/history", headers=_auth(b)).json()
+    assert [m["content"] for m in history] == ["message from tenant-b"]
+
+def test_tenants_can_poll_only_their_tasks(tenants):
+    a, b = tenants
+    assert client.get(f"/api/tasks/{a['task_id']}", headers=_auth(a)).json()["payload"] == {"owner": "tenant-a"}
+    assert client.get(f"/api/tasks/{b['task_id']}", headers=_auth(a)).status_code == 404
+    assert client.get(f"/api/tasks/{a['task_id']}").status_code == 404
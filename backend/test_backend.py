@@ -6,11 +6,11 @@ sys.path.append(os.getcwd())
 
 try:
     print("Importing database...")
-    from database import db
+    from database import db, DEFAULT_USER_ID
     print("Database imported successfully.")
     
     print("Testing database connection...")
-    stats = db.get_dashboard_stats()
+    stats = db.get_dashboard_stats(DEFAULT_USER_ID)
     print(f"Dashboard stats: {stats}")
     
     print("Importing main...")
@@ -0,0 +1,104 @@
+import asyncio
+
+from cache import LRUCache, StaleWhileRevalidateCache
+
+def test_lru_serves_entries_until_they_expire():
+    cache = LRUCache(maxsize=4)
+    cache.set("fresh", 1, ttl=60)
+    cache.set("expired", 2, ttl=0)
+
+    assert cache.get("fresh") == 1
+    assert cache.get("expired") is None
+    # Expired entries are dropped when read
+    assert len(cache) == 1
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_lru_set_replaces_value_and_ttl():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("a", 2, ttl=0)
+    assert cache.get("a") is None
+
+def test_response_cache_falls_back_to_disk(tmp_path):
+    from llm_engine import ResponseCache
+    cache = ResponseCache(str(tmp_path / "llm_cache.db"), maxsize=8)
+    key = ResponseCache.make_key("model", "Create a test for   Python")
+
+    async def scenario():
+        assert await cache.get(key, "skill_test") is None
+        await cache.set(key, "skill_test", "model", "{}")
+        assert await cache.get(key, "skill_test") == "{}"
+        cache.memory.clear()
+        assert await cache.get(key, "skill_test") == "{}"
+        # Whitespace in the prompt does not change the key
+        assert await cache.get(ResponseCache.make_key("model", "Create a test for Python"), "skill_test") == "{}"
+
+    asyncio.run(scenario())
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["memory_hits"], stats["disk_hits"], stats["stores"]) == (1, 2, 1, 1)
+    assert stats["families"] == {"skill_test": {"hits": 3, "misses": 1}}
+
+def test_swr_entries_go_stale_then_expire():
+    assert StaleWhileRevalidateCache(8, ttl=60, stale_ttl=60).get("missing") == (None, False)
+
+    fresh = StaleWhileRevalidateCache(8, ttl=60, stale_ttl=60)
+    fresh.set("k", "v")
+    assert fresh.get("k") == ("v", False)
+
+    stale = StaleWhileRevalidateCache(8, ttl=0, stale_ttl=60)
+    stale.set("k", "v")
+    assert stale.get("k") == ("v", True)
+
+    expired = StaleWhileRevalidateCache(8, ttl=0, stale_ttl=0)
+    expired.set("k", "v")
+    assert expired.get("k") == (None, False)
+
+def test_swr_allows_one_refresh_at_a_time():
+    cache = StaleWhileRevalidateCache(8, ttl=0, stale_ttl=60)
+    assert cache.begin_refresh("k")
+    assert not cache.begin_refresh("k")
+    cache.end_refresh("k")
+    assert cache.begin_refresh("k")
+    assert cache.get_stats()["refreshes"] == 2
+
+def test_learning_path_prompt_is_keyed_on_the_skill(monkeypatch):
+    from agents import learning_agent
+    prompts = []
+
+    async def fake_llm(prompt, cache_family=None):
+        prompts.append((prompt, cache_family))
+        return '{"skill": "Go"}'
+
+    monkeypatch.setattr(learning_agent, "generate_json_response_async", fake_llm)
+    agent = learning_agent.LearningAgent()
+    first = asyncio.run(agent.create_learning_path("Go", [{"id": "a", "title": "Go Engineer"}]))
+    second = asyncio.run(agent.create_learning_path("Go", [{"id": "b", "title": "Platform Engineer"}]))
+
+    # Same prompt, so the second search hits the learning_path cache entry of the first
+    assert prompts[0] == prompts[1] and prompts[0][1] == "learning_path"
+    assert (first["created_from_jobs"], second["created_from_jobs"]) == (["a"], ["b"])
+
+def test_swr_counts_every_lookup_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    cache = StaleWhileRevalidateCache(8, ttl=60, stale_ttl=60)
+    cache.set("hit", "v")
+
+    def lookups(_):
+        for _ in range(1000):
+            cache.get("hit")
+            cache.get("miss")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lookups, range(8)))
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (8000, 8000, 0.5)
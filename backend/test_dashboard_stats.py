@@ -0,0 +1,55 @@
+import datetime
+
+from database import db
+
+def _job(job_id: str, title: str) -> dict:
+    return {"id": job_id, "title": title, "company": "Acme", "description": "", "requirements": ["Go"]}
+
+def test_dashboard_stats_table_has_no_per_day_columns():
+    with db._read() as cur:
+        cur.execute("PRAGMA table_info(dashboard_stats)")
+        columns = [row['name'] for row in cur.fetchall()]
+    assert "applications_by_day" not in columns and "activity_by_day" not in columns
+
+def test_counters_after_writes_match_a_rebuild():
+    user_id = db.create_user("counters")["id"]
+    db.add_jobs(user_id, [_job("a", "Engineer"), _job("b", "Analyst"), _job("c", "Tester")])
+    db.add_jobs(user_id, [_job("a", "Lead Engineer")])
+    db.mark_job_applied(user_id, "a")
+    db.mark_job_applied(user_id, "b")
+    db.mark_job_applied(user_id, "a")  # applying again counts once
+    db.update_job_application_status(user_id, "a", "Interviewing")
+    db.add_resume_review(user_id, {"score": 64, "feedback": []})
+    db.add_resume_review(user_id, {"score": 81, "feedback": []})
+    db.update_learning_path(user_id, {"skill": "Go", "message": "", "recommendations": []})
+    for activity_type in ["job_search", "job_search", "job_apply"]:
+        db.log_activity(user_id, activity_type, {})
+
+    stats = db.get_dashboard_stats(user_id)
+    assert (stats["total_jobs"], stats["jobs_applied"], stats["resume_score"]) == (3, 2, 81)
+    assert stats["application_history"][-1] == {
+        "name": datetime.date.today().strftime("%a"), "date": datetime.date.today().isoformat(), "jobs": 2
+    }
+    assert sum(day["jobs"] for day in stats["application_history"]) == 2
+    activity = db.get_activity_stats(user_id)
+    assert (activity["job_search"], activity["job_apply"]) == (2, 1)
+
+    # Recomputing from the underlying tables finds nothing to correct
+    assert db.rebuild_dashboard_stats(user_id) == []
+    assert db.get_dashboard_stats(user_id) == stats
+    assert db.get_activity_stats(user_id) == activity
+
+def test_rebuild_repairs_drifted_counters():
+    user_id = db.create_user("drift")["id"]
+    db.add_jobs(user_id, [_job("a", "Engineer")])
+    db.mark_job_applied(user_id, "a")
+    expected = db.get_dashboard_stats(user_id)
+
+    with db._write() as cur:
+        cur.execute("UPDATE dashboard_stats SET total_jobs = 7 WHERE user_id = ?", (user_id,))
+        cur.execute("UPDATE daily_stats SET count = 5 WHERE user_id = ?", (user_id,))
+    assert db.get_dashboard_stats(user_id) != expected
+
+    assert db.rebuild_dashboard_stats(user_id) == [user_id]
+    assert db.get_dashboard_stats(user_id) == expected
+    assert db.rebuild_dashboard_stats(user_id) == []
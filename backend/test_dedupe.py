@@ -0,0 +1,56 @@
+from dedupe import (BANDS, NEAR_DUPLICATE_THRESHOLD, band_keys, collapse_near_duplicates, job_id_for, minhash,
+                    normalize_link, posting_signature, similarity)
+from database import db
+
+DESCRIPTION = ("Acme Labs is hiring a senior Python engineer to build the data platform behind our "
+               "payments product. You will design streaming pipelines, own services in production, "
+               "mentor two junior engineers and work closely with analytics on reporting. "
+               "Experience with Kafka, PostgreSQL and AWS is expected.")
+
+def test_job_id_ignores_tracking_and_formatting():
+    base = job_id_for("https://www.naukri.com/job/123?utm_source=ddg#apply", "Python  Engineer")
+    assert base.startswith("web-")
+    assert base == job_id_for("HTTPS://naukri.com/job/123/", "python engineer")
+    assert base == job_id_for("https://naukri.com/job/123?ref=home&utm_medium=x", "Python Engineer!")
+    assert base != job_id_for("https://naukri.com/job/124", "Python Engineer")
+    assert base != job_id_for("https://naukri.com/job/123", "Java Engineer")
+
+def test_normalize_link_keeps_meaningful_query():
+    assert normalize_link("https://Example.com/jobs/?b=2&a=1&utm_campaign=x") == "https://example.com/jobs?a=1&b=2"
+
+def test_minhash_similarity():
+    signature = minhash(DESCRIPTION)
+    assert similarity(signature, minhash(DESCRIPTION)) == 1.0
+    # The same posting syndicated with a small edit
+    edited = minhash(DESCRIPTION.replace("two junior", "three junior"))
+    assert similarity(signature, edited) >= NEAR_DUPLICATE_THRESHOLD
+    unrelated = minhash("Globex needs a retail store manager for weekend shifts in Mumbai with sales experience.")
+    assert similarity(signature, unrelated) < 0.2
+
+def test_empty_text_has_no_signature():
+    assert minhash("") == []
+    assert similarity([], []) == 0.0
+    assert band_keys([]) == []
+
+def test_near_duplicates_share_a_band():
+    keys = band_keys(posting_signature("Python Engineer", "Acme Labs", DESCRIPTION))
+    edited = band_keys(posting_signature("Python Engineer", "Acme Labs", DESCRIPTION.replace("AWS", "GCP")))
+    assert len(keys) == BANDS
+    assert set(keys) & set(edited)
+
+def test_collapse_keeps_first_of_each_group():
+    signatures = [
+        minhash(DESCRIPTION),
+        minhash("Initech is looking for a QA analyst to test billing software and write regression plans."),
+        minhash(DESCRIPTION.replace("senior", "lead")),
+    ]
+    assert collapse_near_duplicates(signatures) == [0, 1]
+
+def test_find_near_duplicate_returns_stored_posting():
+    signature = posting_signature("Data Engineer", "Hooli", DESCRIPTION.replace("Acme Labs", "Hooli"))
+    db.add_job_signatures({"web-hooli-data": signature})
+
+    edited = posting_signature("Data Engineer", "Hooli", DESCRIPTION.replace("Acme Labs", "Hooli")
+                               .replace("Kafka", "Pulsar"))
+    assert db.find_near_duplicate(edited) == "web-hooli-data"
+    assert db.find_near_duplicate(minhash("Barista wanted for a busy cafe near the station")) is None
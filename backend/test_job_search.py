@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from agents import job_search
+from agents.job_search import JobSearchAgent
+from search_backends import FakeSearchBackend, get_search_backend
+
+class PartlyFailingBackend(FakeSearchBackend):
+    """Fails every query that mentions `failing`."""
+    def __init__(self, failing: str):
+        super().__init__()
+        self.failing = failing
+
+    def search(self, query, max_results=10):
+        if self.failing in query:
+            raise RuntimeError("provider error")
+        return super().search(query, max_results)
+
+def test_fake_backend_is_deterministic():
+    backend = FakeSearchBackend()
+    results = backend.search("python jobs in pune", max_results=5)
+    assert results == FakeSearchBackend().search("python jobs in pune", max_results=5)
+    assert len(results) == 5
+    assert all(set(r) == {"title", "href", "body"} for r in results)
+    assert backend.calls == 1
+
+def test_fake_backend_overlaps_queries_on_the_same_first_term():
+    pune = {r["href"] for r in FakeSearchBackend().search("python jobs in pune")}
+    remote = {r["href"] for r in FakeSearchBackend().search("python remote jobs")}
+    java = {r["href"] for r in FakeSearchBackend().search("java jobs in pune")}
+    assert pune & remote
+    assert not pune & java
+
+def test_fake_backend_failures():
+    with pytest.raises(RuntimeError):
+        FakeSearchBackend(failure_rate=1.0).search("python jobs")
+    assert isinstance(get_search_backend("fake"), FakeSearchBackend)
+    with pytest.raises(ValueError):
+        get_search_backend("bing")
+
+def test_query_variants():
+    agent = JobSearchAgent(FakeSearchBackend())
+    variants = agent._query_variants(["Python", "Django"], ["Pune", "Mumbai"])
+    assert variants == [
+        ("Python Django jobs in Pune", "Pune"),
+        ("Python Django jobs in Mumbai", "Mumbai"),
+        ("Python jobs in Pune", "Pune"),
+        ("Django jobs in Pune", "Pune"),
+        ("remote Python Django jobs", "Remote"),
+    ]
+    assert agent._query_variants(["Go"], []) == [("Go jobs", "Remote/Unknown"), ("remote Go jobs", "Remote")]
+
+def test_fan_out_merges_variants_and_ranks_shared_postings_first():
+    backend = FakeSearchBackend()
+    agent = JobSearchAgent(backend)
+    variants = agent._query_variants(["python", "django"], ["pune"])
+    jobs = asyncio.run(agent._fan_out(variants, ["python", "django"]))
+
+    assert backend.calls == len(variants)
+    ids = [job.id for job in jobs]
+    assert len(ids) == len(set(ids))
+    # Postings several variants returned fuse to the top
+    seen = {}
+    for q, label in variants:
+        for r in FakeSearchBackend().search(q):
+            job_id = agent._posting_from_result(r, [], label).id
+            seen[job_id] = seen.get(job_id, 0) + 1
+    shared = [job_id for job_id in ids if seen[job_id] > 1]
+    assert shared and ids[:len(shared)] == shared
+    assert all(job.requirements == ["python", "django"] for job in jobs)
+
+def test_fan_out_skips_failed_queries():
+    agent = JobSearchAgent(PartlyFailingBackend("remote"))
+    jobs = asyncio.run(agent._fan_out(agent._query_variants(["python"], ["pune"]), ["python"]))
+    assert jobs
+    assert all(job.location == "pune" for job in jobs)
+
+    agent = JobSearchAgent(FakeSearchBackend(failure_rate=1.0))
+    assert asyncio.run(agent._fan_out(agent._query_variants(["python"], []), ["python"])) == []
+
+def test_fan_out_drops_queries_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(job_search, "SEARCH_DEADLINE_SECONDS", 0.05)
+    agent = JobSearchAgent(FakeSearchBackend(latency=0.5))
+    start = time.perf_counter()
+    assert asyncio.run(agent._fan_out(agent._query_variants(["python"], []), ["python"])) == []
+    assert time.perf_counter() - start < 0.4
+
+def test_web_search_collapses_syndicated_postings():
+    agent = JobSearchAgent(FakeSearchBackend())
+    jobs = asyncio.run(agent._web_search(agent._query_variants(["golang"], ["delhi"]), ["golang"]))
+    assert jobs
+    assert len({(job.title, job.company) for job in jobs}) == len(jobs)
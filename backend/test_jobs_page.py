@@ -0,0 +1,83 @@
+import base64
+import json
+
+import pytest
+
+from database import db
+
+COMPANIES = ["Acme", "globex", "Initech"]
+
+def _user_with_jobs(count: int) -> int:
+    user_id = db.create_user("paging")["id"]
+    db.add_jobs(user_id, [{
+        "id": f"job-{i}",
+        # Few distinct titles and companies, so pages break inside runs of ties
+        "title": f"Engineer {i % 2}",
+        "company": COMPANIES[i % len(COMPANIES)],
+        "description": "",
+        "location": "Pune" if i % 2 else "Remote",
+        "requirements": ["Python"] if i % 3 == 0 else ["Go"],
+    } for i in range(count)])
+    return user_id
+
+def _walk(user_id: int, limit: int, **filters):
+    """Job ids of every page in order, and the number of pages."""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page = db.get_jobs_page(user_id, limit=limit, cursor=cursor, **filters)
+        ids += [job["id"] for job in page["jobs"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+@pytest.mark.parametrize("sort", ["newest", "oldest", "title", "company"])
+def test_pages_cover_every_job_once_in_order(sort):
+    user_id = _user_with_jobs(11)
+    everything = [job["id"] for job in db.get_jobs_page(user_id, sort=sort, limit=100)["jobs"]]
+    ids, pages = _walk(user_id, 3, sort=sort)
+
+    assert ids == everything
+    assert len(set(ids)) == 11
+    assert pages == 4
+
+def test_sort_orders():
+    user_id = _user_with_jobs(5)
+    newest = [job["id"] for job in db.get_jobs_page(user_id, sort="newest")["jobs"]]
+    assert newest == ["job-4", "job-3", "job-2", "job-1", "job-0"]
+    companies = [job["company"] for job in db.get_jobs_page(user_id, sort="company")["jobs"]]
+    assert companies == sorted(companies, key=str.lower)
+
+def test_last_full_page_has_no_cursor():
+    user_id = _user_with_jobs(6)
+    first = db.get_jobs_page(user_id, limit=3)
+    second = db.get_jobs_page(user_id, limit=3, cursor=first["next_cursor"])
+    assert len(second["jobs"]) == 3
+    assert second["next_cursor"] is None
+
+def test_cursor_holds_sort_key_and_rowid_of_last_job():
+    user_id = _user_with_jobs(4)
+    page = db.get_jobs_page(user_id, sort="title", limit=2)
+    key, rowid = json.loads(base64.urlsafe_b64decode(page["next_cursor"].encode()))
+    assert key == page["jobs"][-1]["title"]
+    assert isinstance(rowid, int)
+
+def test_filters_apply_on_every_page():
+    user_id = _user_with_jobs(12)
+    ids, _ = _walk(user_id, 2, requirement="python", location="pu")
+    assert ids == ["job-9", "job-3"]
+    ids, _ = _walk(user_id, 2, sort="title", company="ACME")
+    assert sorted(ids) == ["job-0", "job-3", "job-6", "job-9"]
+
+def test_pages_are_per_user():
+    user_id = _user_with_jobs(3)
+    other = db.create_user("other")["id"]
+    cursor = db.get_jobs_page(user_id, limit=1)["next_cursor"]
+    assert db.get_jobs_page(other, limit=1, cursor=cursor)["jobs"] == []
+
+def test_rejects_bad_sort_and_cursor():
+    user_id = _user_with_jobs(1)
+    with pytest.raises(ValueError):
+        db.get_jobs_page(user_id, sort="salary")
+    with pytest.raises(ValueError):
+        db.get_jobs_page(user_id, cursor="not-a-cursor")
@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+from metrics import AGENT_DURATION, Counter, Histogram
+from main import app
+
+@pytest.fixture
+def registered():
+    """Metrics created by a test, taken off the shared registry afterwards."""
+    created = []
+    yield created.append
+    for metric in created:
+        metrics._registry.remove(metric)
+
+def _series(lines, prefix):
+    return [line for line in lines if line.startswith(prefix)]
+
+def test_label_values_are_escaped(registered):
+    counter = Counter("test_escape_total", "Escaping", ("path",))
+    registered(counter)
+    counter.inc(path='C:\\tmp\n"quoted"')
+    counter.inc(2.5, path="plain")
+    assert counter.render() == [
+        "# HELP test_escape_total Escaping",
+        "# TYPE test_escape_total counter",
+        'test_escape_total{path="C:\\\\tmp\\n\\"quoted\\""} 1',
+        'test_escape_total{path="plain"} 2.5',
+    ]
+
+def test_histogram_buckets_are_cumulative(registered):
+    histogram = Histogram("test_latency_seconds", "Latency", ("op",), buckets=(0.1, 1.0))
+    registered(histogram)
+    # One observation per bucket, one on a bound and one above the last bound
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, op="read")
+
+    assert _series(histogram.render(), "test_latency_seconds") == [
+        'test_latency_seconds_bucket{op="read",le="0.1"} 2',
+        'test_latency_seconds_bucket{op="read",le="1.0"} 3',
+        'test_latency_seconds_bucket{op="read",le="+Inf"} 4',
+        'test_latency_seconds_sum{op="read"} 5.65',
+        'test_latency_seconds_count{op="read"} 4',
+    ]
+
+def test_inf_bucket_equals_count_when_everything_is_above_the_last_bound(registered):
+    histogram = Histogram("test_slow_seconds", "Slow", buckets=(0.1,))
+    registered(histogram)
+    histogram.observe(3)
+    histogram.observe(4)
+    lines = histogram.render()
+    assert 'test_slow_seconds_bucket{le="0.1"} 0' in lines
+    assert 'test_slow_seconds_bucket{le="+Inf"} 2' in lines
+    assert "test_slow_seconds_count 2" in lines
+
+def test_metrics_endpoint_serves_the_registry():
+    AGENT_DURATION.observe(0.2, agent="MetricsTest", operation="render", outcome="ok")
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE agent_duration_seconds histogram" in response.text
+    labels = 'agent="MetricsTest",operation="render",outcome="ok"'
+    assert f'agent_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in response.text
+    assert f"agent_duration_seconds_count{{{labels}}} 1" in response.text
@@ -0,0 +1,132 @@
+import datetime
+import json
+import sqlite3
+
+from database import DEFAULT_USER_ID, Database
+
+# Schema of a database created before versioned migrations and users existed
+BASELINE_SCHEMA = """
+    CREATE TABLE user_profile (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT, email TEXT, role TEXT, location TEXT, salary_min TEXT, salary_max TEXT,
+        skills TEXT, preferences TEXT
+    );
+    CREATE TABLE jobs (
+        id TEXT PRIMARY KEY,
+        title TEXT, company TEXT, description TEXT, location TEXT, salary_range TEXT,
+        requirements TEXT, status TEXT, application_details TEXT
+    );
+    CREATE TABLE resume_reviews (id INTEGER PRIMARY KEY AUTOINCREMENT, score INTEGER, feedback TEXT, timestamp TEXT);
+    CREATE TABLE learning_paths (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT, timestamp TEXT);
+    CREATE TABLE chat_sessions (id TEXT PRIMARY KEY, title TEXT, messages TEXT, created_at TEXT, updated_at TEXT);
+    CREATE TABLE skill_tests (
+        id TEXT PRIMARY KEY,
+        skill_name TEXT, difficulty TEXT, questions TEXT, created_at TEXT, job_related_ids TEXT
+    );
+    CREATE TABLE test_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_id TEXT, score INTEGER, total_questions INTEGER, answers TEXT, feedback TEXT, taken_at TEXT,
+        time_taken_seconds INTEGER,
+        FOREIGN KEY (test_id) REFERENCES skill_tests(id)
+    );
+    CREATE TABLE user_activity (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        activity_type TEXT, activity_data TEXT, timestamp TEXT
+    );
+"""
+
+def _baseline_db(path: str):
+    now = datetime.datetime.now().isoformat()
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("""
+        INSERT INTO user_profile (name, email, role, location, salary_min, salary_max, skills, preferences)
+        VALUES ('Sam', 'sam@example.com', 'Engineer', 'Pune', '', '', '["Python"]', '{}')
+    """)
+    conn.executemany("INSERT INTO jobs VALUES (?, ?, 'Acme', 'Build things', 'Pune', '', ?, ?, ?)", [
+        ("1", "Python Developer", '["Python"]', "Saved", None),
+        ("2", "Go Developer", '["Go"]', "Applied",
+         json.dumps({"applied_date": now, "status": "Interviewing", "notes": ""})),
+    ])
+    conn.execute("INSERT INTO resume_reviews (score, feedback, timestamp) VALUES (72, '[]', ?)", (now,))
+    conn.execute("INSERT INTO learning_paths (data, timestamp) VALUES (?, ?)", (json.dumps({
+        "skill": "Go", "message": "Start with the tour", "recommendations": [{"title": "Tour of Go"}]
+    }), now))
+    conn.execute("INSERT INTO chat_sessions VALUES ('s1', 'Job hunt', ?, ?, ?)", (json.dumps([
+        {"role": "user", "content": "find go jobs", "timestamp": now},
+        {"role": "agent", "content": "Here are 2 jobs", "agent_name": "JobSearch", "timestamp": now},
+    ]), now, now))
+    conn.execute("INSERT INTO skill_tests VALUES ('t1', 'Go', 'easy', ?, ?, '[]')",
+                 (json.dumps([{"id": 1}, {"id": 2}, {"id": 3}]), now))
+    conn.executemany("INSERT INTO user_activity (activity_type, activity_data, timestamp) VALUES (?, '{}', ?)",
+                     [("job_search", now), ("job_search", now), ("job_apply", now)])
+    conn.commit()
+    conn.close()
+
+def _open(path: str) -> Database:
+    # A second instance beside the app's singleton, on the given file
+    database = object.__new__(Database)
+    database.DB_NAME = path
+    database.init_db()
+    return database
+
+def test_baseline_database_upgrades_to_current_schema(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    _baseline_db(path)
+    database = _open(path)
+    user = DEFAULT_USER_ID
+
+    assert database.schema_version() == len(database._migrations())
+
+    jobs = {job["id"]: job for job in database.get_jobs(user)}
+    assert set(jobs) == {"1", "2"}
+    page = database.get_jobs_page(user, status="Applied")
+    assert [job["id"] for job in page["jobs"]] == ["2"]
+    assert [job["id"] for job in database.search_jobs(user, "python")] == ["1"]
+
+    session = database.get_session(user, "s1")
+    assert [m["content"] for m in session["messages"]] == ["find go jobs", "Here are 2 jobs"]
+    summary = database.get_chat_sessions(user)["s1"]
+    assert summary["message_count"] == 2
+    assert database.get_active_session(user, message_limit=0)["id"] == "s1"
+
+    paths = database.get_all_learning_paths(user)
+    assert paths[0]["skill"] == "Go" and paths[0]["recommendations"] == [{"title": "Tour of Go"}]
+    assert database.get_all_skill_tests(user)[0]["question_count"] == 3
+
+    stats = database.get_dashboard_stats(user)
+    assert (stats["total_jobs"], stats["jobs_applied"], stats["resume_score"]) == (2, 1, 72)
+    assert stats["application_history"][-1]["jobs"] == 1
+    assert database.get_activity_stats(user) == {"job_search": 2, "job_apply": 1}
+    assert database.rebuild_dashboard_stats() == []
+
+    assert [r["query"] for r in database.check_query_plans(user) if r["full_scans"]] == []
+
+def test_migrations_are_idempotent(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    _baseline_db(path)
+    database = _open(path)
+    before = (database.get_jobs(DEFAULT_USER_ID), database.get_session(DEFAULT_USER_ID, "s1"),
+              database.get_dashboard_stats(DEFAULT_USER_ID))
+
+    # Reopening applies nothing; forgetting every version replays them all
+    _open(path)
+    with database._write() as cur:
+        cur.execute("SELECT count(*) FROM schema_version")
+        assert cur.fetchone()[0] == len(database._migrations())
+        cur.execute("DELETE FROM schema_version")
+    database._migrate()
+
+    assert database.schema_version() == len(database._migrations())
+    after = (database.get_jobs(DEFAULT_USER_ID), database.get_session(DEFAULT_USER_ID, "s1"),
+             database.get_dashboard_stats(DEFAULT_USER_ID))
+    assert after == before
+
+def test_new_database_gets_every_migration(tmp_path):
+    database = _open(str(tmp_path / "new.db"))
+    with database._read() as cur:
+        cur.execute("SELECT version, name FROM schema_version ORDER BY version")
+        applied = [(row['version'], row['name']) for row in cur.fetchall()]
+    assert applied == [(i, m.__name__.lstrip("_")) for i, m in enumerate(database._migrations(), start=1)]
+    # Seeded with the default user's sample data
+    assert database.get_jobs(DEFAULT_USER_ID)
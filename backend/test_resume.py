@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import make_pdf
+from database import db
+import resume_parser
+from resume_compactor import compact_resume, estimate_tokens
+from resume_parser import content_hash, extract_pdf_text, extract_text
+
+def test_pdf_pages_are_separated_by_form_feeds():
+    text = extract_pdf_text(make_pdf(["Jane Doe\nPython", "Projects"]))
+    pages = text.split("\f")
+    assert len(pages) == 2
+    assert "Jane Doe" in pages[0] and "Projects" in pages[1]
+
+def test_pdf_page_limit():
+    with pytest.raises(ValueError):
+        extract_pdf_text(make_pdf(["one", "two", "three"]), max_pages=2)
+
+def test_extract_text():
+    assert asyncio.run(extract_text("Jane Doe\nSkills: Go".encode("utf-8"), "resume.txt")) == "Jane Doe\nSkills: Go"
+    # PDFs are parsed in the worker pool
+    assert "Jane Doe" in asyncio.run(extract_text(make_pdf(["Jane Doe"]), "Resume.PDF"))
+
+def test_extract_text_rejects_oversized_files(monkeypatch):
+    monkeypatch.setattr(resume_parser, "RESUME_MAX_BYTES", 10)
+    with pytest.raises(ValueError):
+        asyncio.run(extract_text(b"x" * 11, "resume.txt"))
+
+def test_review_reuse_by_content_hash():
+    user_id = db.create_user("resume")["id"]
+    first, second = content_hash(b"resume v1"), content_hash(b"resume v2")
+    assert first != second and first == content_hash(b"resume v1")
+
+    db.add_resume_review(user_id, {"score": 70, "feedback": ["Add metrics"]}, first)
+    assert db.get_resume_review_by_hash(user_id, first) == {"score": 70, "feedback": ["Add metrics"]}
+    assert db.get_resume_review_by_hash(user_id, second) is None
+    # Reviews are per user
+    assert db.get_resume_review_by_hash(db.create_user("other")["id"], first) is None
+
+    # Re-uploading the file behind the latest review adds no second copy
+    db.add_resume_review(user_id, {"score": 70, "feedback": ["Add metrics"]}, first)
+    assert db.get_dashboard_stats(user_id)["recent_activity"] == ["Resume reviewed: Score 70"]
+
+    db.add_resume_review(user_id, {"score": 85, "feedback": []}, second)
+    assert db.get_latest_resume_review(user_id)["score"] == 85
+    assert db.get_dashboard_stats(user_id)["resume_score"] == 85
+
+def test_compaction_keeps_first_copy_of_running_header():
+    page = "Jane Doe\njane@example.com | +91 98765 43210\n{body}\nJane Doe · Page {n} of 2"
+    text = "\f".join([
+        page.format(body="Experience\nBuilt payment services at Acme", n=1),
+        page.format(body="Skills: Python, SQL\nReferences available on request", n=2),
+    ])
+    compacted = compact_resume(text)["text"]
+    assert compacted.startswith("Jane Doe\njane@example.com | +91 98765 43210\n")
+    assert compacted.count("jane@example.com") == 1
+    assert "Page 2" not in compacted and "References" not in compacted
+    assert "EXPERIENCE:\nBuilt payment services at Acme" in compacted
+    assert "SKILLS:\nPython, SQL" in compacted
+
+def test_compaction_fits_budget_favouring_experience():
+    text = "Experience\n" + "\n".join(f"Shipped feature {i} for the billing team" for i in range(200))
+    text += "\nEducation\n" + "\n".join(f"Course {i}" for i in range(200))
+    result = compact_resume(text, budget=300)
+    assert result["compacted_tokens"] <= 300
+    assert result["saved_tokens"] == result["original_tokens"] - result["compacted_tokens"]
+    experience, education = result["text"].split("EDUCATION:")
+    assert estimate_tokens(experience) > estimate_tokens(education)
@@ -0,0 +1,70 @@
+from database import db
+
+def _job(job_id: str, title: str, description: str = "", location: str = "Remote", requirements=None) -> dict:
+    return {"id": job_id, "title": title, "company": "Acme", "description": description,
+            "location": location, "requirements": requirements or []}
+
+def _ids(results) -> list:
+    return [job["id"] for job in results]
+
+def test_title_match_outranks_description_match():
+    user_id = db.create_user("search")["id"]
+    db.add_jobs(user_id, [
+        _job("desc", "Backend Engineer", "Our stack is mostly Kotlin with some Clojure scripts"),
+        _job("title", "Clojure Developer", "Build internal services"),
+    ])
+    # A rare term: bm25 scores terms found in most of the index as near zero
+    results = db.search_jobs(user_id, "clojure")
+    assert _ids(results) == ["title", "desc"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+def test_last_term_matches_as_prefix():
+    user_id = db.create_user("search")["id"]
+    db.add_jobs(user_id, [_job("py", "Python Developer"), _job("go", "Go Developer")])
+    assert _ids(db.search_jobs(user_id, "pyth")) == ["py"]
+    assert _ids(db.search_jobs(user_id, "developer pyth"))[0] == "py"
+
+def test_location_boost():
+    user_id = db.create_user("search")["id"]
+    db.add_jobs(user_id, [
+        _job("delhi", "Data Engineer", location="Delhi"),
+        _job("pune", "Data Engineer", location="Pune, India"),
+    ])
+    assert _ids(db.search_jobs(user_id, "data engineer", location="pune")) == ["pune", "delhi"]
+    # With no keywords, everything in the location is returned
+    assert _ids(db.search_jobs(user_id, "", location="Delhi")) == ["delhi"]
+
+def test_requirements_are_searchable():
+    user_id = db.create_user("search")["id"]
+    db.add_jobs(user_id, [_job("k8s", "Platform Engineer", requirements=["Kubernetes", "Terraform"])])
+    results = db.search_jobs(user_id, "terraform")
+    assert _ids(results) == ["k8s"]
+    assert results[0]["requirements"] == ["Kubernetes", "Terraform"]
+
+def test_index_follows_updates():
+    user_id = db.create_user("search")["id"]
+    db.add_jobs(user_id, [_job("job", "Rust Engineer")])
+    db.add_jobs(user_id, [_job("job", "Elixir Engineer")])
+    assert db.search_jobs(user_id, "rust") == []
+    assert _ids(db.search_jobs(user_id, "elixir")) == ["job"]
+
+def test_results_are_per_user_and_catalogue_is_opt_in():
+    owner = db.create_user("search")["id"]
+    other = db.create_user("search")["id"]
+    db.add_jobs(owner, [_job("mine", "Haskell Engineer")])
+    db.index_catalogue([_job("catalogue-1", "Haskell Consultant")])
+    try:
+        assert db.search_jobs(other, "haskell") == []
+        assert _ids(db.search_jobs(owner, "haskell")) == ["mine"]
+        catalogue = db.search_jobs(other, "haskell", include_catalogue=True)
+        assert _ids(catalogue) == ["catalogue-1"]
+        assert catalogue[0]["status"] is None
+    finally:
+        db.index_catalogue([])
+
+def test_query_syntax_is_not_interpreted():
+    user_id = db.create_user("search")["id"]
+    db.add_jobs(user_id, [_job("job", "C++ Engineer")])
+    for query in ['"', 'owner : "catalogue"', "c++ OR NOT (", "title:*", "-"]:
+        db.search_jobs(user_id, query)
+    assert db.search_jobs(user_id, 'owner : "catalogue"') == []
@@ -0,0 +1,114 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from database import db
+from main import app
+import task_queue
+from task_queue import TaskQueue
+
+# Each test claims its own task kind, so tasks left in the shared database by
+# other tests are never picked up
+
+def test_claim_leases_the_task_to_one_owner():
+    user_id = db.create_user("claim")["id"]
+    task_id = db.enqueue_task(user_id, "claim", {"skill": "Go"}, max_attempts=3)
+
+    task = db.claim_task(["claim"], "worker-a", lease_seconds=60)
+    assert (task["id"], task["status"], task["attempts"], task["payload"]) == (task_id, "running", 1, {"skill": "Go"})
+    assert db.claim_task(["claim"], "worker-b", lease_seconds=60) is None
+
+    assert db.renew_task_lease(task_id, "worker-a", 60)
+    assert not db.renew_task_lease(task_id, "worker-b", 60)
+    # A live lease is not requeued
+    db.requeue_running_tasks()
+    assert db.get_task(user_id, task_id)["status"] == "running"
+
+    db.finish_task(task_id, "worker-a", {"ok": True})
+    task = db.get_task(user_id, task_id)
+    assert (task["status"], task["result"]) == ("done", {"ok": True})
+    assert not db.renew_task_lease(task_id, "worker-a", 60)
+
+def test_expired_lease_is_requeued():
+    user_id = db.create_user("expiry")["id"]
+    task_id = db.enqueue_task(user_id, "expiry", {}, max_attempts=3)
+    db.claim_task(["expiry"], "dead-worker", lease_seconds=0)
+
+    assert db.requeue_running_tasks() >= 1
+    assert db.get_task(user_id, task_id)["status"] == "queued"
+    task = db.claim_task(["expiry"], "worker-b", lease_seconds=60)
+    assert (task["id"], task["attempts"]) == (task_id, 2)
+    # The old owner can no longer finish it
+    db.finish_task(task_id, "dead-worker", {})
+    assert db.get_task(user_id, task_id)["status"] == "running"
+
+def test_shutdown_requeues_only_the_owners_tasks():
+    user_id = db.create_user("shutdown")["id"]
+    mine = db.enqueue_task(user_id, "shutdown", {}, max_attempts=3)
+    theirs = db.enqueue_task(user_id, "shutdown", {}, max_attempts=3)
+    db.claim_task(["shutdown"], "worker-a", lease_seconds=60)
+    db.claim_task(["shutdown"], "worker-b", lease_seconds=60)
+
+    assert db.requeue_running_tasks("worker-a") == 1
+    assert db.get_task(user_id, mine)["status"] == "queued"
+    assert db.get_task(user_id, theirs)["status"] == "running"
+
+def test_failed_task_retries_after_the_delay_until_out_of_attempts():
+    user_id = db.create_user("retry")["id"]
+    task_id = db.enqueue_task(user_id, "retry", {}, max_attempts=2)
+
+    db.claim_task(["retry"], "worker", lease_seconds=60)
+    assert db.fail_task(task_id, "worker", "boom", retry_delay=60) == "queued"
+    # Not due until the backoff has passed
+    assert db.claim_task(["retry"], "worker", lease_seconds=60) is None
+
+    with db._write() as cur:
+        cur.execute("UPDATE tasks SET run_after = 0 WHERE id = ?", (task_id,))
+    assert db.claim_task(["retry"], "worker", lease_seconds=60)["attempts"] == 2
+    assert db.fail_task(task_id, "worker", "boom again", retry_delay=0) == "failed"
+    task = db.get_task(user_id, task_id)
+    assert (task["status"], task["error"]) == ("failed", "boom again")
+    assert db.claim_task(["retry"], "worker", lease_seconds=60) is None
+
+def test_workers_run_and_retry_tasks(monkeypatch):
+    monkeypatch.setattr(task_queue, "TASK_RETRY_BASE_SECONDS", 0)
+    user_id = db.create_user("workers")["id"]
+    calls = []
+
+    async def flaky(task_user_id, payload):
+        calls.append((task_user_id, payload))
+        if len(calls) == 1:
+            raise RuntimeError("transient")
+        return {"skill": payload["skill"]}
+
+    async def scenario():
+        queue = TaskQueue(workers=1, lease_seconds=60)
+        queue.register("workers", flaky)
+        await queue.start()
+        try:
+            task_id = await queue.enqueue(user_id, "workers", {"skill": "Rust"})
+            for _ in range(100):
+                task = db.get_task(user_id, task_id)
+                if task["status"] in ("done", "failed"):
+                    return task
+                await asyncio.sleep(0.02)
+        finally:
+            await queue.stop()
+
+    task = asyncio.run(scenario())
+    assert (task["status"], task["attempts"], task["result"]) == ("done", 2, {"skill": "Rust"})
+    assert calls == [(user_id, {"skill": "Rust"})] * 2
+
+def test_task_endpoint_is_per_user():
+    client = TestClient(app)
+    owner, other = db.create_user("owner"), db.create_user("other")
+    task_id = db.enqueue_task(owner["id"], "endpoint", {"skill": "SQL"}, max_attempts=3)
+
+    response = client.get(f"/api/tasks/{task_id}", headers={"Authorization": f"Bearer {owner['api_key']}"})
+    assert response.status_code == 200
+    assert (response.json()["status"], response.json()["payload"]) == ("queued", {"skill": "SQL"})
+
+    response = client.get(f"/api/tasks/{task_id}", headers={"Authorization": f"Bearer {other['api_key']}"})
+    assert response.status_code == 404
+    response = client.get("/api/tasks/missing", headers={"Authorization": f"Bearer {owner['api_key']}"})
+    assert response.status_code == 404
@@ -1,10 +1,70 @@
 import API_BASE_URL from './config';
 
+// API key of the signed-in user, if the backend has users set up. Without
+// one, the backend serves the default user (unless it requires a key).
+const API_KEY_KEY = 'apiKey';
+
+export const authHeaders = () => {
+  const apiKey = localStorage.getItem(API_KEY_KEY);
+  return apiKey ? { Authorization: `Bearer ${apiKey}` } : {};
+};
+
 export const sendMessage = async (message) => {
   const response = await fetch(`${API_BASE_URL}/api/chat`, {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...authHeaders() },
+    body: JSON.stringify({ message })
+  });
+  return response.json();
+};
+
+// Streams a chat turn from /api/chat/stream, calling onEvent(event, data)
+// for every Server-Sent Event (routing, jobs, token, tasks, done).
+export const streamMessage = async (message, onEvent) => {
+  const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', ...authHeaders() },
     body: JSON.stringify({ message })
   });
+  if (!response.ok || !response.body) {
+    throw new Error(`Stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      onEvent(event, data ? JSON.parse(data) : null);
+    }
+  }
+};
+
+// Background tasks (learning paths, skill tests) queued by chat turns. Their ids
+// are kept in localStorage so the Learning Hub can follow them across pages.
+const PENDING_TASKS_KEY = 'pendingTasks';
+
+export const getPendingTasks = () => JSON.parse(localStorage.getItem(PENDING_TASKS_KEY) || '[]');
+
+export const setPendingTasks = (ids) => localStorage.setItem(PENDING_TASKS_KEY, JSON.stringify(ids));
+
+export const addPendingTasks = (tasks) => setPendingTasks([...getPendingTasks(), ...tasks.map(t => t.id)]);
+
+export const getTask = async (taskId) => {
+  const response = await fetch(`${API_BASE_URL}/api/tasks/${taskId}`, { headers: authHeaders() });
+  if (response.status === 404) return null;
   return response.json();
 };
@@ -1,5 +1,5 @@
 import React, { useState, useRef, useEffect } from 'react';
-import { sendMessage } from '../api';
+import { streamMessage, addPendingTasks } from '../api';
 import ReactMarkdown from 'react-markdown';
 import { motion } from 'framer-motion';
 import axios from 'axios';
@@ -46,15 +46,28 @@ const ChatInterface = ({ sessionId }) => {
         setInput('');
         setLoading(true);
 
+        // Update the in-progress agent message (always the last one) as events arrive
+        const updateAgentMessage = (update) => {
+            setMessages(prev => [...prev.slice(0, -1), { ...prev[prev.length - 1], ...update(prev[prev.length - 1]) }]);
+        };
+
         try {
-            const response = await sendMessage(input);
-            const agentMessage = {
-                role: 'agent',
-                content: response.response,
-                agentName: response.agent,
-                reasoning: response.reasoning
-            };
-            setMessages(prev => [...prev, agentMessage]);
+            let started = false;
+            await streamMessage(input, (event, data) => {
+                if (event === 'routing') {
+                    setMessages(prev => [...prev, { role: 'agent', content: '', agentName: data.agent, reasoning: data.reasoning }]);
+                    started = true;
+                    setLoading(false);
+                } else if (event === 'tasks') {
+                    addPendingTasks(data);
+                } else if (event === 'token' && started) {
+                    updateAgentMessage(msg => ({ content: msg.content + data.text }));
+                } else if (event === 'done' && started) {
+                    updateAgentMessage(() => ({ content: data.response, agentName: data.agent, reasoning: data.reasoning }));
+                } else if (event === 'error') {
+                    throw new Error(data.detail);
+                }
+            });
         } catch (error) {
             setMessages(prev => [...prev, { role: 'agent', content: 'Sorry, something went wrong. Please check your API key.' }]);
         } finally {
@@ -2,6 +2,14 @@ import { StrictMode } from 'react'
 import { createRoot } from 'react-dom/client'
 import './index.css'
 import App from './App.jsx'
+import axios from 'axios'
+import { authHeaders } from './api'
+
+// Pages call axios directly; send the user's API key with every request
+axios.interceptors.request.use((config) => {
+  Object.assign(config.headers, authHeaders())
+  return config
+})
 
 createRoot(document.getElementById('root')).render(
   <StrictMode>
@@ -10,18 +10,21 @@ const JobBoardPage = () => {
     const navigate = useNavigate();
     const [jobs, setJobs] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+
+    const fetchJobs = async (cursor = null) => {
+        try {
+            const res = await axios.get(`${API_BASE_URL}/api/jobs`, { params: { limit: 50, cursor: cursor || undefined } });
+            setJobs(prev => cursor ? [...prev, ...res.data] : res.data);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch (e) {
+            console.error(e);
+        } finally {
+            setLoading(false);
+        }
+    };
 
     useEffect(() => {
-        const fetchJobs = async () => {
-            try {
-                const res = await axios.get(`${API_BASE_URL}/api/jobs`);
-                setJobs(res.data);
-            } catch (e) {
-                console.error(e);
-            } finally {
-                setLoading(false);
-            }
-        };
         fetchJobs();
     }, []);
 
@@ -240,6 +243,18 @@ const JobBoardPage = () => {
                     </div>
                 )}
             </motion.div>
+
+            {nextCursor && (
+                <div style={{ textAlign: 'center', marginTop: '2rem' }}>
+                    <button
+                        onClick={() => fetchJobs(nextCursor)}
+                        className="btn-secondary"
+                        style={{ padding: '0.75rem 2rem' }}
+                    >
+                        Load more jobs
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
@@ -5,6 +5,7 @@ import { BookOpen, Video, Code, TrendingUp, CheckCircle2, Award, Clock, Target,
 import { useNavigate } from 'react-router-dom';
 import API_BASE_URL from '../config';
 import Skeleton from '../components/Skeleton';
+import { getPendingTasks, setPendingTasks, getTask } from '../api';
 
 const LearningHubPage = () => {
     const navigate = useNavigate();
@@ -13,29 +14,46 @@ const LearningHubPage = () => {
     const [testResults, setTestResults] = useState([]);
     const [loading, setLoading] = useState(true);
 
-    useEffect(() => {
-        const fetchData = async () => {
-            try {
-                // Fetch learning paths
-                const pathsRes = await axios.get(`${API_BASE_URL}/api/learning/all`);
-                setLearningPaths(pathsRes.data || []);
+    const fetchData = async () => {
+        try {
+            // Fetch learning paths
+            const pathsRes = await axios.get(`${API_BASE_URL}/api/learning/all`);
+            setLearningPaths(pathsRes.data || []);
 
-                // Fetch available skill tests
-                const testsRes = await axios.get(`${API_BASE_URL}/api/tests`);
-                setSkillTests(testsRes.data || []);
+            // Fetch available skill tests
+            const testsRes = await axios.get(`${API_BASE_URL}/api/tests`);
+            setSkillTests(testsRes.data || []);
 
-                // Fetch test history
-                const resultsRes = await axios.get(`${API_BASE_URL}/api/tests/results`);
-                setTestResults(resultsRes.data || []);
-            } catch (e) {
-                console.error('Failed to fetch learning data:', e);
-            } finally {
-                setLoading(false);
-            }
-        };
+            // Fetch test history
+            const resultsRes = await axios.get(`${API_BASE_URL}/api/tests/results`);
+            setTestResults(resultsRes.data || []);
+        } catch (e) {
+            console.error('Failed to fetch learning data:', e);
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    useEffect(() => {
         fetchData();
     }, []);
 
+    // Learning paths and tests from a job search are generated in the background;
+    // poll their tasks and refresh the page as each one lands
+    useEffect(() => {
+        const poll = setInterval(async () => {
+            const pending = getPendingTasks();
+            if (pending.length === 0) return;
+            const tasks = await Promise.all(pending.map(id => getTask(id).catch(() => ({ id, status: 'queued' }))));
+            const finished = pending.filter((id, i) => !tasks[i] || ['done', 'failed'].includes(tasks[i].status));
+            if (finished.length > 0) {
+                setPendingTasks(getPendingTasks().filter(id => !finished.includes(id)));
+                fetchData();
+            }
+        }, 3000);
+        return () => clearInterval(poll);
+    }, []);
+
     const getTestStatus = (testId) => {
         const results = testResults.filter(r => r.test_id === testId);
         if (results.length === 0) return null;
@@ -50,7 +68,7 @@ const LearningHubPage = () => {
         };
     };
 
-    const allRecommendations = learningPaths.flatMap(path => path.data?.recommendations || []);
+    const allRecommendations = learningPaths.flatMap(path => path.recommendations || []);
 
     if (loading) {
         return (
@@ -286,7 +304,7 @@ const LearningHubPage = () => {
                                     </div>
                                 </div>
                                 <div style={{ color: 'var(--text-muted)' }}>
-                                    <p>{path.data?.message || 'Custom learning path created for your career goals'}</p>
+                                    <p>{path.message || 'Custom learning path created for your career goals'}</p>
                                 </div>
                             </motion.div>
                         ))}